@@ -0,0 +1,211 @@
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+# <pasta>/: um .npy por coluna + manifesto.json com dtypes, categorias e a
+# identidade do arquivo de origem (o CSV exportado junto, o context.xlsx
+# convertido…). Mesmo formato para as etapas do ETL e para os sidecars de
+# cache_context
+SUFIXO = ".colunas"
+VERSAO = 2
+CATEGORICAS = ["patient", "session", "segment", "gender"]
+
+# o CSV de cada etapa passa a ser uma exportação opcional
+EXPORTAR_CSV = True
+
+
+def caminho_artefato(caminho_csv):
+    raiz, _ = os.path.splitext(caminho_csv)
+    return raiz + SUFIXO
+
+
+def identidade_fonte(caminho):
+    if caminho is None or not os.path.exists(caminho):
+        return None
+    st = os.stat(caminho)
+    return {"mtime_ns": st.st_mtime_ns, "tamanho": st.st_size}
+
+
+def _tipar(serie, nome, categoricas):
+    # object → categoria (colunas de identificação), número ou texto
+    if nome in categoricas:
+        return serie.astype("category")
+    if serie.dtype == object or isinstance(serie.dtype, pd.StringDtype):
+        valores = serie.dropna()
+        if len(valores) and valores.map(lambda v: isinstance(v, str)).all():
+            numeros = pd.to_numeric(serie, errors="coerce")
+            if numeros.notna().sum() == len(valores):
+                return numeros
+    return serie
+
+
+# ================================================================
+# ESCRITA
+# ================================================================
+def gravar_colunas(df, destino, fonte=None, indice=None):
+    # df → destino/ (pasta trocada de uma vez no fim); fonte: arquivo cuja
+    # identidade valida o artefato; indice: vetor gravado como índice das
+    # linhas (ex.: a linha original da planilha)
+    temporario = destino + ".tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    h = hashlib.sha256()
+
+    def gravar(arquivo, valores, **kwargs):
+        np.save(os.path.join(temporario, arquivo), valores, **kwargs)
+        if valores.dtype != object:
+            h.update(np.ascontiguousarray(valores).view(np.uint8))
+        else:
+            h.update(repr(valores.tolist()).encode("utf-8"))
+
+    colunas = []
+    for j, nome in enumerate(df.columns):
+        serie = df.iloc[:, j]
+        arquivo = f"c{j:03d}.npy"
+        entrada = {"nome": nome, "arquivo": arquivo, "dtype": str(serie.dtype)}
+
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            categorias = serie.cat.categories
+            entrada["tipo"] = "categoria"
+            entrada["categorias"] = [c.item() if hasattr(c, "item") else c for c in categorias]
+            gravar(arquivo, serie.cat.codes.to_numpy())
+        elif serie.to_numpy().dtype != object:
+            gravar(arquivo, serie.to_numpy())
+        else:
+            # object ou texto do pandas (StringDtype): sem dtype numpy nativo
+            nulos = serie.isna().to_numpy()
+            if serie[~nulos].map(lambda v: isinstance(v, str)).all():
+                # texto → unicode de largura fixa (mapeável) + máscara de nulos
+                entrada["tipo"] = "texto"
+                gravar(arquivo, serie.fillna("").to_numpy(dtype=str))
+            else:
+                entrada["tipo"] = "objeto"
+                gravar(arquivo, serie.to_numpy(), allow_pickle=True)
+            if nulos.any():
+                entrada["nulos"] = f"c{j:03d}_nulos.npy"
+                gravar(entrada["nulos"], nulos)
+        colunas.append(entrada)
+
+    manifesto = {
+        "versao": VERSAO,
+        "linhas": len(df),
+        "colunas": colunas,
+        "hash": h.hexdigest()[:32],
+        "fonte": identidade_fonte(fonte),
+    }
+    if indice is not None:
+        manifesto["indice"] = "indice.npy"
+        gravar("indice.npy", np.asarray(indice))
+    with open(os.path.join(temporario, "manifesto.json"), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1)
+
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+    return destino
+
+
+def salvar_colunar(df, caminho_csv, categoricas=CATEGORICAS):
+    tipado = pd.DataFrame({j: _tipar(df.iloc[:, j], nome, categoricas) for j, nome in enumerate(df.columns)})
+    tipado.columns = df.columns
+    return gravar_colunas(tipado, caminho_artefato(caminho_csv), fonte=caminho_csv)
+
+
+def salvar_etapa(df, caminho_csv, exportar_csv=None):
+    # saída de uma etapa do ETL: artefato tipado sempre, CSV se pedido
+    if exportar_csv is None:
+        exportar_csv = EXPORTAR_CSV
+    if exportar_csv:
+        df.to_csv(caminho_csv, index=False)
+    elif os.path.exists(caminho_csv):
+        # CSV antigo deixaria de corresponder ao artefato
+        os.remove(caminho_csv)
+    salvar_colunar(df, caminho_csv)
+
+
+# ================================================================
+# LEITURA (MEMORY-MAP, SÓ AS COLUNAS PEDIDAS)
+# ================================================================
+def ler_manifesto(pasta, fonte=None):
+    # o artefato vale se a fonte não existe (o artefato é a única cópia) ou
+    # é a mesma registrada quando ele foi gravado
+    caminho_manifesto = os.path.join(pasta, "manifesto.json")
+    if not os.path.exists(caminho_manifesto):
+        return None
+    try:
+        with open(caminho_manifesto, encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifesto.get("versao") != VERSAO:
+        return None
+    atual = identidade_fonte(fonte)
+    if atual is not None and manifesto.get("fonte") != atual:
+        return None
+    return manifesto
+
+
+def ler_colunas(pasta, manifesto, colunas=None, categorias=True, ignorar_ausentes=False):
+    por_nome = {e["nome"]: e for e in manifesto["colunas"]}
+    nomes = list(por_nome) if colunas is None else list(colunas)
+    faltando = [c for c in nomes if c not in por_nome]
+    if faltando and not ignorar_ausentes:
+        raise KeyError(f"colunas ausentes no artefato: {faltando}")
+    nomes = [c for c in nomes if c in por_nome]
+
+    dados = {}
+    for nome in nomes:
+        entrada = por_nome[nome]
+        tipo = entrada.get("tipo")
+        caminho = os.path.join(pasta, entrada["arquivo"])
+
+        if tipo == "objeto":
+            valores = np.load(caminho, allow_pickle=True)
+        else:
+            valores = np.load(caminho, mmap_mode="r")
+
+        if tipo == "categoria":
+            serie = pd.Categorical.from_codes(np.asarray(valores), entrada["categorias"])
+            valores = serie if categorias else np.asarray(serie, dtype=object)
+        elif tipo == "texto":
+            valores = valores.astype(object)
+
+        if "nulos" in entrada:
+            nulos = np.load(os.path.join(pasta, entrada["nulos"]))
+            valores = np.asarray(valores, dtype=object)
+            valores[nulos] = np.nan
+        dados[nome] = valores
+
+    indice = None
+    if "indice" in manifesto:
+        indice = pd.Index(np.load(os.path.join(pasta, manifesto["indice"]), mmap_mode="r"))
+    return pd.DataFrame(dados, index=indice, columns=nomes)
+
+
+def manifesto_valido(caminho_csv):
+    return ler_manifesto(caminho_artefato(caminho_csv), caminho_csv)
+
+
+def ler_colunar(caminho_csv, colunas=None, manifesto=None, categorias=True):
+    manifesto = manifesto or manifesto_valido(caminho_csv)
+    if manifesto is None:
+        raise FileNotFoundError(f"artefato colunar ausente ou desatualizado: {caminho_artefato(caminho_csv)}")
+    return ler_colunas(caminho_artefato(caminho_csv), manifesto, colunas, categorias)
+
+
+def ler_etapa(caminho_csv, colunas=None, categorias=True):
+    # artefato colunar quando existe e está em dia; senão o CSV, já
+    # restrito às colunas pedidas
+    manifesto = manifesto_valido(caminho_csv)
+    if manifesto is not None:
+        return ler_colunar(caminho_csv, colunas, manifesto, categorias)
+    df = pd.read_csv(caminho_csv, usecols=colunas)
+    return df if colunas is None else df[list(colunas)]
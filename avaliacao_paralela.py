@@ -0,0 +1,126 @@
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from reticulado import Reticulado, avaliar_genoma
+from perfil_avaliacao import avaliar_perfilado
+
+
+# ================================================================
+# MATRIZ DE TRANSAÇÕES EM MEMÓRIA COMPARTILHADA
+# ================================================================
+class MatrizCompartilhada:
+    # o DataFrame booleano é copiado uma única vez para um bloco de memória
+    # compartilhada; os workers só recebem (nome, shape, colunas)
+    def __init__(self, dados):
+        matriz = dados.to_numpy(dtype=bool)
+        self.shape = matriz.shape
+        self.colunas = list(dados.columns)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(matriz.nbytes, 1))
+        np.ndarray(self.shape, dtype=bool, buffer=self.shm.buf)[:] = matriz
+
+    @property
+    def descritor(self):
+        return (self.shm.name, self.shape, self.colunas)
+
+    def liberar(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def anexar_matriz(nome, shape, colunas):
+    shm = shared_memory.SharedMemory(name=nome)
+    matriz = np.ndarray(shape, dtype=bool, buffer=shm.buf)
+    return shm, pd.DataFrame(matriz, columns=colunas, copy=False)
+
+
+# ================================================================
+# ESTADO DE CADA WORKER
+# ================================================================
+_SHM = None
+_DADOS = None
+_RETICULADO = None
+_DISCRETIZADOR = None
+_ORCAMENTO = None
+
+
+def _iniciar_worker(nome, shape, colunas, discretizador=None, orcamento=None, reticulado=None):
+    global _SHM, _DADOS, _RETICULADO, _DISCRETIZADOR, _ORCAMENTO
+    _SHM, _DADOS = anexar_matriz(nome, shape, colunas)
+    _RETICULADO = reticulado
+    _DISCRETIZADOR = discretizador
+    _ORCAMENTO = orcamento
+
+
+def _obter_reticulado(genoma):
+    # o reticulado vem pronto do processo principal; só se ele não foi
+    # enviado (GA evoluindo os limites) e um genoma sem limites próprios
+    # aparecer é que o worker minera o seu
+    global _RETICULADO
+    if _RETICULADO is None and (len(genoma) == 2 or genoma[2] is None):
+        _RETICULADO = Reticulado(_DADOS, orcamento=_ORCAMENTO)
+    return _RETICULADO
+
+
+def _avaliar_genoma(genoma):
+    # fora do orçamento o genoma volta penalizado e o worker segue vivo
+    return avaliar_genoma(genoma, _obter_reticulado(genoma), _DISCRETIZADOR, orcamento=_ORCAMENTO)
+
+
+def _avaliar_genoma_perfilado(genoma):
+    # mesma avaliação, devolvendo também o perfil medido dentro do worker
+    t_reticulado = 0.0
+    if _RETICULADO is None:
+        inicio = time.perf_counter()
+        _obter_reticulado(genoma)
+        t_reticulado = time.perf_counter() - inicio
+
+    fitness, regras, perfil = avaliar_perfilado(_obter_reticulado(genoma), genoma, _DISCRETIZADOR, _ORCAMENTO)
+    perfil["t_reticulado_s"] = t_reticulado
+    return fitness, regras, perfil
+
+
+# ================================================================
+# AVALIADOR PARALELO DA POPULAÇÃO
+# ================================================================
+class AvaliadorParalelo:
+    def __init__(self, dados, workers, chunksize=1, discretizador=None, orcamento=None, reticulado=None):
+        # discretizador: colunas já ordenadas, enviadas uma vez a cada worker
+        # para os genomas que evoluem os limites dos bins; orcamento: limites
+        # de mineração de cada avaliação (OrcamentoMineracao); reticulado:
+        # minerado uma vez aqui (ou recebido pronto) e entregue aos workers
+        # pelo initializer — com fork eles o herdam sem cópia nem pickle; com
+        # spawn vai em pickle só o índice (sem a matriz one-hot)
+        self.workers = workers
+        self.chunksize = chunksize
+        if reticulado is None and discretizador is None:
+            reticulado = Reticulado(dados, orcamento=orcamento)
+        self.matriz = MatrizCompartilhada(dados)
+        self.pool = mp.Pool(
+            processes=workers,
+            initializer=_iniciar_worker,
+            initargs=(*self.matriz.descritor, discretizador, orcamento, reticulado)
+        )
+
+    def avaliar(self, genomas, perfilar=False):
+        # map preserva a ordem de entrada: o resultado depende só dos genomas,
+        # nunca de qual worker os avaliou; com perfilar=True cada resultado
+        # traz também o perfil (fitness, regras, perfil)
+        if not genomas:
+            return []
+        funcao = _avaliar_genoma_perfilado if perfilar else _avaliar_genoma
+        return self.pool.map(funcao, genomas, chunksize=self.chunksize)
+
+    def fechar(self):
+        self.pool.close()
+        self.pool.join()
+        self.matriz.liberar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,259 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+import preprocessamento
+from artefato_colunar import salvar_etapa, manifesto_valido
+from cache_fitness import CacheFitness
+from geracao_regras import gerar_regras
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+GRADE_MIN_SUPPORT = [0.01, 0.05, 0.1, 0.25, 0.5]
+GRADE_MAX_LEN = [2, 4, 7]
+ESCALAS = [1, 10, 100]
+
+spec = importlib.util.spec_from_file_location("genetic_algorithm", "genetic-algorithm.py")
+ga_mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ga_mod)
+
+
+# ================================================================
+# GERADOR DE TRANSAÇÕES SINTÉTICAS
+# ================================================================
+def grupos_de_itens(colunas):
+    # "acc_bin=acc_baixa" → atributo "acc_bin"; itens de um mesmo atributo
+    # são mutuamente exclusivos no one-hot
+    grupos = {}
+    for j, coluna in enumerate(colunas):
+        grupos.setdefault(coluna.split("=", 1)[0], []).append(j)
+    return grupos
+
+
+def gerar_transacoes_sinteticas(dados, fator, ruido=0.1, seed=0):
+    # reamostra linhas reais (mantém as correlações) e, com probabilidade
+    # `ruido`, sorteia de novo cada atributo pela frequência marginal dele;
+    # vocabulário e marginais esperadas iguais às dos dados reais
+    rng = np.random.default_rng(seed)
+    matriz = dados.to_numpy(dtype=bool)
+    n = int(len(matriz) * fator)
+
+    sintetica = matriz[rng.integers(0, len(matriz), size=n)].copy()
+    for itens in grupos_de_itens(list(dados.columns)).values():
+        bloco = matriz[:, itens]
+        presentes = bloco.any(axis=1)
+        frequencias = bloco.sum(axis=0) / max(presentes.sum(), 1)
+
+        trocar = rng.random(n) < ruido
+        trocar &= sintetica[:, itens].any(axis=1)
+        escolhidos = rng.choice(len(itens), size=int(trocar.sum()), p=frequencias)
+        novo = np.zeros((len(escolhidos), len(itens)), dtype=bool)
+        novo[np.arange(len(escolhidos)), escolhidos] = True
+        sintetica[np.ix_(np.flatnonzero(trocar), itens)] = novo
+
+    return pd.DataFrame(sintetica, columns=dados.columns)
+
+
+def gerar_csv_sintetico(caminho_csv, fator, destino, seed=0):
+    # mesma ideia no nível do CSV bruto, para medir o pré-processamento;
+    # grava também o artefato colunar, como as etapas do ETL
+    df = pd.read_csv(caminho_csv)
+    rng = np.random.default_rng(seed)
+    salvar_etapa(df.iloc[rng.integers(0, len(df), size=int(len(df) * fator))], destino, exportar_csv=True)
+    return destino
+
+
+# ================================================================
+# MEDIÇÃO
+# ================================================================
+def medir(funcao, repeticoes=3):
+    # tempo sem rastreamento (o tracemalloc deixa tudo várias vezes mais
+    # lento) e uma execução extra só para o pico de memória
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "tempo_min_s": min(tempos),
+        "tempo_mediana_s": float(np.median(tempos)),
+        "tempo_max_s": max(tempos),
+        "repeticoes": repeticoes,
+        "pico_memoria_bytes": pico,
+    }
+
+
+def usar_dados(dados):
+    # troca a matriz do GA e desliga o cache de fitness, para que cada
+    # medição realmente minere
+    ga_mod.DADOS = dados
+    ga_mod.RETICULADO = None
+    ga_mod.CACHE = CacheFitness("benchmark", caminho=None, max_memoria=0)
+
+
+@contextlib.contextmanager
+def silencioso():
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+# ================================================================
+# BENCHMARKS
+# ================================================================
+def bench_pre_processamento(caminho_csv, escala, repeticoes):
+    resultados = [{"nome": "pre_processamento", "escala": escala, "parametros": {},
+                   **medir(lambda: preprocessamento.pre_processamento(caminho_csv, usar_colunar=False), repeticoes)}]
+    if manifesto_valido(caminho_csv) is not None:
+        resultados.append({"nome": "pre_processamento_colunar", "escala": escala, "parametros": {},
+                           **medir(lambda: preprocessamento.pre_processamento(caminho_csv), repeticoes)})
+    return resultados
+
+
+def bench_fitness(dados, escala, repeticoes):
+    resultados = []
+    usar_dados(dados)
+
+    # primeira avaliação: paga a construção do reticulado
+    resultados.append({"nome": "reticulado", "escala": escala, "parametros": {},
+                       **medir(lambda: ga_mod.Reticulado(dados), 1)})
+
+    ga_mod.RETICULADO = ga_mod.Reticulado(dados)
+    for min_support in GRADE_MIN_SUPPORT:
+        for max_len in GRADE_MAX_LEN:
+            resultados.append({
+                "nome": "calcular_fitness", "escala": escala,
+                "parametros": {"min_support": min_support, "max_len": max_len},
+                **medir(lambda: ga_mod.Individuo(min_support, max_len), repeticoes),
+            })
+
+    # geração restrita à classe de arritmia sobre todos os itemsets do reticulado
+    ret = ga_mod.RETICULADO
+    resultados.append({"nome": "gerar_regras", "escala": escala,
+                       "parametros": {"itemsets": len(ret.ids)},
+                       **medir(lambda: gerar_regras(ret.ids, ret.suportes, ret.bitsets.colunas, ret.alvos,
+                                                    ret.min_confianca), repeticoes)})
+    return resultados
+
+
+def bench_ga(dados, escala, repeticoes, populacao, geracoes, mutacao, seed):
+    # repositório de regras numa pasta temporária (o resultado_GA.regras do
+    # usuário fica intacto); o cache de fitness de usar_dados não toca o disco
+    def rodar():
+        usar_dados(dados)
+        with tempfile.TemporaryDirectory() as tmp, silencioso():
+            ga_mod.GA(individuo=populacao, geracao=geracoes, mutacao=mutacao, seed=seed,
+                      destino=os.path.join(tmp, "resultado_GA.regras"))
+
+    return {"nome": "GA", "escala": escala,
+            "parametros": {"populacao": populacao, "geracoes": geracoes, "mutacao": mutacao, "seed": seed},
+            **medir(rodar, repeticoes)}
+
+
+def commit_atual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ================================================================
+# COMPARAÇÃO ENTRE DUAS EXECUÇÕES
+# ================================================================
+def comparar(antes, depois):
+    def indexar(relatorio):
+        return {(r["nome"], r["escala"], json.dumps(r["parametros"], sort_keys=True)): r
+                for r in relatorio["resultados"]}
+
+    a, d = indexar(antes), indexar(depois)
+    print(f"\n📊 {antes.get('commit')} → {depois.get('commit')}")
+    for chave in sorted(a.keys() & d.keys()):
+        ta, td = a[chave]["tempo_min_s"], d[chave]["tempo_min_s"]
+        ma, md = a[chave]["pico_memoria_bytes"], d[chave]["pico_memoria_bytes"]
+        razao = ta / td if td else float("inf")
+        print(f"{chave[0]:>18} x{chave[1]:<5} {chave[2]:<40} "
+              f"{ta:9.4f}s → {td:9.4f}s ({razao:5.2f}x)  mem {ma/2**20:8.1f} → {md/2**20:8.1f} MiB")
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da mineração e do GA")
+    parser.add_argument("-i", "--entrada", default=preprocessamento.CAMINHO_CONTEXTO)
+    parser.add_argument("-e", "--escalas", type=int, nargs="+", default=ESCALAS,
+                        help="fatores de escala das transações sintéticas (1 = dados reais)")
+    parser.add_argument("-r", "--repeticoes", type=int, default=3)
+    parser.add_argument("--populacao", type=int, default=10)
+    parser.add_argument("--geracoes", type=int, default=10)
+    parser.add_argument("--mutacao", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sem-ga", action="store_true", help="não mede a execução completa do GA")
+    parser.add_argument("-o", "--saida", default="benchmark.json")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    reais = preprocessamento.pre_processamento(args.entrada)
+    resultados = []
+
+    for escala in args.escalas:
+        print(f"⏱ Escala x{escala}…")
+        with tempfile.TemporaryDirectory() as tmp:
+            caminho_csv = args.entrada if escala == 1 else \
+                gerar_csv_sintetico(args.entrada, escala, os.path.join(tmp, "contexto.csv"), args.seed)
+            resultados.extend(bench_pre_processamento(caminho_csv, escala, args.repeticoes))
+
+        dados = reais if escala == 1 else gerar_transacoes_sinteticas(reais, escala, seed=args.seed)
+        for r in bench_fitness(dados, escala, args.repeticoes):
+            r["linhas"] = len(dados)
+            resultados.append(r)
+
+        if not args.sem_ga:
+            r = bench_ga(dados, escala, args.repeticoes, args.populacao, args.geracoes, args.mutacao, args.seed)
+            r["linhas"] = len(dados)
+            resultados.append(r)
+
+    for r in resultados:
+        r.setdefault("linhas", len(reais) * r["escala"])
+
+    relatorio = {
+        "commit": commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "resultados": resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2)
+    print(f"📁 Resultados salvos em: {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(json.load(f), relatorio)
+
+    return relatorio
+
+
+if __name__ == "__main__":
+    main()
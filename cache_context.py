@@ -0,0 +1,101 @@
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from artefato_colunar import gravar_colunas, ler_manifesto, ler_colunas
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+# context.xlsx → context.xlsx.colunas/ no formato de artefato_colunar (um
+# .npy por coluna + manifesto.json validado pela identidade da planilha);
+# as linhas ficam ordenadas por "Time rel [s]" e o índice guarda a linha
+# original da planilha
+SUFIXO_SIDECAR = ".colunas"
+COLUNA_TEMPO = "Time rel [s]"
+
+
+def caminho_sidecar(context_path):
+    return context_path + SUFIXO_SIDECAR
+
+
+# ================================================================
+# CONVERSÃO XLSX → COLUNAS .npy
+# ================================================================
+def converter_context(context_path, df=None):
+    if df is None:
+        df = pd.read_excel(context_path)
+
+    if COLUNA_TEMPO in df.columns:
+        ordem = np.argsort(df[COLUNA_TEMPO].to_numpy(dtype=float), kind="stable")
+    else:
+        ordem = np.arange(len(df))
+    return gravar_colunas(df.iloc[ordem], caminho_sidecar(context_path), fonte=context_path,
+                          indice=ordem.astype(np.int64))
+
+
+def sidecar_valido(context_path):
+    return ler_manifesto(caminho_sidecar(context_path), context_path)
+
+
+# ================================================================
+# LEITURA (MEMORY-MAP, SÓ AS COLUNAS PEDIDAS)
+# ================================================================
+def ler_sidecar(context_path, manifesto, colunas=None):
+    # colunas que a planilha não tem são ignoradas, como na leitura do xlsx
+    return ler_colunas(caminho_sidecar(context_path), manifesto, colunas, ignorar_ausentes=True)
+
+
+def ler_context(context_path, colunas=None):
+    # leitura transparente: usa o sidecar se estiver em dia com a planilha,
+    # senão lê o xlsx uma vez e grava o sidecar para as próximas
+    manifesto = sidecar_valido(context_path)
+    if manifesto is None:
+        df = pd.read_excel(context_path)
+        try:
+            converter_context(context_path, df)
+        except OSError as e:
+            print(f"⚠ Não foi possível gravar o sidecar de {context_path}: {e}")
+        if colunas is not None:
+            df = df[[c for c in df.columns if c in set(colunas)]]
+        return df
+
+    return ler_sidecar(context_path, manifesto, colunas)
+
+
+# ================================================================
+# PRÉ-CONVERSÃO EM LOTE DA ÁRVORE annotations/
+# ================================================================
+def converter_arvore(ann_dir, forcar=False):
+    convertidos = atualizados = erros = 0
+    for dirpath, _, filenames in os.walk(ann_dir):
+        if "context.xlsx" not in filenames:
+            continue
+        context_path = os.path.join(dirpath, "context.xlsx")
+        if not forcar and sidecar_valido(context_path) is not None:
+            atualizados += 1
+            continue
+        try:
+            converter_context(context_path)
+            convertidos += 1
+            print(f"✔ {context_path}")
+        except Exception as e:
+            erros += 1
+            print(f"❌ Erro ao converter {context_path}: {e}")
+
+    print(f"\n📌 {convertidos} convertidos, {atualizados} já em dia, {erros} erros")
+    return convertidos, atualizados, erros
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte os context.xlsx para colunas .npy")
+    parser.add_argument("ann_dir", nargs="?", default=os.path.join("CACHET-CADB", "annotations"))
+    parser.add_argument("--forcar", action="store_true", help="reconverte mesmo se o sidecar estiver em dia")
+    args = parser.parse_args()
+
+    _, _, erros = converter_arvore(args.ann_dir, args.forcar)
+    sys.exit(1 if erros else 0)
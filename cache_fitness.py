@@ -0,0 +1,154 @@
+import os
+import json
+import pickle
+import sqlite3
+import hashlib
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ================================================================
+# CONFIGURAÇÕES DO CACHE
+# ================================================================
+CACHE_DIR = r"cache"
+CACHE_DB = os.path.join(CACHE_DIR, "fitness.sqlite")
+
+MAX_MEMORIA = 256      # entradas mantidas no LRU em memória
+MAX_DISCO = 4096       # entradas mantidas no SQLite
+
+
+# ================================================================
+# IMPRESSÃO DIGITAL DA MATRIZ PRÉ-PROCESSADA
+# ================================================================
+def impressao_digital(dados, extra=""):
+    # muda sempre que o CSV, o binning ou o vocabulário de itens mudarem
+    h = hashlib.sha256()
+    h.update("\x1f".join(map(str, dados.columns)).encode("utf-8"))
+    h.update(str(dados.shape).encode("utf-8"))
+    h.update(np.packbits(dados.to_numpy(dtype=bool), axis=None).tobytes())
+    h.update(str(extra).encode("utf-8"))
+    return h.hexdigest()
+
+
+# ================================================================
+# CACHE DE FITNESS (LRU EM MEMÓRIA + SQLITE EM DISCO)
+# ================================================================
+class CacheFitness:
+    def __init__(self, digital, caminho=CACHE_DB, max_memoria=MAX_MEMORIA, max_disco=MAX_DISCO):
+        self.digital = digital
+        self.caminho = caminho
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+
+        self.memoria = OrderedDict()
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+
+        self.conexao = None
+        if caminho is not None:
+            os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+            self.conexao = sqlite3.connect(caminho)
+            self.conexao.execute("""
+                CREATE TABLE IF NOT EXISTS fitness (
+                    digital TEXT NOT NULL,
+                    min_support REAL NOT NULL,
+                    max_len INTEGER NOT NULL,
+                    fitness REAL,
+                    regras BLOB,
+                    ultimo_acesso REAL NOT NULL,
+                    PRIMARY KEY (digital, min_support, max_len)
+                )
+            """)
+            self.conexao.execute("CREATE INDEX IF NOT EXISTS idx_fitness_acesso ON fitness (ultimo_acesso)")
+            self.conexao.commit()
+            # contagem mantida a cada inserção: o despejo só roda acima do limite
+            self.linhas_disco = self.conexao.execute("SELECT COUNT(*) FROM fitness").fetchone()[0]
+
+    @staticmethod
+    def chave(min_support, max_len, limites=None):
+        # o Individuo já arredonda o suporte em 4 casas; limites (tupla de
+        # (atributo, pontos de corte)) só entram quando o GA os evolui
+        if limites is None:
+            return (round(float(min_support), 4), int(max_len))
+        return (round(float(min_support), 4), int(max_len), limites)
+
+    def _digital(self, chave):
+        # outra discretização é outra matriz: no SQLite os limites entram na digital
+        if len(chave) == 2:
+            return self.digital
+        return self.digital + ";limites=" + json.dumps(chave[2])
+
+    def obter(self, min_support, max_len, limites=None):
+        chave = self.chave(min_support, max_len, limites)
+
+        if chave in self.memoria:
+            self.memoria.move_to_end(chave)
+            self.hits_memoria += 1
+            return self.memoria[chave]
+
+        if self.conexao is not None:
+            linha = self.conexao.execute(
+                "SELECT fitness, regras FROM fitness WHERE digital = ? AND min_support = ? AND max_len = ?",
+                (self._digital(chave), *chave[:2])
+            ).fetchone()
+            if linha is not None:
+                self.conexao.execute(
+                    "UPDATE fitness SET ultimo_acesso = ? WHERE digital = ? AND min_support = ? AND max_len = ?",
+                    (time.time(), self._digital(chave), *chave[:2])
+                )
+                self.conexao.commit()
+                valor = (linha[0] if linha[0] is not None else float("nan"), pickle.loads(linha[1]))
+                self._guardar_memoria(chave, valor)
+                self.hits_disco += 1
+                return valor
+
+        self.misses += 1
+        return None
+
+    def guardar(self, min_support, max_len, fitness, regras, limites=None):
+        chave = self.chave(min_support, max_len, limites)
+        valor = (fitness, regras)
+        self._guardar_memoria(chave, valor)
+
+        if self.conexao is not None:
+            digital = self._digital(chave)
+            existe = self.conexao.execute(
+                "SELECT 1 FROM fitness WHERE digital = ? AND min_support = ? AND max_len = ?",
+                (digital, *chave[:2])
+            ).fetchone()
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO fitness VALUES (?, ?, ?, ?, ?, ?)",
+                (digital, *chave[:2], None if fitness != fitness else float(fitness),
+                 pickle.dumps(regras, protocol=pickle.HIGHEST_PROTOCOL), time.time())
+            )
+            if existe is None:
+                self.linhas_disco += 1
+            if self.linhas_disco > self.max_disco:
+                # descarta as entradas acessadas há mais tempo além do limite
+                self.linhas_disco -= self.conexao.execute(
+                    "DELETE FROM fitness WHERE rowid IN ("
+                    "SELECT rowid FROM fitness ORDER BY ultimo_acesso DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disco,)
+                ).rowcount
+            self.conexao.commit()
+
+    def _guardar_memoria(self, chave, valor):
+        self.memoria[chave] = valor
+        self.memoria.move_to_end(chave)
+        while len(self.memoria) > self.max_memoria:
+            self.memoria.popitem(last=False)
+
+    def resumo(self):
+        hits = self.hits_memoria + self.hits_disco
+        total = hits + self.misses
+        taxa = hits / total if total else 0.0
+        return (f"Cache de fitness: {hits} hits ({self.hits_memoria} memória, {self.hits_disco} disco), "
+                f"{self.misses} misses, taxa de acerto={taxa:.1%}")
+
+    def fechar(self):
+        if self.conexao is not None:
+            self.conexao.close()
+            self.conexao = None
@@ -0,0 +1,253 @@
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.signal import detrend, butter, sosfiltfilt, welch
+from scipy.ndimage import maximum_filter1d
+
+import artefato_colunar
+from artefato_colunar import salvar_etapa, ler_etapa
+from etl_paralelo import relatar_falhas
+from manifesto_etl import executar_incremental, hash_parametros, SUBDIR_MANIFESTO
+from janelas_ecg import abrir_ecg, SIG_DIR, CAMINHO_ANOTACOES, SCALE, CHAVES
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+CSV = r"generated-csv"
+DESTINO = os.path.join(CSV, "caracteristicas_ecg.csv")
+
+FS = 1024                      # taxa de amostragem
+# amostras float64 por lote (~32 MB por cópia; detrend, filtro e Welch fazem
+# algumas cópias do lote): memória fixa por worker. Também é o teto de uma
+# janela: das mais longas (~68 min a 1024 Hz) só o trecho central é analisado
+MAX_AMOSTRAS_LOTE = 1 << 22
+MIN_AMOSTRAS = 2 * FS          # janelas mais curtas ficam com NaN
+
+# QRS concentrado em 5–15 Hz; picos R a pelo menos 250 ms (FC ≤ 240 bpm)
+BANDA_QRS = (5.0, 15.0)
+REFRATARIO_S = 0.25
+LIMIAR_PICO = 0.35             # fração do percentil 99 do envelope da janela
+
+# potência relativa de cada banda do espectro (Welch) do ECG sem tendência
+BANDAS = {
+    "pot_0_5hz": (0.5, 5.0),
+    "pot_5_15hz": (5.0, 15.0),
+    "pot_15_40hz": (15.0, 40.0),
+    "pot_40_100hz": (40.0, 100.0),
+}
+
+COLUNAS_CARACTERISTICAS = [
+    "n_amostras", "rms_mv", "n_picos", "fc_bpm", "rr_sdnn_ms", "rr_rmssd_ms", *BANDAS,
+]
+
+# mesmo formato de preprocessamento.BINS: coluna de saída → (origem,
+# limites, rótulos); None no último limite = máximo observado
+BINS_ECG = {
+    "fc_bin": (
+        "fc_bpm",
+        [0, 60, 100, None],
+        ["fc_bradicardia", "fc_normal", "fc_taquicardia"],
+    ),
+    "rr_sdnn_bin": (
+        "rr_sdnn_ms",
+        [0, 50, 100, None],
+        ["rr_regular", "rr_variavel", "rr_irregular"],
+    ),
+    "rms_bin": (
+        "rms_mv",
+        [0, 0.1, 0.3, None],
+        ["rms_baixo", "rms_medio", "rms_alto"],
+    ),
+    "ruido_bin": (
+        "pot_40_100hz",
+        [0, 0.05, 0.2, 1],
+        ["ruido_baixo", "ruido_medio", "ruido_alto"],
+    ),
+}
+
+
+# ================================================================
+# CARACTERÍSTICAS DE UM LOTE DE JANELAS DE MESMO TAMANHO
+# ================================================================
+_SOS_QRS = butter(3, BANDA_QRS, btype="bandpass", fs=FS, output="sos")
+
+
+def _picos_r(sinais):
+    # envelope |QRS| filtrado; pico = máximo local dentro do período
+    # refratário e acima do limiar da própria janela → máscara (lote × amostras)
+    envelope = np.abs(sosfiltfilt(_SOS_QRS, sinais, axis=-1))
+    limiar = LIMIAR_PICO * np.percentile(envelope, 99, axis=-1, keepdims=True)
+    janela = int(REFRATARIO_S * FS) | 1
+    maximos = maximum_filter1d(envelope, size=janela, axis=-1, mode="nearest")
+    return (envelope == maximos) & (envelope > limiar)
+
+
+def _variabilidade_rr(picos):
+    # intervalos RR por janela sem laço Python: diferenças entre picos
+    # consecutivos da mesma linha, agregadas com bincount
+    n = picos.shape[0]
+    linhas, posicoes = np.nonzero(picos)
+    mesma = linhas[1:] == linhas[:-1]
+    rr = (np.diff(posicoes) / FS * 1000.0)[mesma]
+    linha_rr = linhas[1:][mesma]
+
+    contagem = np.bincount(linha_rr, minlength=n).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.bincount(linha_rr, rr, minlength=n) / contagem
+        quadrados = np.bincount(linha_rr, (rr - media[linha_rr]) ** 2, minlength=n)
+        sdnn = np.sqrt(quadrados / (contagem - 1))
+
+        sucessivas = linha_rr[1:] == linha_rr[:-1]
+        drr = np.diff(rr)[sucessivas]
+        linha_drr = linha_rr[1:][sucessivas]
+        n_drr = np.bincount(linha_drr, minlength=n).astype(float)
+        rmssd = np.sqrt(np.bincount(linha_drr, drr ** 2, minlength=n) / n_drr)
+        fc = 60000.0 / media
+
+    sdnn[contagem < 2] = np.nan
+    return np.bincount(linhas, minlength=n), fc, sdnn, rmssd
+
+
+def caracteristicas_lote(sinais):
+    # sinais: (lote × amostras) em mV, todas as janelas do mesmo tamanho
+    sinais = detrend(sinais, axis=-1)
+    rms = np.sqrt(np.mean(sinais ** 2, axis=-1))
+    n_picos, fc, sdnn, rmssd = _variabilidade_rr(_picos_r(sinais))
+
+    freqs, psd = welch(sinais, fs=FS, nperseg=min(sinais.shape[-1], 4 * FS), axis=-1)
+    total = psd.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bandas = {nome: psd[:, (freqs >= baixo) & (freqs < alto)].sum(axis=-1) / total
+                  for nome, (baixo, alto) in BANDAS.items()}
+
+    return {"rms_mv": rms, "n_picos": n_picos, "fc_bpm": fc, "rr_sdnn_ms": sdnn,
+            "rr_rmssd_ms": rmssd, **bandas}
+
+
+# ================================================================
+# UMA GRAVAÇÃO: JANELAS EM LOTES DE MEMÓRIA LIMITADA
+# ================================================================
+def extrair_caracteristicas_gravacao(tarefa):
+    # tarefa = (ecg.bin, starts, ends); o arquivo é mapeado uma vez e só as
+    # amostras das janelas são lidas, nunca a gravação inteira
+    ecg_path, starts, ends = tarefa
+    if not os.path.exists(ecg_path):
+        raise FileNotFoundError(f"ecg.bin não encontrado: {ecg_path}")
+    ecg = abrir_ecg(ecg_path)
+
+    # mesmas regras de recorte de ecg[Start:End]
+    limites = [slice(s, e).indices(len(ecg)) for s, e in zip(starts, ends)]
+    comprimentos = np.array([len(range(*l)) for l in limites], dtype=np.int64)
+    inicios = np.array([l[0] for l in limites], dtype=np.int64)
+
+    saida = {c: np.full(len(starts), np.nan) for c in COLUNAS_CARACTERISTICAS}
+    saida["n_amostras"] = comprimentos.astype(float)
+
+    # janela maior que um lote: só o trecho central de MAX_AMOSTRAS_LOTE
+    # amostras, senão uma única janela estouraria a memória do worker
+    analisados = np.minimum(comprimentos, MAX_AMOSTRAS_LOTE)
+    inicios += (comprimentos - analisados) // 2
+
+    # janelas do mesmo tamanho empilhadas, na ordem do arquivo (leitura
+    # sequencial); cada lote cabe em MAX_AMOSTRAS_LOTE
+    validas = np.flatnonzero(analisados >= MIN_AMOSTRAS)
+    for tamanho in np.unique(analisados[validas]):
+        grupo = validas[analisados[validas] == tamanho]
+        grupo = grupo[np.argsort(inicios[grupo], kind="stable")]
+        por_lote = MAX_AMOSTRAS_LOTE // int(tamanho)
+        for k in range(0, len(grupo), por_lote):
+            lote = grupo[k:k + por_lote]
+            sinais = np.stack([ecg[inicios[i]:inicios[i] + tamanho] for i in lote]) * SCALE
+            for nome, valores in caracteristicas_lote(sinais).items():
+                saida[nome][lote] = valores
+
+    df = pd.DataFrame(saida)
+    df["n_amostras"] = df["n_amostras"].astype(np.int64)
+    df["n_picos"] = df["n_picos"].fillna(0).astype(np.int32)
+    for coluna in COLUNAS_CARACTERISTICAS:
+        if df[coluna].dtype == np.float64:
+            df[coluna] = df[coluna].astype(np.float32)
+    return df
+
+
+# ================================================================
+# ETAPA: TODAS AS ANOTAÇÕES → TABELA DE CARACTERÍSTICAS
+# ================================================================
+def gerar_caracteristicas(df_anotacoes, sig_dir=SIG_DIR, destino=DESTINO, workers=None, chunksize=None,
+                          incremental=True):
+    df = df_anotacoes.reset_index(drop=True)
+    grupos = list(df.groupby(CHAVES, sort=False, observed=True))
+
+    # um ecg.bin por gravação, aberto uma vez (em paralelo se workers > 1)
+    tarefas = [
+        (os.path.join(sig_dir, *map(str, chave), "ecg.bin"), grupo["Start"].to_numpy(), grupo["End"].to_numpy())
+        for chave, grupo in grupos
+    ]
+    configuracao = [FS, MAX_AMOSTRAS_LOTE, MIN_AMOSTRAS, BANDA_QRS, REFRATARIO_S, LIMIAR_PICO, BANDAS]
+    resultados = executar_incremental(
+        "caracteristicas_ecg", extrair_caracteristicas_gravacao, tarefas,
+        chaves=["/".join(map(str, chave)) for chave, _ in grupos],
+        fontes=[[t[0]] for t in tarefas],
+        pasta=os.path.join(CSV, SUBDIR_MANIFESTO),
+        parametros=[hash_parametros(t[1].tolist(), t[2].tolist(), configuracao) for t in tarefas],
+        workers=workers, chunksize=chunksize, incremental=incremental,
+    )
+
+    partes = []
+    falhas = []
+    for (chave, grupo), tarefa, (ok, valor) in zip(grupos, tarefas, resultados):
+        if not ok:
+            falhas.append((tarefa[0], valor))
+            continue
+        valor.index = grupo.index
+        partes.append(pd.concat([grupo, valor], axis=1))
+
+    relatar_falhas("gerar_caracteristicas", falhas)
+    if not partes:
+        print("❌ Nenhuma janela com sinal encontrada.")
+        return None
+
+    # na ordem do CSV de anotações
+    df_final = pd.concat(partes).sort_index()
+    salvar_etapa(df_final, destino)
+    print(f"✅ {len(df_final)} janelas com características salvas em: {destino}")
+    return df_final
+
+
+# ================================================================
+# CARACTERÍSTICAS → ITENS (MESMO ESQUEMA DE pre_processamento)
+# ================================================================
+def itens_ecg(df, bins=BINS_ECG):
+    # janelas sem a característica (NaN) ficam sem o item correspondente
+    df = df.copy()
+    for destino, (origem, limites, rotulos) in bins.items():
+        df[destino] = pd.cut(
+            df[origem],
+            bins=[df[origem].max() if b is None else b for b in limites],
+            labels=rotulos,
+            include_lowest=True
+        )
+    df_hot = pd.get_dummies(df[list(bins)], prefix_sep='=')
+    return (df_hot > 0).astype(bool)
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai características de ECG de cada janela anotada")
+    parser.add_argument("-a", "--anotacoes", default=CAMINHO_ANOTACOES)
+    parser.add_argument("-s", "--sinais", default=SIG_DIR)
+    parser.add_argument("-d", "--destino", default=DESTINO)
+    parser.add_argument("-w", "--workers", type=int, default=1, help="processos para ler as gravações")
+    parser.add_argument("--chunksize", type=int, default=None, help="gravações por tarefa enviada a cada worker")
+    parser.add_argument("--completo", action="store_true", help="ignora o manifesto e reprocessa todas as gravações")
+    parser.add_argument("--sem-csv", action="store_true", help="grava só o artefato colunar (.colunas/), sem o CSV")
+    args = parser.parse_args()
+    artefato_colunar.EXPORTAR_CSV = not args.sem_csv
+
+    gerar_caracteristicas(ler_etapa(args.anotacoes), args.sinais, args.destino,
+                          args.workers, args.chunksize, not args.completo)
@@ -0,0 +1,180 @@
+import math
+import time
+import random
+from collections import OrderedDict
+
+import numpy as np
+
+from mineracao_bitset import BitsetsVerticais, OrcamentoExcedido
+from reticulado import PREFIXO_ALVO, FITNESS_PENALIZADO, fitness_regras, regras_diretas, regras_penalizadas
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+FRACAO_AMOSTRA = 0.2   # fração das transações de cada classe que entra na amostra
+REPLICAS = 4           # subamostras disjuntas; a variação entre elas dá o intervalo
+Z_CONFIANCA = 2.0      # meia-largura do intervalo em erros padrão
+TOP_K = 2              # posições da geração que precisam de fitness exato
+MAX_ESTIMATIVAS = 1024 # estimativas mantidas (LRU); precisa cobrir uma geração
+# suporte mínimo na réplica, em transações: com ~80 linhas o piso do GA
+# (0.01) seria uma linha só e a réplica teria mais itemsets que os dados
+# completos
+MIN_TRANSACOES = 4
+
+
+def _ordenavel(valor):
+    # NaN (nenhuma regra) nunca vence uma comparação, como em fitness_ordenavel
+    return float("-inf") if valor is None or valor != valor else valor
+
+
+# ================================================================
+# AMOSTRA ESTRATIFICADA POR ArrhythmiaClass
+# ================================================================
+def replicas_estratificadas(dados, fracao=FRACAO_AMOSTRA, replicas=REPLICAS, rng=random,
+                            prefixo_alvo=PREFIXO_ALVO):
+    # → lista de `replicas` vetores de índices de linhas, disjuntos; cada
+    # classe (e as linhas sem classe) é embaralhada e distribuída em rodízio,
+    # então toda réplica tem a proporção de classes dos dados completos
+    alvos = [c for c in dados.columns if str(c).startswith(prefixo_alvo)]
+    classes = dados[alvos].to_numpy(dtype=bool)
+    estrato = np.where(classes.any(axis=1), classes.argmax(axis=1), -1)
+
+    # a semente sai do `random` do processo principal: com a mesma seed do GA
+    # a amostra é a mesma
+    gerador = np.random.default_rng(rng.getrandbits(64))
+    por_replica = [[] for _ in range(replicas)]
+    for valor in np.unique(estrato):
+        linhas = gerador.permutation(np.flatnonzero(estrato == valor))
+        n = min(len(linhas), max(replicas, math.ceil(fracao * len(linhas))))
+        for r in range(replicas):
+            por_replica[r].append(linhas[r:n:replicas])
+    return [np.sort(np.concatenate(partes)) for partes in por_replica]
+
+
+# ================================================================
+# CORRIDA: ESTIMA NA AMOSTRA, PROMOVE SÓ QUEM AINDA PODE ENTRAR NO TOP-K
+# ================================================================
+class CorridaFitness:
+    # só compensa onde a avaliação completa é cara (genomas com limites
+    # próprios, que mineram direto): cada genoma é minerado nas linhas de cada
+    # réplica com o próprio (min_support, max_len), e o suporte nunca abaixo de
+    # MIN_TRANSACOES linhas da réplica. A estimativa é a média do fitness nas
+    # réplicas e o intervalo é média ± z · desvio / √réplicas
+    def __init__(self, dados, top_k=TOP_K, fracao=FRACAO_AMOSTRA, replicas=REPLICAS,
+                 z=Z_CONFIANCA, discretizador=None, rng=random, orcamento=None, max_estimativas=MAX_ESTIMATIVAS,
+                 min_transacoes=MIN_TRANSACOES):
+        self.top_k = max(int(top_k), 1)
+        self.z = z
+        self.orcamento = orcamento
+        self.indices = replicas_estratificadas(dados, fracao, replicas, rng)
+        self.pisos = [min_transacoes / max(len(i), 1) for i in self.indices]
+        # matriz de cada réplica para os genomas sem limites; com limites, um
+        # discretizador por réplica codifica só as linhas dela, com cache por
+        # vetor de limites
+        self.bitsets = [BitsetsVerticais(dados.iloc[i]) for i in self.indices]
+        self.discretizadores = (None if discretizador is None
+                                else [discretizador.restrito(i) for i in self.indices])
+        self.n_amostra = int(sum(len(i) for i in self.indices))
+
+        self.max_estimativas = max_estimativas
+        self.estimativas = OrderedDict()
+        self.estimadas = 0
+        # custo medido de estimar e de avaliar por completo, por genoma: se
+        # estimar não sai mais barato (matriz pequena), a corrida desliga
+        self.t_estimativas = 0.0
+        self.t_exatos = 0.0
+        self.exatos = 0
+        self.ativa = True
+        self.promovidas = 0
+        self.economizadas = 0
+        self.pares = 0
+        self.inversoes = 0
+
+    # ------------------------------------------------------------
+    # ESTIMATIVA
+    # ------------------------------------------------------------
+    def _regras_replica(self, r, genoma):
+        min_support, max_len = genoma[:2]
+        limites = genoma[2] if len(genoma) > 2 else None
+        bitsets = self.bitsets[r] if limites is None else self.discretizadores[r].bitsets(limites)
+        try:
+            return regras_diretas(bitsets, max(min_support, self.pisos[r]), max_len, orcamento=self.orcamento)
+        except OrcamentoExcedido as e:
+            return regras_penalizadas(str(e))
+
+    def estimar(self, genoma):
+        # → (estimativa, inferior, superior, regras da primeira réplica)
+        if genoma in self.estimativas:
+            self.estimativas.move_to_end(genoma)
+            return self.estimativas[genoma]
+        self.estimadas += 1
+
+        inicio = time.perf_counter()
+        regras = [self._regras_replica(r, genoma) for r in range(len(self.indices))]
+        valores = np.array([FITNESS_PENALIZADO if "penalidade" in x.attrs else fitness_regras(x)
+                            for x in regras], dtype=float)
+        validos = valores[~np.isnan(valores)]
+        if len(validos) == 0:
+            # sem regras em nenhuma réplica: estimado como NaN e nunca promovido
+            resultado = (float("nan"), float("-inf"), float("-inf"), regras[0])
+        elif len(validos) < 2:
+            # uma réplica só não dá intervalo: o genoma sempre é promovido
+            resultado = (float(validos.mean()), float("-inf"), float("inf"), regras[0])
+        else:
+            media = float(validos.mean())
+            meia = self.z * float(validos.std(ddof=1)) / math.sqrt(len(validos))
+            resultado = (media, media - meia, media + meia, regras[0])
+        self.estimativas[genoma] = resultado
+        self.t_estimativas += time.perf_counter() - inicio
+        while len(self.estimativas) > self.max_estimativas:
+            self.estimativas.popitem(last=False)
+        return resultado
+
+    # ------------------------------------------------------------
+    # PROMOÇÃO
+    # ------------------------------------------------------------
+    def promover(self, restantes, exatos):
+        # exatos: fitness já conhecidos na geração (cache, elite, promovidos);
+        # o corte é o k-ésimo maior entre eles e os limites inferiores dos
+        # restantes. Quando nada mais passa, os k primeiros são todos exatos e
+        # nenhum restante pode superá-los
+        valores = sorted([_ordenavel(f) for f in exatos] +
+                         [self.estimar(g)[1] for g in restantes], reverse=True)
+        corte = valores[self.top_k - 1] if len(valores) >= self.top_k else float("-inf")
+        return [g for g in restantes
+                if self.estimar(g)[2] > float("-inf") and self.estimar(g)[2] >= corte]
+
+    def medir_exatos(self, segundos, n):
+        # tempo de parede de n avaliações completas (seriais ou no pool)
+        self.t_exatos += segundos
+        self.exatos += n
+
+    def compensa(self):
+        # sem as duas medidas ainda não dá para comparar; desligada, fica
+        if self.ativa and self.estimadas and self.exatos:
+            self.ativa = self.t_estimativas / self.estimadas < self.t_exatos / self.exatos
+        return self.ativa
+
+    def registrar(self, promovidos, economizados):
+        # promovidos: {genoma: fitness exato}; conta os pares que a estimativa
+        # ordenou diferente do fitness exato
+        self.promovidas += len(promovidos)
+        self.economizadas += len(economizados)
+        pares = [(self.estimar(g)[0], f) for g, f in promovidos.items()
+                 if self.estimar(g)[0] == self.estimar(g)[0] and f == f]
+        for i in range(len(pares)):
+            for j in range(i + 1, len(pares)):
+                (ei, fi), (ej, fj) = pares[i], pares[j]
+                if ei == ej or fi == fj:
+                    continue
+                self.pares += 1
+                self.inversoes += (ei > ej) != (fi > fj)
+
+    def resumo(self):
+        taxa = self.inversoes / self.pares if self.pares else 0.0
+        return (f"Corrida: amostra de {self.n_amostra} transações em {len(self.indices)} réplicas, "
+                f"{self.estimadas} genomas estimados, {self.promovidas} promovidos, "
+                f"{self.economizadas} avaliações completas economizadas; ranking estimado ≠ exato em "
+                f"{self.inversoes} de {self.pares} pares ({taxa:.1%})"
+                + ("" if self.ativa else "; desligada: estimar custava mais que avaliar por completo"))
@@ -0,0 +1,196 @@
+import random
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from mineracao_bitset import BitsetsVerticais, empacotar
+from preprocessamento import BINS, cols_apriori
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+MAX_CODIFICACOES = 64   # codificações guardadas por atributo discretizado
+
+
+def _formatar(valor):
+    return f"{valor:.6g}"
+
+
+# ================================================================
+# DISCRETIZAÇÃO COM LIMITES VARIÁVEIS (SEM REFAZER pd.cut + get_dummies)
+# ================================================================
+class Discretizador:
+    # cada coluna numérica é ordenada uma única vez; os pontos de corte de
+    # qualquer indivíduo viram posições por busca binária nos valores
+    # ordenados. As colunas não discretizadas e cada codificação
+    # (atributo, limites) ficam em cache: mudar os limites de um atributo só
+    # recalcula as colunas dele
+    def __init__(self, df, bins=BINS, colunas=cols_apriori, max_cache=MAX_CODIFICACOES):
+        # df: saída de preprocessamento.preparar_contexto
+        self.bins = bins
+        self.colunas = colunas
+        self.n_linhas = len(df)
+        self.max_cache = max_cache
+
+        # blocos fixos: mesma saída do get_dummies, coluna a coluna
+        self.blocos_fixos = {}
+        for coluna in colunas:
+            if coluna in bins:
+                continue
+            dummies = pd.get_dummies(df[[coluna]], prefix_sep="=")
+            matriz = (dummies > 0).to_numpy(dtype=bool)
+            self.blocos_fixos[coluna] = (list(dummies.columns), matriz, empacotar(matriz))
+
+        self.ordem = {}
+        self.ordenados = {}
+        self.maximos = {}
+        self.padrao = {}
+        for destino, (origem, limites, _) in bins.items():
+            valores = pd.to_numeric(df[origem]).to_numpy(dtype=float)
+            self.ordem[destino] = np.argsort(valores, kind="stable")
+            self.ordenados[destino] = valores[self.ordem[destino]]
+            self.maximos[destino] = self.ordenados[destino][-1] if len(valores) else np.nan
+            self.padrao[destino] = tuple(limites)
+
+        self._iniciar_cache()
+
+    def _iniciar_cache(self):
+        self.cache = {destino: OrderedDict() for destino in self.bins}
+        self.hits = 0
+        self.misses = 0
+
+    def restrito(self, linhas):
+        # mesmo discretizador só nas linhas dadas (vetor crescente de índices),
+        # com cache de codificações próprio: codificar custa o tamanho da
+        # amostra, não o da matriz inteira. O máximo observado (None no
+        # último limite) continua o dos dados completos
+        linhas = np.asarray(linhas, dtype=np.int64)
+        novo = Discretizador.__new__(Discretizador)
+        novo.bins = self.bins
+        novo.colunas = self.colunas
+        novo.n_linhas = len(linhas)
+        novo.max_cache = self.max_cache
+        novo.blocos_fixos = {coluna: (nomes, matriz[linhas], empacotar(matriz[linhas]))
+                             for coluna, (nomes, matriz, _) in self.blocos_fixos.items()}
+
+        # posição de cada linha na amostra (-1 = fora); percorrer a ordem
+        # completa mantém a amostra ordenada sem ordenar de novo
+        posicao = np.full(self.n_linhas, -1, dtype=np.int64)
+        posicao[linhas] = np.arange(len(linhas))
+        novo.ordem = {}
+        novo.ordenados = {}
+        for destino, ordem in self.ordem.items():
+            na_amostra = posicao[ordem]
+            dentro = na_amostra >= 0
+            novo.ordem[destino] = na_amostra[dentro]
+            novo.ordenados[destino] = self.ordenados[destino][dentro]
+        novo.maximos = self.maximos
+        novo.padrao = self.padrao
+        novo._iniciar_cache()
+        return novo
+
+    # ------------------------------------------------------------
+    # LIMITES
+    # ------------------------------------------------------------
+    def canonicos(self, limites=None):
+        # {destino: limites} parcial → tupla ((destino, limites), …) com todos
+        # os atributos, na ordem de BINS (serve de gene e de chave de cache)
+        limites = dict(limites or {})
+        return tuple((destino, tuple(limites.get(destino, self.padrao[destino]))) for destino in self.bins)
+
+    def _resolver(self, destino, limites):
+        # None no último limite = máximo observado, como em pre_processamento
+        maximo = self.maximos[destino]
+        resolvidos = np.array([maximo if b is None else b for b in limites], dtype=float)
+        if np.any(np.diff(resolvidos) <= 0):
+            raise ValueError(f"limites de {destino} precisam ser estritamente crescentes: {limites}")
+        return resolvidos
+
+    def sortear_limites(self, destino, rng=random):
+        # mantém o primeiro e o último limite de BINS e sorteia os internos
+        # entre os valores observados dentro deles
+        padrao = self.padrao[destino]
+        inicio, fim = self._resolver(destino, (padrao[0], padrao[-1]))
+        ordenados = self.ordenados[destino]
+        candidatos = np.unique(ordenados[(ordenados > inicio) & (ordenados < fim)])
+        n_internos = len(padrao) - 2
+        if len(candidatos) < n_internos:
+            return padrao
+        internos = sorted(float(_formatar(v)) for v in rng.sample(list(candidatos), n_internos))
+        if len(set(internos)) < n_internos or internos[0] <= inicio or internos[-1] >= fim:
+            return padrao
+        return (padrao[0], *internos, padrao[-1])
+
+    # ------------------------------------------------------------
+    # CODIFICAÇÃO DE UM ATRIBUTO
+    # ------------------------------------------------------------
+    def codificar(self, destino, limites):
+        # → (nomes, matriz bool n × k, bitsets uint64 k × palavras)
+        limites = tuple(limites)
+        cache = self.cache[destino]
+        if limites in cache:
+            cache.move_to_end(limites)
+            self.hits += 1
+            return cache[limites]
+        self.misses += 1
+
+        _, _, rotulos = self.bins[destino]
+        resolvidos = self._resolver(destino, limites)
+        if len(resolvidos) != len(rotulos) + 1:
+            raise ValueError(f"{destino} espera {len(rotulos) + 1} limites, recebeu {len(limites)}")
+
+        # pd.cut(right=True, include_lowest=True): o bin j é (b_j, b_j+1] e o
+        # primeiro também aceita b_0; fora de [b_0, b_k] a linha fica sem bin
+        ordenados = self.ordenados[destino]
+        posicoes = np.concatenate([
+            np.searchsorted(ordenados, resolvidos[:1], side="left"),
+            np.searchsorted(ordenados, resolvidos[1:], side="right"),
+        ])
+        ordem = self.ordem[destino]
+        matriz = np.zeros((self.n_linhas, len(rotulos)), dtype=bool)
+        for j in range(len(rotulos)):
+            matriz[ordem[posicoes[j]:posicoes[j + 1]], j] = True
+
+        # fora do padrão o intervalo entra no nome do item: o mesmo rótulo
+        # com outros limites é outro item
+        if limites == self.padrao[destino]:
+            nomes = [f"{destino}={r}" for r in rotulos]
+        else:
+            nomes = [f"{destino}={r}{'[' if j == 0 else '('}{_formatar(resolvidos[j])}, "
+                     f"{_formatar(resolvidos[j + 1])}]" for j, r in enumerate(rotulos)]
+
+        codificacao = (nomes, matriz, empacotar(matriz))
+        cache[limites] = codificacao
+        while len(cache) > self.max_cache:
+            cache.popitem(last=False)
+        return codificacao
+
+    def _blocos(self, limites=None):
+        por_destino = dict(self.canonicos(limites))
+        for coluna in self.colunas:
+            if coluna in self.bins:
+                yield self.codificar(coluna, por_destino[coluna])
+            else:
+                yield self.blocos_fixos[coluna]
+
+    # ------------------------------------------------------------
+    # MATRIZ ONE-HOT E BITSETS PARA UM CONJUNTO DE LIMITES
+    # ------------------------------------------------------------
+    def bitsets(self, limites=None):
+        blocos = list(self._blocos(limites))
+        colunas = [nome for nomes, _, _ in blocos for nome in nomes]
+        return BitsetsVerticais.de_bits(colunas, self.n_linhas, np.concatenate([b for _, _, b in blocos]))
+
+    def matriz(self, limites=None):
+        # com os limites de BINS é a mesma matriz de pre_processamento
+        blocos = list(self._blocos(limites))
+        colunas = [nome for nomes, _, _ in blocos for nome in nomes]
+        return pd.DataFrame(np.concatenate([m for _, m, _ in blocos], axis=1), columns=colunas)
+
+    def resumo(self):
+        total = self.hits + self.misses
+        taxa = self.hits / total if total else 0.0
+        return (f"Discretização: {self.misses} codificações calculadas, {self.hits} reaproveitadas "
+                f"(taxa de acerto={taxa:.1%})")
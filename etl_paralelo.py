@@ -0,0 +1,52 @@
+import multiprocessing as mp
+
+
+# ================================================================
+# EXECUÇÃO DAS UNIDADES DE TRABALHO DO ETL
+# ================================================================
+# cada unidade (um unisens.xml, um annotation.csv, um context.xlsx) é
+# independente; a função de cada etapa recebe uma tarefa e devolve o
+# resultado dela, ou levanta exceção, que vira uma falha reportada
+WORKERS = 1
+CHUNKSIZE = None
+
+
+def _executar(item):
+    funcao, tarefa = item
+    try:
+        return True, funcao(tarefa)
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+
+
+def mapear_tarefas(funcao, tarefas, workers=WORKERS, chunksize=CHUNKSIZE):
+    # map preserva a ordem das tarefas, então o que for montado a partir do
+    # resultado é idêntico ao da execução serial, com qualquer nº de workers
+    itens = [(funcao, tarefa) for tarefa in tarefas]
+    if workers <= 1 or len(itens) <= 1:
+        return [_executar(item) for item in itens]
+
+    if chunksize is None:
+        chunksize = max(1, len(itens) // (workers * 4))
+    with mp.Pool(processes=min(workers, len(itens))) as pool:
+        return pool.map(_executar, itens, chunksize=chunksize)
+
+
+def separar_falhas(resultados, rotulos):
+    # → (resultados das tarefas que deram certo, [(rótulo, erro), …])
+    validos = []
+    falhas = []
+    for (ok, valor), rotulo in zip(resultados, rotulos):
+        if ok:
+            validos.append(valor)
+        else:
+            falhas.append((rotulo, valor))
+    return validos, falhas
+
+
+def relatar_falhas(etapa, falhas):
+    if not falhas:
+        return
+    print(f"\n⚠ {len(falhas)} arquivo(s) com falha em {etapa}:")
+    for rotulo, erro in falhas:
+        print(f"   ❌ {rotulo}: {erro}")
@@ -1,134 +1,82 @@
 import random
-import pandas as pd
-from sklearn import metrics 
+import time
+import argparse
 from tqdm import tqdm
-from mlxtend.frequent_patterns import apriori, association_rules    
-
-
-def pre_processamento():
-    df = pd.read_csv(r'generated-csv\contexto_das_arritmias.csv')
-
-    manter = [
-        'ActivityClass []', 'BodyPosition []', 'MET []',
-        'MovementAcceleration [g]', 'NonWearSleepWake []',
-        'gender', 'weight', 'age', 'height', 'Class'
-    ]
-    df = df[manter].copy()
-    df = df.dropna().copy()
-
-    activity_map = {
-        0: "activity_unknown",
-        1: "activity_lying",
-        2: "activity_sitting_standing",
-        3: "activity_cycling",
-        4: "activity_slope_up",
-        5: "activity_jogging",
-        6: "activity_slope_down",
-        7: "activity_walking",
-        8: "activity_sitting_lying",
-        9: "activity_standing",
-        10: "activity_sitting_lying_standing",
-        11: "activity_sitting",
-        99: "activity_not_worn"
-    }
-
-    bodypos_map = {
-        0: "body_unknown",
-        1: "body_lying_supine",
-        2: "body_lying_left",
-        3: "body_lying_prone",
-        4: "body_lying_right",
-        5: "body_upright",
-        6: "body_sitting_lying",
-        7: "body_standing",
-        99: "body_not_worn"
-    }
-
-    sleepwake_map = {
-        0: "wake",
-        1: "sleep",
-        2: "not_worn"
-    }
-
-    gender_map = {
-        "M": "gender_M",
-        "F": "gender_F",
-        "m": "gender_M",
-        "f": "gender_F"
-    }
-
-    class_map = {
-        1: "AF (Atrial Fibrillation)",
-        2: "NSR (Normal Sinus Rhythm)",
-        3: "Noise",
-        4: "Others"
-    }
-
-    df['ActivityClass_mapped'] = pd.to_numeric(df['ActivityClass []'], errors='coerce').map(activity_map)
-    df['BodyPosition_mapped'] = pd.to_numeric(df['BodyPosition []'], errors='coerce').map(bodypos_map)
-    df['NonWearSleepWake_mapped'] = pd.to_numeric(df['NonWearSleepWake []'], errors='coerce').map(sleepwake_map)
-    df['ArrhythmiaClass'] = pd.to_numeric(df['Class'], errors='coerce').map(class_map)
-    df['gender_mapped'] = df['gender'].astype(str).map(lambda x: x.strip()).map(gender_map)
-
-    df["MET_bin"] = pd.cut(
-        df["MET []"],
-        bins=[0, 1.0, 1.25, df["MET []"].max()],
-        labels=["met_1.0", "met_1.25", "met_acima_1.25"],
-        include_lowest=True
-    )
-
-    df["acc_bin"] = pd.cut(
-        df["MovementAcceleration [g]"],
-        bins=[0, 0.004326, 0.007704, 0.021811, df["MovementAcceleration [g]"].max()],
-        labels=["acc_muito_baixa", "acc_baixa", "acc_moderada", "acc_alta"],
-        include_lowest=True
-    )
-
-    df["weight_bin"] = pd.cut(
-        df["weight"],
-        bins=[50, 70, 79, 86, df["weight"].max()],
-        labels=["peso_muito_baixo", "peso_baixo", "peso_medio", "peso_alto"],
-        include_lowest=True
-    )
-
-    df["age_bin"] = pd.cut(
-        df["age"],
-        bins=[30, 40, 50, 60, 80],
-        labels=["adulto_jovem", "adulto", "quase_idoso", "idoso"],
-        include_lowest=True
-    )
-
-    df["height_bin"] = pd.cut(
-        df["height"],
-        bins=[75, 102.5, 130, 157.5, 185],
-        labels=["height_baixo", "height_medio", "height_alto", "height_muito_alto"],
-        include_lowest=True
-    )
-
-    cols_apriori = [
-        'ActivityClass_mapped',
-        'BodyPosition_mapped',
-        'NonWearSleepWake_mapped',
-        'gender_mapped',
-        'MET_bin',
-        'acc_bin',
-        'weight_bin',
-        'age_bin',
-        'height_bin',
-        'ArrhythmiaClass'
-    ]
-
-    df_cat = df[cols_apriori].copy()
-
-    df_hot = pd.get_dummies(df_cat, prefix_sep='=')
-    df_hot_bool = (df_hot > 0).astype(bool)
-
-    return df_hot_bool
-
-DADOS = pre_processamento()
+from reticulado import Reticulado, MIN_CONFIANCA, PREFIXO_ALVO, filtrar_regras_arritmia, avaliar_genoma
+from mineracao_bitset import OrcamentoMineracao
+from geracao_regras import completar_metricas
+from cache_fitness import CacheFitness, impressao_digital
+from avaliacao_paralela import AvaliadorParalelo
+from perfil_avaliacao import Perfilador, avaliar_perfilado
+from repositorio_regras import ColetorRegras, DESTINO as DESTINO_REGRAS
+from preprocessamento import CAMINHO_CONTEXTO, carregar_matriz, preparar_contexto
+from discretizacao import Discretizador
+from corrida_fitness import CorridaFitness, TOP_K, FRACAO_AMOSTRA
+
+
+# ================================================================
+# DADOS E CACHE (CARREGADOS SÓ QUANDO O GA PRECISA)
+# ================================================================
+DADOS = None
+RETICULADO = None
+CACHE = None
+CAMINHO_DADOS = CAMINHO_CONTEXTO
+DISCRETIZADOR = None
+ORCAMENTO = None
+
+def carregar_dados(caminho=CAMINHO_CONTEXTO, usar_cache=True, orcamento=None):
+    # orcamento: OrcamentoMineracao de cada avaliação; muda quais genomas são
+    # penalizados, então entra na digital do cache
+    global DADOS, RETICULADO, CACHE, CAMINHO_DADOS, DISCRETIZADOR, ORCAMENTO
+    DADOS = carregar_matriz(caminho, usar_cache=usar_cache)
+    RETICULADO = None
+    CAMINHO_DADOS = caminho
+    DISCRETIZADOR = None
+    ORCAMENTO = orcamento
+    extra = f"confidence={MIN_CONFIANCA};alvo={PREFIXO_ALVO};metricas=basicas"
+    if orcamento is not None:
+        extra += f";max_itemsets={orcamento.max_itemsets}"
+    CACHE = CacheFitness(impressao_digital(DADOS, extra=extra))
+    return DADOS
+
+def obter_dados():
+    if DADOS is None:
+        carregar_dados()
+    return DADOS
+
+def obter_cache():
+    if CACHE is None:
+        carregar_dados()
+    return CACHE
+
+def obter_reticulado():
+    # minerado uma única vez por execução; cada indivíduo só fatia
+    global RETICULADO
+    if RETICULADO is None:
+        RETICULADO = Reticulado(obter_dados(), orcamento=ORCAMENTO)
+        if RETICULADO.motivo:
+            print(f"⚠ Reticulado fora do orçamento ({RETICULADO.motivo}): cada genoma minera direto")
+    return RETICULADO
+
+def obter_discretizador():
+    # só quando o GA evolui os limites dos bins: o CSV é relido uma vez e as
+    # colunas numéricas ordenadas uma vez
+    global DISCRETIZADOR
+    if DISCRETIZADOR is None:
+        obter_dados()
+        DISCRETIZADOR = Discretizador(preparar_contexto(CAMINHO_DADOS))
+    return DISCRETIZADOR
+
+def avaliar(genoma, perfil=None):
+    # → (fitness, regras); fora do orçamento, fitness penalizado
+    if len(genoma) > 2 and genoma[2] is not None:
+        return avaliar_genoma(genoma, discretizador=obter_discretizador(), perfil=perfil, orcamento=ORCAMENTO)
+    return avaliar_genoma(genoma, obter_reticulado(), perfil=perfil, orcamento=ORCAMENTO)
 
 class Individuo:
-    def __init__(self, min_support, max_len):
+    def __init__(self, min_support, max_len, avaliar=True, limites=None):
+        # limites: Discretizador.canonicos(...) quando o GA evolui os bins
+        self.limites = limites
         if min_support is None and max_len is None:
             self.min_support = round(random.uniform(0.01, 0.50), 4)
             self.max_len = random.randint(2,7)
@@ -138,46 +86,255 @@ class Individuo:
             self.max_len = max_len
         
         self.rules = None
-        self.fitness_score = self.calcular_fitness()
+        self.genoma_avaliado = None
+        self.estimado = False
+        self.fitness_score = self.calcular_fitness() if avaliar else None
+
+    @property
+    def genoma(self):
+        return CacheFitness.chave(self.min_support, self.max_len, self.limites)
+
+    @property
+    def sujo(self):
+        # nunca avaliado, ou os genes mudaram (mutação) desde a última avaliação
+        return self.fitness_score is None or self.genoma_avaliado != self.genoma
+
+    def aplicar_resultado(self, fitness, regras, estimado=False):
+        # estimado: fitness e regras vieram da amostra da corrida
+        self.fitness_score = fitness
+        self.rules = regras
+        self.genoma_avaliado = self.genoma
+        self.estimado = estimado
 
     def calcular_fitness(self): 
-        frequent_itemsets = apriori(
-            DADOS,
-            min_support=self.min_support,
-            use_colnames=True,
-            max_len=self.max_len,
-        )
-        
-        self.rules = self.filter_rules(association_rules(frequent_itemsets, metric="confidence", min_threshold=0.4))
-        mean_lift = self.rules['lift'].mean()
-        mean_support = self.rules['support'].mean()
-
-        #print(f"Fitness calculado: lift médio={mean_lift}, support médio={mean_support}")
-        return mean_lift * mean_support 
+        self.genoma_avaliado = self.genoma
+        em_cache = obter_cache().obter(*self.genoma)
+        if em_cache is not None:
+            fitness, self.rules = em_cache
+            return fitness
+
+        fitness, self.rules = avaliar(self.genoma)
+        obter_cache().guardar(self.min_support, self.max_len, fitness, self.rules, self.limites)
+        return fitness
     
-    def filter_rules(self, temporary_rules):
-        new_rules = temporary_rules[
-            temporary_rules['antecedents'].apply(lambda items: any(str(i).startswith("ArrhythmiaClass=") for i in items)) |
-            temporary_rules['consequents'].apply(lambda items: any(str(i).startswith("ArrhythmiaClass=") for i in items))
-        ].copy()
-
-        return new_rules.copy() 
+    @staticmethod
+    def filter_rules(temporary_rules):
+        return filtrar_regras_arritmia(temporary_rules)
     
     def __str__(self):
-        return f"Individuo(min_support={self.min_support}, max_len={self.max_len}, media do lift={self.rules['lift'].mean()} media do support={self.rules['support'].mean()} fitness={self.fitness_score})"
+        limites = "" if self.limites is None else f", limites={dict(self.limites)}"
+        return f"Individuo(min_support={self.min_support}, max_len={self.max_len}{limites}, media do lift={self.rules['lift'].mean()} media do support={self.rules['support'].mean()} fitness={self.fitness_score})"
+
+
+def fitness_ordenavel(individuo):
+    # NaN (nenhuma regra) e None (não avaliado) nunca vencem uma comparação
+    f = individuo.fitness_score
+    return float("-inf") if f is None or f != f else f
+
+
+# ================================================================
+# PLANEJADOR DE AVALIAÇÕES POR GERAÇÃO
+# ================================================================
+class PlanejadorAvaliacao:
+    def __init__(self, avaliador=None, perfilador=None, coletor=None, corrida=None):
+        self.avaliador = avaliador
+        self.perfilador = perfilador
+        # corrida (opcional): só os genomas que ainda podem entrar no top-k
+        # pela estimativa na amostra recebem a avaliação completa
+        self.corrida = corrida
+        # regras de todo genoma avaliado (cache ou não) vão para o repositório
+        self.coletor = coletor
+        self.total_executadas = 0
+        self.total_evitadas = 0
+        # (genoma, motivo) das avaliações que estouraram o orçamento de mineração
+        self.penalizadas = []
+
+    def avaliar(self, individuos, geracao=None):
+        # só indivíduos sujos entram; genomas repetidos são avaliados uma vez
+        pendentes = {}
+        evitadas = 0
+        for individuo in individuos:
+            if individuo.sujo:
+                pendentes.setdefault(individuo.genoma, []).append(individuo)
+            else:
+                evitadas += 1
+
+        faltantes = []
+        for genoma, grupo in pendentes.items():
+            evitadas += len(grupo) - 1
+            em_cache = obter_cache().obter(*genoma)
+            if em_cache is not None:
+                evitadas += 1
+                for individuo in grupo:
+                    individuo.aplicar_resultado(*em_cache)
+                if self.coletor is not None:
+                    self.coletor.adicionar(genoma, em_cache[1])
+                if self.perfilador is not None:
+                    self.perfilador.registrar_avaliacao(geracao, genoma, "hit", em_cache[0],
+                                                        {"n_regras": len(em_cache[1])})
+            else:
+                faltantes.append(genoma)
+
+        if self.corrida is None:
+            self._executar(faltantes, pendentes, geracao)
+        else:
+            # genomas estimados pela corrida também são avaliações evitadas
+            faltantes, estimados = self._correr(faltantes, pendentes, individuos, geracao)
+            evitadas += estimados
+
+        self.total_executadas += len(faltantes)
+        self.total_evitadas += evitadas
+        return len(faltantes), evitadas
+
+    def _executar(self, genomas, pendentes, geracao):
+        if self.perfilador is not None:
+            resultados = self._avaliar_perfilado(genomas, geracao)
+        elif self.avaliador is None:
+            resultados = [self._avaliar_local(genoma) for genoma in genomas]
+        else:
+            resultados = self.avaliador.avaliar(genomas)
+
+        for genoma, (fitness, regras) in zip(genomas, resultados):
+            if "penalidade" in regras.attrs:
+                self.penalizadas.append((genoma, regras.attrs["penalidade"]))
+            obter_cache().guardar(genoma[0], genoma[1], fitness, regras, *genoma[2:])
+            if self.coletor is not None:
+                self.coletor.adicionar(genoma, regras)
+            for individuo in pendentes[genoma]:
+                individuo.aplicar_resultado(fitness, regras)
+
+    def _correr(self, faltantes, pendentes, individuos, geracao):
+        # rodadas de promoção até nenhum restante alcançar o top-k; quem fica
+        # de fora recebe a estimativa da amostra, que não vai para o cache nem
+        # para o repositório de regras. Genomas sem limites próprios só fatiam
+        # o reticulado (milissegundos) e são sempre avaliados por completo; se
+        # estimar já se mostrou mais caro que avaliar, todos são
+        if self.corrida.compensa():
+            baratos = [genoma for genoma in faltantes if len(genoma) < 3 or genoma[2] is None]
+        else:
+            baratos = list(faltantes)
+        self._executar(baratos, pendentes, geracao)
+        exatos = {individuo.genoma: individuo.fitness_score for individuo in individuos
+                  if not individuo.sujo and not individuo.estimado}
+        restantes = [genoma for genoma in faltantes if genoma not in baratos]
+        promovidos = []
+        while restantes:
+            novos = self.corrida.promover(restantes, list(exatos.values()))
+            if not novos:
+                break
+            inicio = time.perf_counter()
+            self._executar(novos, pendentes, geracao)
+            self.corrida.medir_exatos(time.perf_counter() - inicio, len(novos))
+            for genoma in novos:
+                exatos[genoma] = pendentes[genoma][0].fitness_score
+            promovidos += novos
+            restantes = [genoma for genoma in restantes if genoma not in novos]
+
+        for genoma in restantes:
+            estimativa, _, _, regras = self.corrida.estimar(genoma)
+            for individuo in pendentes[genoma]:
+                individuo.aplicar_resultado(estimativa, regras, estimado=True)
+            if self.perfilador is not None:
+                self.perfilador.registrar_avaliacao(geracao, genoma, "estimado", estimativa,
+                                                    {"n_regras": len(regras)})
+
+        self.corrida.registrar({genoma: exatos[genoma] for genoma in promovidos}, restantes)
+        return baratos + promovidos, len(restantes)
+
+    @staticmethod
+    def _avaliar_local(genoma):
+        return avaliar(genoma)
+
+    def _avaliar_perfilado(self, genomas, geracao):
+        if self.avaliador is not None:
+            resultados = self.avaliador.avaliar(genomas, perfilar=True)
+        else:
+            resultados = []
+            for genoma in genomas:
+                # a construção do reticulado (uma vez por execução) fica
+                # registrada na avaliação que a disparou
+                t_reticulado = 0.0
+                discretizador = None
+                if len(genoma) > 2 and genoma[2] is not None:
+                    discretizador = obter_discretizador()
+                elif RETICULADO is None:
+                    inicio = time.perf_counter()
+                    obter_reticulado()
+                    t_reticulado = time.perf_counter() - inicio
+                fitness, regras, perfil = avaliar_perfilado(RETICULADO, genoma, discretizador, ORCAMENTO)
+                perfil["t_reticulado_s"] = t_reticulado
+                resultados.append((fitness, regras, perfil))
+
+        for genoma, (fitness, _, perfil) in zip(genomas, resultados):
+            self.perfilador.registrar_avaliacao(geracao, genoma, "miss", fitness, perfil)
+        return [(fitness, regras) for fitness, regras, _ in resultados]
 
 
 class GA:
-    def __init__(self, individuo: int, geracao: int, mutacao: int):
+    def __init__(self, individuo: int, geracao: int, mutacao: int, workers: int = 1, seed=None,
+                 elitismo: int = 0, paciencia: int = None, tolerancia: float = 0.0,
+                 tempo_limite: float = None, max_avaliacoes: int = None, perfil: str = None,
+                 destino: str = DESTINO_REGRAS, exportar_csv: bool = False, evoluir_limites: bool = False,
+                 corrida: bool = False, top_k: int = TOP_K, fracao_amostra: float = FRACAO_AMOSTRA):
         self.individuo = individuo
         self.geracao = geracao
         self.mutacao = mutacao
+        self.workers = workers
+        self.elitismo = elitismo
+        self.paciencia = paciencia
+        self.tolerancia = tolerancia
+        self.tempo_limite = tempo_limite
+        self.max_avaliacoes = max_avaliacoes
         self.melhor_individuo = None
-        
-        self.executar()
+        self.destino = destino
+        self.exportar_csv = exportar_csv
+        self.coletor = ColetorRegras()
+        # limites dos bins como terceiro gene; desligado, o genoma e a
+        # sequência aleatória são os mesmos de antes
+        self.evoluir_limites = evoluir_limites
+        self.discretizador = obter_discretizador() if evoluir_limites else None
+
+        # toda a aleatoriedade fica no processo principal: com a mesma seed o
+        # resultado não depende do número de workers
+        if seed is not None:
+            random.seed(seed)
+
+        # corrida por amostragem: a elite precisa de fitness exato, então o
+        # top-k nunca é menor que ela. Só com limites evoluídos: sem eles a
+        # avaliação completa é uma fatia do reticulado, mais barata que estimar
+        self.corrida = None
+        if corrida and not evoluir_limites:
+            print("⚠ --corrida só tem efeito com --evoluir-limites: avaliação exata pelo reticulado")
+        elif corrida:
+            self.corrida = CorridaFitness(obter_dados(), top_k=max(top_k, elitismo), fracao=fracao_amostra,
+                                          discretizador=self.discretizador, orcamento=ORCAMENTO)
+
+        # trace por avaliação/geração só quando pedido; desligado não custa nada
+        self.perfilador = Perfilador(perfil) if perfil else None
+        try:
+            if workers > 1:
+                # o reticulado é minerado uma vez aqui e herdado pelos workers
+                reticulado = None if evoluir_limites else obter_reticulado()
+                with AvaliadorParalelo(obter_dados(), workers, discretizador=self.discretizador,
+                                       orcamento=ORCAMENTO, reticulado=reticulado) as avaliador:
+                    self.planejador = PlanejadorAvaliacao(avaliador, self.perfilador, self.coletor, self.corrida)
+                    self.executar()
+            else:
+                self.planejador = PlanejadorAvaliacao(perfilador=self.perfilador, coletor=self.coletor,
+                                                      corrida=self.corrida)
+                self.executar()
+        finally:
+            if self.perfilador is not None:
+                self.perfilador.fechar()
+                print(f"📁 Trace das avaliações salvo em: {perfil}")
  
     def executar(self):
+        self.inicio = time.perf_counter()
+        self.geracoes_sem_melhora = 0
+        self.relatorio_avaliacoes = []
+
         self.populacao_atual = self.gerarPopulacao()
+        self.avaliarGeracao()
         self.melhor_individuo = self.acharMelhorIndividuo()
 
         media_acuracia_geracao = [] 
@@ -188,14 +345,24 @@ class GA:
         media_acuracia_geracao.append(somat/len(self.populacao_atual))
 
         for _ in tqdm(range(self.geracao-1)):
+            motivo = self.criterioDeParada()
+            if motivo:
+                print(f"\n⏹ Parada antecipada: {motivo}")
+                break
+
+            elite = self.selecionarElite()
             self.crossover()
             self.mutar()
-            self.acharMelhorIndividuo()
+            if elite:
+                # a elite entra sem passar por mutação e continua limpa
+                self.populacao_atual = elite + self.populacao_atual[:self.individuo - len(elite)]
+
+            self.avaliarGeracao()
+            self.atualizarMelhor(self.acharMelhorIndividuo())
 
             soma = 0
             
             for i in self.populacao_atual:
-                i.calcular_fitness()
                 soma += i.fitness_score    
 
             media_acuracia_geracao.append(soma/len(self.populacao_atual))
@@ -203,19 +370,65 @@ class GA:
         self.guardar_resultado()
 
         for i in range(len(media_acuracia_geracao)):
-            print(f"Geração {i+1}: Média do fitness = {media_acuracia_geracao[i]}")
+            executadas, evitadas = self.relatorio_avaliacoes[i]
+            print(f"Geração {i+1}: Média do fitness = {media_acuracia_geracao[i]} "
+                  f"(avaliações executadas={executadas}, evitadas={evitadas})")
+
+        print(f"Total de avaliações: {self.planejador.total_executadas} executadas, "
+              f"{self.planejador.total_evitadas} evitadas")
+        print(obter_cache().resumo())
+        if self.discretizador is not None:
+            print(self.discretizador.resumo())
+        if self.corrida is not None:
+            print(self.corrida.resumo())
+        if self.planejador.penalizadas:
+            print(f"⚠ {len(self.planejador.penalizadas)} avaliações fora do orçamento receberam fitness penalizado:")
+            for genoma, motivo in self.planejador.penalizadas[:5]:
+                print(f"   min_support={genoma[0]}, max_len={genoma[1]}: {motivo}")
+
+    def avaliarGeracao(self):
+        geracao = len(self.relatorio_avaliacoes) + 1
+        executadas, evitadas = self.planejador.avaliar(self.populacao_atual, geracao)
+        self.relatorio_avaliacoes.append((executadas, evitadas))
+        if self.perfilador is not None:
+            self.perfilador.registrar_geracao(geracao, self.populacao_atual, executadas, evitadas)
+
+    def atualizarMelhor(self, candidato):
+        if fitness_ordenavel(candidato) > fitness_ordenavel(self.melhor_individuo) + self.tolerancia:
+            self.melhor_individuo = candidato
+            self.geracoes_sem_melhora = 0
+        else:
+            self.geracoes_sem_melhora += 1
+
+    def criterioDeParada(self):
+        if self.paciencia is not None and self.geracoes_sem_melhora >= self.paciencia:
+            return f"{self.geracoes_sem_melhora} gerações sem melhora do fitness"
+        if self.tempo_limite is not None and time.perf_counter() - self.inicio >= self.tempo_limite:
+            return f"tempo limite de {self.tempo_limite}s atingido"
+        if self.max_avaliacoes is not None and self.planejador.total_executadas >= self.max_avaliacoes:
+            return f"orçamento de {self.max_avaliacoes} avaliações atingido"
+        return None
+
+    def selecionarElite(self) -> list:
+        if self.elitismo <= 0:
+            return []
+        return sorted(self.populacao_atual, key=fitness_ordenavel, reverse=True)[:self.elitismo]
 
     def gerarPopulacao(self) -> list:
         populacao = []
         for i in range(self.individuo):
-            populacao.append(Individuo(None, None))
+            individuo = Individuo(None, None, avaliar=False)
+            if self.evoluir_limites:
+                individuo.limites = self.discretizador.canonicos(
+                    {destino: self.discretizador.sortear_limites(destino) for destino in self.discretizador.bins})
+            populacao.append(individuo)
         
         return populacao
     
     def acharMelhorIndividuo(self) -> Individuo:
         melhor = self.populacao_atual[0]
         for individuo in self.populacao_atual:
-            if individuo.fitness_score > melhor.fitness_score:
+            if fitness_ordenavel(individuo) > fitness_ordenavel(melhor):
                 melhor = individuo
         return melhor
 
@@ -229,23 +442,38 @@ class GA:
 
             primeiro = Individuo(
                 min_support=x.min_support,
-                max_len=y.max_len
+                max_len=y.max_len,
+                avaliar=False,
+                limites=x.limites
             )
             segundo = Individuo(
                 min_support=y.min_support,
-                max_len=x.max_len
+                max_len=x.max_len,
+                avaliar=False,
+                limites=y.limites
             )
+            if self.evoluir_limites:
+                # cada atributo discretizado vem de um dos pais
+                troca = [random.random() < 0.5 for _ in x.limites]
+                primeiro.limites = tuple(b if t else a for a, b, t in zip(x.limites, y.limites, troca))
+                segundo.limites = tuple(a if t else b for a, b, t in zip(x.limites, y.limites, troca))
             nova_geracao.append(primeiro)
             nova_geracao.append(segundo)    
         
         self.populacao_atual = nova_geracao
 
     def mutar(self):
+        # só troca os genes; o planejador percebe o indivíduo sujo e o reavalia
         for individuo in self.populacao_atual:
             if random.randint(1,100) <= self.mutacao:
                 individuo.min_support = round(random.uniform(0.01, 0.50), 4)
                 individuo.max_len = random.randint(2,6)
-                individuo.fitness_score = individuo.calcular_fitness()
+                if self.evoluir_limites:
+                    # um atributo por mutação: só as colunas dele são recodificadas
+                    destino = random.choice(list(self.discretizador.bins))
+                    novos = dict(individuo.limites)
+                    novos[destino] = self.discretizador.sortear_limites(destino)
+                    individuo.limites = self.discretizador.canonicos(novos)
 
     def selecao(self):
         x, y= random.sample(range(0, self.individuo-1), 2)
@@ -256,19 +484,97 @@ class GA:
             return self.populacao_atual[y]
         
     def guardar_resultado(self):
-        caminho_arquivo = f"resultado_GA.csv"
         print("✔ Melhor indivíduo encontrado: ", self.melhor_individuo)
         try:
-            self.melhor_individuo.rules.to_csv(caminho_arquivo, index=False, encoding='utf-8')
-            print(f"✔ Arquivo salvo com sucesso em: {caminho_arquivo}")
+            # regras de todos os indivíduos avaliados, sem repetição, com as do
+            # melhor marcadas; as métricas completas são calculadas só aqui
+            self.coletor.salvar(self.destino, melhor=self.melhor_individuo.genoma)
+            print(f"✔ Repositório com {len(self.coletor)} regras ({len(self.coletor.vocabulario)} itens, "
+                  f"{len(self.coletor.genomas)} genomas) salvo em: {self.destino}")
         except Exception as e:
-            print("❌ Erro ao salvar o arquivo:", e)
-
+            print("❌ Erro ao salvar o repositório de regras:", e)
+
+        if self.exportar_csv:
+            caminho_arquivo = f"resultado_GA.csv"
+            try:
+                completar_metricas(self.melhor_individuo.rules).to_csv(caminho_arquivo, index=False, encoding='utf-8')
+                print(f"✔ Arquivo salvo com sucesso em: {caminho_arquivo}")
+            except Exception as e:
+                print("❌ Erro ao salvar o arquivo:", e)
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Algoritmo genético + Apriori sobre o contexto das arritmias")
+    parser.add_argument("-p", "--populacao", type=int, default=10, help="indivíduos por geração")
+    parser.add_argument("-g", "--geracoes", type=int, default=10, help="número de gerações")
+    parser.add_argument("-m", "--mutacao", type=int, default=20, help="chance de mutação (%%)")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="semente do gerador aleatório")
+    parser.add_argument("-i", "--entrada", default=CAMINHO_CONTEXTO, help="CSV de contexto das arritmias")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="processos para avaliar a população")
+    parser.add_argument("--elitismo", type=int, default=0, help="melhores indivíduos mantidos a cada geração")
+    parser.add_argument("--paciencia", type=int, default=None, help="gerações sem melhora antes de parar")
+    parser.add_argument("--tempo-limite", type=float, default=None, help="tempo máximo de execução (s)")
+    parser.add_argument("--max-avaliacoes", type=int, default=None, help="orçamento de avaliações executadas")
+    parser.add_argument("--sem-cache-matriz", action="store_true", help="refaz o pré-processamento do CSV")
+    parser.add_argument("--perfil", default=None,
+                        help="grava o trace de cada avaliação e de cada geração (.jsonl ou .csv)")
+    parser.add_argument("--evoluir-limites", action="store_true",
+                        help="inclui os pontos de corte dos bins numéricos no genoma")
+    parser.add_argument("--corrida", action="store_true",
+                        help="com --evoluir-limites, estima o fitness numa amostra estratificada e só "
+                             "avalia por completo quem ainda pode entrar no top-k")
+    parser.add_argument("--corrida-top", type=int, default=TOP_K, help="top-k da corrida")
+    parser.add_argument("--corrida-fracao", type=float, default=FRACAO_AMOSTRA,
+                        help="fração das transações de cada classe na amostra da corrida")
+    parser.add_argument("--max-itemsets", type=int, default=None,
+                        help="teto de itemsets frequentes por avaliação; acima dele o fitness é penalizado")
+    parser.add_argument("--max-memoria-mb", type=float, default=None,
+                        help="memória dos itemsets durante a mineração; acima dela os níveis vão para o disco")
+    parser.add_argument("--pasta-despejo", default=None, help="pasta dos níveis despejados (padrão: temporária)")
+    parser.add_argument("--regras", default=DESTINO_REGRAS, help="pasta do repositório de regras")
+    parser.add_argument("--csv", action="store_true",
+                        help="também exporta as regras do melhor indivíduo em resultado_GA.csv")
+    args = parser.parse_args(argv)
+
+    t1 = time.perf_counter()
+
+    orcamento = None
+    if args.max_itemsets is not None or args.max_memoria_mb is not None:
+        orcamento = OrcamentoMineracao(
+            max_itemsets=args.max_itemsets,
+            max_bytes=None if args.max_memoria_mb is None else int(args.max_memoria_mb * 1024 * 1024),
+            pasta=args.pasta_despejo,
+        )
+    carregar_dados(args.entrada, usar_cache=not args.sem_cache_matriz, orcamento=orcamento)
+    print(f"📌 Matriz de transações: {DADOS.shape[0]} linhas × {DADOS.shape[1]} itens "
+          f"({time.perf_counter() - t1:.3f}s)")
+
+    ga = GA(
+        individuo=args.populacao,
+        geracao=args.geracoes,
+        mutacao=args.mutacao,
+        workers=args.workers,
+        seed=args.seed,
+        elitismo=args.elitismo,
+        paciencia=args.paciencia,
+        tempo_limite=args.tempo_limite,
+        max_avaliacoes=args.max_avaliacoes,
+        perfil=args.perfil,
+        destino=args.regras,
+        exportar_csv=args.csv,
+        evoluir_limites=args.evoluir_limites,
+        corrida=args.corrida,
+        top_k=args.corrida_top,
+        fracao_amostra=args.corrida_fracao,
+    )
 
-import time
-t1 = time.perf_counter()
+    t2 = time.perf_counter()
+    print(f"Tempo de execução: {(t2-t1):.2f}s")
+    return ga
 
-ga = GA(individuo=10, geracao=10, mutacao=20)
 
-t2 = time.perf_counter()
-print(f"Tempo de execução: {(t2-t1):.2f}s")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+
+# ================================================================
+# MÉTRICAS
+# ================================================================
+# o fitness só usa support e lift (confidence é o limiar); antecedent e
+# consequent support ficam guardados para completar o resto sob demanda
+COLUNAS_BASICAS = [
+    "antecedents", "consequents", "antecedent support", "consequent support",
+    "support", "confidence", "lift",
+]
+
+# mesma ordem de colunas do mlxtend association_rules
+COLUNAS_COMPLETAS = COLUNAS_BASICAS + [
+    "representativity", "leverage", "conviction", "zhangs_metric",
+    "jaccard", "certainty", "kulczynski",
+]
+
+
+def _codificar(ids, base):
+    # tupla ordenada de ids → inteiro único (dígitos id+1 na base n_itens+1)
+    chave = np.zeros(ids.shape[0], dtype=np.int64)
+    peso = 1
+    for j in range(ids.shape[1]):
+        chave += (ids[:, j].astype(np.int64) + 1) * peso
+        peso *= base
+    return chave
+
+
+def _niveis(itemsets):
+    # → [(tamanho, posições, ids (m × tamanho))]; ItemsetsEmNiveis já traz os
+    # arrays de cada nível, uma lista de tuplas é agrupada por tamanho
+    if hasattr(itemsets, "niveis"):
+        niveis = []
+        inicio = 0
+        for k, ids in itemsets.niveis:
+            niveis.append((k, np.arange(inicio, inicio + len(ids), dtype=np.int64), ids))
+            inicio += len(ids)
+        return [nivel for nivel in niveis if len(nivel[2])]
+
+    por_tamanho = {}
+    for p, itemset in enumerate(itemsets):
+        por_tamanho.setdefault(len(itemset), []).append(p)
+    return [(k, np.array(pos, dtype=np.int64), np.array([itemsets[p] for p in pos]).reshape(len(pos), k))
+            for k, pos in sorted(por_tamanho.items())]
+
+
+# ================================================================
+# GERAÇÃO DE REGRAS RESTRITA A ITEMSETS COM UM ITEM-ALVO
+# ================================================================
+def gerar_regras(itemsets, suportes, colunas, alvos, min_confianca):
+    # itemsets: tuplas ordenadas de ids (saída de minerar_ids, lista ou
+    # ItemsetsEmNiveis); os itemsets são lidos nível a nível, como arrays
+    # alvos: ids dos itens que precisam aparecer na regra; como antecedente e
+    # consequente particionam o itemset, basta o itemset conter um alvo
+    n_itens = len(colunas)
+    base = n_itens + 1
+    niveis = _niveis(itemsets)
+    max_len = max((k for k, _, _ in niveis), default=0)
+    if base ** max_len >= 2 ** 63:
+        raise ValueError(f"Vocabulário grande demais para codificar itemsets de tamanho {max_len}")
+
+    # índice de suporte por chave inteira (busca binária)
+    chaves = np.empty(len(itemsets), dtype=np.int64)
+    for _, pos, ids in niveis:
+        chaves[pos] = _codificar(ids, base)
+    ordem = np.argsort(chaves)
+    chaves_ordenadas = chaves[ordem]
+    suportes = np.asarray(suportes, dtype=float)
+
+    def posicao_de(ids):
+        return ordem[np.searchsorted(chaves_ordenadas, _codificar(ids, base))]
+
+    alvos = np.zeros(n_itens, dtype=bool) if not len(alvos) else np.isin(np.arange(n_itens), alvos)
+
+    blocos = []
+    for k, pos, ids in niveis:
+        if k < 2:
+            continue
+        com_alvo = alvos[ids].any(axis=1)
+        if not com_alvo.any():
+            continue
+        pos, Z = pos[com_alvo], ids[com_alvo]
+        sZ = suportes[pos]
+
+        divisao = 0
+        for r in range(k - 1, 0, -1):
+            for lado_a in combinations(range(k), r):
+                lado_c = [j for j in range(k) if j not in lado_a]
+                pA, pC = posicao_de(Z[:, list(lado_a)]), posicao_de(Z[:, lado_c])
+                sA, sC = suportes[pA], suportes[pC]
+
+                confianca = sZ / sA
+                ok = confianca >= min_confianca
+                if ok.any():
+                    blocos.append((pos[ok], divisao, pA[ok], pC[ok], sA[ok], sC[ok], sZ[ok], confianca[ok]))
+                divisao += 1
+
+    if not blocos:
+        return pd.DataFrame({c: pd.Series(dtype="object" if c in ("antecedents", "consequents") else float)
+                             for c in COLUNAS_BASICAS})
+
+    # ordem das linhas: itemset a itemset, como o association_rules
+    origem = np.concatenate([b[0] for b in blocos])
+    divisoes = np.concatenate([np.full(len(b[0]), b[1]) for b in blocos])
+    ordem_linhas = np.lexsort((divisoes, origem))
+
+    # um frozenset por itemset distinto, compartilhado entre as regras
+    pA = np.concatenate([b[2] for b in blocos])
+    pC = np.concatenate([b[3] for b in blocos])
+    usados, inverso = np.unique(np.concatenate([pA, pC]), return_inverse=True)
+    nomes = np.empty(len(usados), dtype=object)
+    nomes[:] = [frozenset(colunas[i] for i in itemsets[p]) for p in usados]
+    antecedentes, consequentes = nomes[inverso[:len(pA)]], nomes[inverso[len(pA):]]
+
+    sA = np.concatenate([b[4] for b in blocos])
+    sC = np.concatenate([b[5] for b in blocos])
+    sAC = np.concatenate([b[6] for b in blocos])
+    confianca = np.concatenate([b[7] for b in blocos])
+
+    regras = pd.DataFrame({
+        "antecedents": pd.Series(antecedentes, dtype="object"),
+        "consequents": pd.Series(consequentes, dtype="object"),
+        "antecedent support": sA,
+        "consequent support": sC,
+        "support": sAC,
+        "confidence": confianca,
+        "lift": confianca / sC,
+    })
+    return regras.iloc[ordem_linhas].reset_index(drop=True)
+
+
+# ================================================================
+# MÉTRICAS RESTANTES (SÓ PARA AS REGRAS QUE SERÃO SALVAS)
+# ================================================================
+def metricas_derivadas(sA, sC, sAC, confianca):
+    # mesmas fórmulas do mlxtend association_rules sem valores nulos
+    leverage = sAC - sA * sC
+
+    conviction = np.full(len(sAC), np.inf)
+    menor = confianca < 1.0
+    conviction[menor] = (1.0 - sC[menor]) / (1.0 - confianca[menor])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominador = np.maximum(sAC * (1 - sA), sA * (sC - sAC))
+        zhangs = np.where(denominador == 0, 0, leverage / denominador)
+        certainty = np.where(1 - sC == 0, 0, (confianca - sC) / (1 - sC))
+
+    return {
+        "representativity": np.ones(len(sAC)),
+        "leverage": leverage,
+        "conviction": conviction,
+        "zhangs_metric": zhangs,
+        "jaccard": sAC / (sA + sC - sAC),
+        "certainty": certainty,
+        "kulczynski": (sAC / sA + sAC / sC) / 2,
+    }
+
+
+def completar_metricas(regras):
+    if "kulczynski" in regras.columns:
+        return regras
+
+    regras = regras.copy()
+    derivadas = metricas_derivadas(
+        regras["antecedent support"].to_numpy(dtype=float),
+        regras["consequent support"].to_numpy(dtype=float),
+        regras["support"].to_numpy(dtype=float),
+        regras["confidence"].to_numpy(dtype=float),
+    )
+    for nome, valores in derivadas.items():
+        regras[nome] = valores
+    return regras[COLUNAS_COMPLETAS]
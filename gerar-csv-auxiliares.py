@@ -1,10 +1,19 @@
 import os
+import argparse
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.signal import detrend
 import xml.etree.ElementTree as ET
 
+from janelas_ecg import ler_janela
+import artefato_colunar
+from artefato_colunar import salvar_etapa
+from etl_paralelo import separar_falhas, relatar_falhas
+from manifesto_etl import executar_incremental, SUBDIR_MANIFESTO
+from indice_metadados import (construir_indice, atualizar_indice, conectar, consultar_anotacoes_com_pacientes,
+                              NOME_INDICE)
+
 # ================================================================
 # CONFIGURAÇÕES DO DATASET
 # ================================================================
@@ -51,23 +60,33 @@ def ler_unisens(unisens_path):
     # --- customAttributes ---
     custom_attrs = find("u:customAttributes" if ns else "customAttributes")
     if custom_attrs is not None:
-        for attr in custom_attrs.findall("u:customAttribute" if ns else "customAttribute"):
+        for attr in custom_attrs.findall("u:customAttribute" if ns else "customAttribute", ns):
             info[attr.attrib.get("key")] = attr.attrib.get("value")
 
     # --- signals ---
     sinais = []
     for signal in findall("u:signalEntry" if ns else "signalEntry"):
         id_arq = signal.attrib.get("id")
-        canais = [c.attrib.get("name") for c in signal.findall("u:channel" if ns else "channel")]
+        canais = [c.attrib.get("name") for c in signal.findall("u:channel" if ns else "channel", ns)]
         sinais.append(f"{id_arq} ({', '.join(canais)})")
 
     info["sinais"] = "; ".join(sinais)
     info["unisens_path"] = unisens_path
     return info
 
-def gerar_csv_unisens():
+def ler_unisens_segmento(tarefa):
+    unisens_path, paciente, dispositivo, sessao = tarefa
+    info = ler_unisens(unisens_path)
+
+    if info:
+        info["patient"] = paciente
+        info["session"] = dispositivo
+        info["segment"] = sessao
+    return info
+
+def gerar_csv_unisens(workers=None, chunksize=None, incremental=True):
     print("\n📌 Lendo estrutura unisens.xml…")
-    dados = []
+    tarefas = []
 
     for paciente in sorted(p for p in os.listdir(SIG_DIR) if p.startswith("P")):
         pac_dir = os.path.join(SIG_DIR, paciente)
@@ -77,19 +96,25 @@ def gerar_csv_unisens():
 
             for sessao in sorted(os.listdir(disp_dir)):
                 unisens_path = os.path.join(disp_dir, sessao, "unisens.xml")
-                info = ler_unisens(unisens_path)
-
-                if info:
-                    info["patient"] = paciente
-                    info["session"] = dispositivo
-                    info["segment"] = sessao
-                    dados.append(info)
+                tarefas.append((unisens_path, paciente, dispositivo, sessao))
+
+    # só os segmentos novos ou alterados desde a última execução são lidos
+    resultados = executar_incremental(
+        "unisens", ler_unisens_segmento, tarefas,
+        chaves=["/".join(t[1:]) for t in tarefas],
+        fontes=[[t[0]] for t in tarefas],
+        pasta=os.path.join(CSV, SUBDIR_MANIFESTO),
+        workers=workers, chunksize=chunksize, incremental=incremental,
+    )
+    infos, falhas = separar_falhas(resultados, [t[0] for t in tarefas])
+    dados = [info for info in infos if info]
 
     df = pd.DataFrame(dados)
     out_path = os.path.join(CSV, "informacoes_pacientes.csv")
-    df.to_csv(out_path, index=False)
+    salvar_etapa(df, out_path)
     print(f"✅ CSV gerado: {out_path}\n")
     print(df.head(1))
+    relatar_falhas("gerar_csv_unisens", falhas)
 
     return df
 
@@ -97,47 +122,53 @@ def gerar_csv_unisens():
 # 2) LER TODAS AS ANOTAÇÕES DO DATASET
 # ================================================================
 
-def carregar_anotacoes():
+def ler_anotacao(csv_path):
+    parts = csv_path.split(os.sep)
+    patient = parts[-4]
+    session = parts[-3]
+    segment = parts[-2]
+
+    df = pd.read_csv(csv_path)
+    required = {"Start", "End", "Class"}
+
+    if not required.issubset(df.columns):
+        raise ValueError(f"colunas faltando: {sorted(required - set(df.columns))}")
+
+    return pd.DataFrame({
+        "patient": patient,
+        "session": session,
+        "segment": segment,
+        "Start": df["Start"].astype(int),
+        "End": df["End"].astype(int),
+        "Class": df["Class"].astype(int),
+    })
+
+def carregar_anotacoes(workers=None, chunksize=None, incremental=True):
     print("🔍 Procurando annotation.csv…")
-    linhas = []
+    tarefas = []
 
     for dirpath, _, filenames in os.walk(ANN_DIR):
         if "annotation.csv" in filenames:
-            csv_path = os.path.join(dirpath, "annotation.csv")
-
-            parts = csv_path.split(os.sep)
-            patient = parts[-4]
-            session = parts[-3]
-            segment = parts[-2]
-
-            try:
-                df = pd.read_csv(csv_path)
-                required = {"Start", "End", "Class"}
-                
-                if not required.issubset(df.columns):
-                    print(f"⚠ Ignorado (colunas faltando): {csv_path}")
-                    continue
-
-                for _, row in df.iterrows():
-                    linhas.append({
-                        "patient": patient,
-                        "session": session,
-                        "segment": segment,
-                        "Start": int(row["Start"]),
-                        "End": int(row["End"]),
-                        "Class": int(row["Class"]),
-                    })
-
-            except Exception as e:
-                continue
-
-    df_final = pd.DataFrame(linhas)
+            tarefas.append(os.path.join(dirpath, "annotation.csv"))
+
+    resultados = executar_incremental(
+        "anotacoes", ler_anotacao, tarefas,
+        chaves=["/".join(t.split(os.sep)[-4:-1]) for t in tarefas],
+        fontes=[[t] for t in tarefas],
+        pasta=os.path.join(CSV, SUBDIR_MANIFESTO),
+        workers=workers, chunksize=chunksize, incremental=incremental,
+    )
+    partes, falhas = separar_falhas(resultados, tarefas)
+    partes = [p for p in partes if len(p)]
+
+    df_final = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
     print(f"📌 Total de anotações carregadas: {len(df_final)}\n")
 
     out_csv = os.path.join(CSV, "todas_anotacoes.csv")
-    df_final.to_csv(out_csv, index=False)
+    salvar_etapa(df_final, out_csv)
     print(f"📁 CSV salvo: {out_csv}")
     print(df_final.head(1))
+    relatar_falhas("carregar_anotacoes", falhas)
 
     return df_final
 
@@ -145,14 +176,15 @@ def carregar_anotacoes():
 # 3) CARREGAR UM ECG.BIN
 # ================================================================
 
-def carregar_sinal(patient, session, segment):
+def carregar_sinal(patient, session, segment, start=None, end=None):
     ecg_path = os.path.join(SIG_DIR, patient, session, segment, "ecg.bin")
 
     if not os.path.exists(ecg_path):
         print(f"❌ Sinal não encontrado: {ecg_path}")
         return None
     
-    ecg = np.fromfile(ecg_path, dtype=np.int16) * SCALE
+    # memory-map: só as amostras [start:end) são lidas e convertidas para mV
+    ecg = ler_janela(ecg_path, start, end, SCALE)
     return ecg
 
 # ================================================================
@@ -173,14 +205,14 @@ def plotar_amostras(df):
             continue
 
         row = subset.iloc[0]
-        ecg = carregar_sinal(row["patient"], row["session"], row["segment"])
+        ecg = carregar_sinal(row["patient"], row["session"], row["segment"], row["Start"], row["End"])
 
         if ecg is None:
             ax.text(0.1, 0.5, f"{class_name}\n(erro ao carregar)", fontsize=12)
             ax.set_axis_off()
             continue
 
-        segment = detrend(ecg[row["Start"]:row["End"]])
+        segment = detrend(ecg)
         t = np.arange(len(segment)) / FS
 
         ax.plot(t, segment, linewidth=1)
@@ -192,13 +224,19 @@ def plotar_amostras(df):
     plt.tight_layout()
     plt.show()
 
-def juntar_info_paciente_e_arritmia(df_arritmia, df_paciente):
+def juntar_info_paciente_e_arritmia(df_arritmia, df_paciente, indice=None):
 
     # As chaves que identificam um registro único no dataset
     keys = ["patient", "session", "segment"]
 
     # Merge 1→N: um paciente pode ter várias arritmias
-    df_merged = df_arritmia.merge(df_paciente, on=keys, how="left")
+    if indice is not None:
+        # mesmo merge, feito em SQL sobre o índice de metadados
+        con = conectar(indice)
+        df_merged = consultar_anotacoes_com_pacientes(con)
+        con.close()
+    else:
+        df_merged = df_arritmia.merge(df_paciente, on=keys, how="left")
 
     # Remover colunas que nunca são úteis no CSV final
     drop_cols = [
@@ -215,7 +253,7 @@ def juntar_info_paciente_e_arritmia(df_arritmia, df_paciente):
     df_merged = df_merged.dropna(subset=["gender", "age", "weight", "height"], how="any")
 
     out_path = os.path.join(CSV, "pacientes_com_arritmias.csv")
-    df_merged.to_csv(out_path, index=False)
+    salvar_etapa(df_merged, out_path)
 
     print(f"📁 Base final criada: {out_path}")
     print(df_merged.head(3))
@@ -228,11 +266,24 @@ def juntar_info_paciente_e_arritmia(df_arritmia, df_paciente):
 # ================================================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os CSVs auxiliares do CACHET-CADB")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="processos para ler os arquivos do dataset")
+    parser.add_argument("--chunksize", type=int, default=None, help="arquivos por tarefa enviada a cada worker")
+    parser.add_argument("--completo", action="store_true", help="ignora o manifesto e reprocessa todos os segmentos")
+    parser.add_argument("--sem-csv", action="store_true", help="grava só os artefatos colunares (.colunas/), sem os CSVs")
+    args = parser.parse_args()
+    artefato_colunar.EXPORTAR_CSV = not args.sem_csv
+
     print("\n==================== INÍCIO DO PROCESSAMENTO ====================\n")
 
-    df_info_patient = gerar_csv_unisens()
-    df_info_arrhythmia = carregar_anotacoes()
-    df_base_final = juntar_info_paciente_e_arritmia(df_info_arrhythmia, df_info_patient)
+    df_info_patient = gerar_csv_unisens(args.workers, args.chunksize, not args.completo)
+    df_info_arrhythmia = carregar_anotacoes(args.workers, args.chunksize, not args.completo)
+
+    indice = os.path.join(CSV, NOME_INDICE)
+    # como os CSVs: só os unisens.xml novos ou alterados são relidos
+    montar = construir_indice if args.completo else atualizar_indice
+    relatar_falhas("construir_indice", montar(indice, SIG_DIR, df_info_arrhythmia))
+    df_base_final = juntar_info_paciente_e_arritmia(df_info_arrhythmia, df_info_patient, indice)
     plotar_amostras(df_info_arrhythmia)
 
     print("\n==================== PROCESSO CONCLUÍDO ====================\n")
@@ -1,7 +1,16 @@
 import os
+import argparse
+import numpy as np
 import pandas as pd
 import warnings
 
+from cache_context import ler_context, COLUNA_TEMPO
+import artefato_colunar
+from artefato_colunar import salvar_etapa, ler_etapa
+from etl_paralelo import relatar_falhas
+from manifesto_etl import executar_incremental, hash_parametros, SUBDIR_MANIFESTO
+from indice_metadados import conectar, consultar_arritmias, NOME_INDICE
+
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
 
@@ -14,98 +23,139 @@ CSV = r"generated-csv"
 
 FS = 1024  # taxa de amostragem do ECG (para converter Start/End → segundos)
 
+# colunas do context.xlsx levadas ao CSV (None = todas); com o sidecar
+# colunar só estas são lidas do disco
+COLUNAS_CONTEXTO = None
+
 # ================================================================
 # LER O CSV QUE VOCÊ GEROU ANTES
 # ================================================================
 def carregar_pacientes_com_arritmia():
+    # com o índice de metadados (gerado pelo passo 1), a base vem de uma
+    # consulta SQL; sem ele, do CSV
+    indice = os.path.join(CSV, NOME_INDICE)
+    if os.path.exists(indice):
+        con = conectar(indice)
+        df = consultar_arritmias(con)
+        con.close()
+        print(f"📌 Carregado do índice {indice}: {len(df)} linhas")
+        return df
+
     path = os.path.join(CSV, "pacientes_com_arritmias.csv")
-    df = pd.read_csv(path)
+    df = ler_etapa(path, categorias=False)
     print(f"📌 Carregado pacientes_com_arritmias.csv: {len(df)} linhas")
     return df
 
 # ================================================================
 # LER O CONTEXT.XLSX DE CADA SESSÃO
 # ================================================================
-def carregar_context(patient, session, segment):
-    context_path = os.path.join(SIG_DIR, patient, session, segment, "context.xlsx")
-    
-    if not os.path.exists(context_path):
-        print(f"⚠ context.xlsx não encontrado: {context_path}")
-        return None
-    
-    try:
-        df = pd.read_excel(context_path)
-        return df
-    except Exception as e:
-        print(f"❌ Erro ao ler {context_path}: {e}")
-        return None
+def caminho_context(patient, session, segment):
+    return os.path.join(SIG_DIR, patient, session, segment, "context.xlsx")
+
+def ler_context_arquivo(context_path, colunas=COLUNAS_CONTEXTO):
+    if colunas is not None and COLUNA_TEMPO not in colunas:
+        colunas = [COLUNA_TEMPO] + list(colunas)
+
+    # sidecar .npy por coluna (memory-mapped); o xlsx só é lido quando
+    # o sidecar não existe ou está desatualizado
+    return ler_context(context_path, colunas)
 
 # ================================================================
-# FILTRAR OS INTERVALOS CORRESPONDENTES AO START–END DO ECG
+# ATRIBUIR LINHAS DO CONTEXT A VÁRIOS INTERVALOS DE UMA VEZ
 # ================================================================
-def extrair_intervalo_context(df_context, start, end):
-    # converter start/end (amostras) → segundos
-    start_s = start / FS
-    end_s = end / FS
-
-    # a coluna Time rel [s] contém o tempo relativo
-    df_filtered = df_context[
-        (df_context["Time rel [s]"] >= start_s) & 
-        (df_context["Time rel [s]"] < end_s)
-    ]
-    
-    return df_filtered
+def atribuir_intervalos(tempos, starts, ends, linhas=None):
+    # para cada intervalo [start/FS, end/FS), os índices (na ordem original
+    # do context) das linhas cujo "Time rel [s]" cai dentro dele; uma única
+    # ordenação dos tempos + duas buscas binárias vetorizadas.
+    # `linhas` é a linha original da planilha de cada posição (o sidecar
+    # guarda as linhas ordenadas por tempo)
+    ordem = np.argsort(tempos, kind="stable")
+    ordenados = tempos[ordem]
+
+    inicios = np.searchsorted(ordenados, np.asarray(starts) / FS, side="left")
+    fins = np.searchsorted(ordenados, np.asarray(ends) / FS, side="left")
+
+    if linhas is None:
+        return [np.sort(ordem[i:f]) for i, f in zip(inicios, fins)]
+    linhas = np.asarray(linhas)
+    return [ordem[i:f][np.argsort(linhas[ordem[i:f]], kind="stable")] for i, f in zip(inicios, fins)]
 
 # ================================================================
 # PROCESSAR TODAS AS ARRTIMIAS E RESGATAR CONTEXTO
 # ================================================================
-def gerar_contexto_para_arritmias(df_arritmias):
+COLUNAS_ARRITMIA = ["patient", "session", "segment", "Start", "End", "gender", "weight", "age", "height", "Class"]
+
+def extrair_contexto_segmento(tarefa):
+    # unidade de trabalho: um context.xlsx e todas as anotações do segmento
+    context_path, starts, ends, colunas = tarefa
+    if not os.path.exists(context_path):
+        raise FileNotFoundError(f"context.xlsx não encontrado: {context_path}")
+
+    df_context = ler_context_arquivo(context_path, colunas)
+
+    # Extrair os intervalos de todas as anotações do segmento de uma vez
+    tempos = df_context[COLUNA_TEMPO].to_numpy(dtype=float)
+    indices = atribuir_intervalos(tempos, starts, ends, df_context.index.to_numpy())
+
+    tamanhos = np.array([len(i) for i in indices])
+    return df_context.iloc[np.concatenate(indices)], tamanhos
+
+def gerar_contexto_para_arritmias(df_arritmias, workers=None, chunksize=None, incremental=True):
     registros = []
+    posicoes = []
 
-    for _, row in df_arritmias.iterrows():
-        patient = row["patient"]
-        session = row["session"]
-        segment = row["segment"]
-        start = row["Start"]
-        end = row["End"]
-        gende = row["gender"]
-        weight = row["weight"]
-        age = row["age"]
-        height = row["height"]
-        classe = row["Class"]
-
-        print(f"🔍 Processando {patient} | {session} | {segment} | {start}-{end} | Class {classe}")
-
-        # Carregar context.xlsx correspondente
-        df_context = carregar_context(patient, session, segment)
-        if df_context is None:
+    df_arritmias = df_arritmias.reset_index(drop=True)
+    grupos = list(df_arritmias.groupby(["patient", "session", "segment"], sort=False))
+
+    # Um context.xlsx por segmento, lido uma vez (em paralelo se workers > 1)
+    tarefas = [
+        (caminho_context(patient, session, segment), grupo["Start"].to_numpy(), grupo["End"].to_numpy(),
+         COLUNAS_CONTEXTO)
+        for (patient, session, segment), grupo in grupos
+    ]
+    # segmentos cujo context.xlsx e cujas anotações não mudaram são reaproveitados
+    resultados = executar_incremental(
+        "contexto", extrair_contexto_segmento, tarefas,
+        chaves=["/".join(map(str, chave)) for chave, _ in grupos],
+        fontes=[[t[0]] for t in tarefas],
+        pasta=os.path.join(CSV, SUBDIR_MANIFESTO),
+        parametros=[hash_parametros(t[1].tolist(), t[2].tolist(), t[3], FS) for t in tarefas],
+        workers=workers, chunksize=chunksize, incremental=incremental,
+        linhas=lambda resultado: int(resultado[1].sum()),
+    )
+
+    falhas = []
+    for n_grupo, (((patient, session, segment), grupo), tarefa, (ok, valor)) in \
+            enumerate(zip(grupos, tarefas, resultados), start=1):
+        if not ok:
+            falhas.append((tarefa[0], valor))
             continue
 
-        # Extrair apenas o intervalo correto
-        df_intervalo = extrair_intervalo_context(df_context, start, end)
-        if df_intervalo.empty:
+        df_intervalo, tamanhos = valor
+        total = int(tamanhos.sum())
+        print(f"🔍 [{n_grupo}/{len(grupos)}] {patient} | {session} | {segment}: "
+              f"{len(grupo)} anotações → {total} linhas de contexto")
+        if total == 0:
             continue
 
         # Colocar colunas extras (paciente, classe etc.)
         df_intervalo = df_intervalo.copy()
-        df_intervalo["patient"] = patient
-        df_intervalo["session"] = session
-        df_intervalo["segment"] = segment
-        df_intervalo["Start"] = start
-        df_intervalo["End"] = end
-        df_intervalo["gender"] = gende
-        df_intervalo["weight"] = weight 
-        df_intervalo["age"] = age
-        df_intervalo["height"] = height
-        df_intervalo["Class"] = classe
+        for coluna in COLUNAS_ARRITMIA:
+            df_intervalo[coluna] = np.repeat(grupo[coluna].to_numpy(), tamanhos)
 
         registros.append(df_intervalo)
+        posicoes.append(np.repeat(grupo.index.to_numpy(), tamanhos))
+
+    relatar_falhas("gerar_contexto_para_arritmias", falhas)
 
-    # Concatenar tudo
+    # Concatenar tudo, na ordem original das anotações
     if registros:
         df_final = pd.concat(registros, ignore_index=True)
+        ordem = np.argsort(np.concatenate(posicoes), kind="stable")
+        df_final = df_final.iloc[ordem].reset_index(drop=True)
+
         out_path = os.path.join(CSV, "contexto_das_arritmias.csv")
-        df_final.to_csv(out_path, index=False)
+        salvar_etapa(df_final, out_path)
         print(f"\n✅ CSV salvo: {out_path}")
         print(df_final.head())
         return df_final
@@ -117,5 +167,13 @@ def gerar_contexto_para_arritmias(df_arritmias):
 # EXECUÇÃO PRINCIPAL
 # ================================================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o CSV de contexto das arritmias")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="processos para ler os context.xlsx")
+    parser.add_argument("--chunksize", type=int, default=None, help="segmentos por tarefa enviada a cada worker")
+    parser.add_argument("--completo", action="store_true", help="ignora o manifesto e reprocessa todos os segmentos")
+    parser.add_argument("--sem-csv", action="store_true", help="grava só os artefatos colunares (.colunas/), sem os CSVs")
+    args = parser.parse_args()
+    artefato_colunar.EXPORTAR_CSV = not args.sem_csv
+
     df_arr = carregar_pacientes_com_arritmia()
-    gerar_contexto_para_arritmias(df_arr)
+    gerar_contexto_para_arritmias(df_arr, args.workers, args.chunksize, not args.completo)
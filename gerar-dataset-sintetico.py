@@ -0,0 +1,327 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import importlib.util
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+
+# ================================================================
+# CONFIGURAÇÕES DO DATASET SINTÉTICO
+# ================================================================
+# Réplica estrutural do CACHET-CADB para rodar e medir os scripts de ETL
+# sem o download real:
+#   signal/P*/<dispositivo>/<segmento>/unisens.xml + ecg.bin
+#   annotations/P*/<dispositivo>/<segmento>/annotation.csv + context.xlsx
+
+DESTINO = r"CACHET-CADB-sintetico"
+NS_UNISENS = "http://www.unisens.org/unisens2.0"
+
+FS = 1024                  # taxa de amostragem do ECG
+DURACAO_EPISODIO = 10240   # 10 s por anotação, como no dataset real
+PASSO_CONTEXTO = 10        # uma linha do context.xlsx a cada 10 s
+AMOSTRAS_POR_BLOCO = 1 << 20
+
+# frequências observadas em todas_anotacoes.csv / contexto_das_arritmias.csv
+CLASSES = {1: 747, 2: 615, 3: 221, 4: 19}
+ACTIVITY = {1: 902, 2: 570, 7: 37, 0: 27, 3: 11}
+BODYPOS = {1: 618, 5: 616, 4: 179, 2: 80, 0: 28, 3: 27}
+SLEEPWAKE = {0: 866, 1: 652, 2: 30}
+MET = {1.0: 916, 1.25: 546, 2.0: 6, 1.05: 4, 1.1: 4, 1.15: 3}
+
+SINAIS = [
+    ("ecg.bin", ["ECG I"]),
+    ("acc.bin", ["accX", "accY", "accZ"]),
+    ("angularrate.bin", ["angularRateX", "angularRateY", "angularRateZ"]),
+    ("press.bin", ["press"]),
+    ("movementacceleration_live.bin", ["movementAcceleration"]),
+    ("hr_live.bin", ["hr"]),
+    ("hrvrmssd_live.bin", ["hrvRmssd"]),
+]
+
+COLUNAS_CONTEXTO = [
+    "Time rel [s]", "Day rel [d]", "Time rel [hh:mm:ss]", "Date abs [yyyy-mm-dd]",
+    "Time abs [hh:mm:ss]", "ActivityClass []", "ActivityEnergyExpenditure [kcal/d]",
+    "Altitude [m]", "BaevskyStressIndex []", "BodyPosition []", "Edr [1/min]",
+    "Hr [1/min]", "HrvHf [ms^2]", "HrvLf [ms^2]", "HrvLfHf []", "HrvPnn50 [%]",
+    "HrvRmssd [ms]", "HrvSd1 [ms]", "HrvSd2 [ms]", "HrvSd2Sd1 [ms]", "HrvSdnn [ms]",
+    "HrvSdsd [ms]", "InclinationDown [deg]", "InclinationForward [deg]",
+    "InclinationRight [deg]", "MET []", "MovementAcceleration [g]", "NonWearSleepWake []",
+    "NonWearTime []", "StepCount [steps]", "TotalEnergyExpenditure [kcal/d]",
+    "VerticalSpeed [m/s]",
+]
+
+
+def sortear(rng, frequencias, n):
+    valores = list(frequencias)
+    pesos = np.array([frequencias[v] for v in valores], dtype=float)
+    return np.array(valores)[rng.choice(len(valores), size=n, p=pesos / pesos.sum())]
+
+
+# ================================================================
+# 1) UNISENS.XML
+# ================================================================
+def escrever_unisens(caminho, paciente, duracao_s, com_namespace=False):
+    # no dataset real a maioria dos arquivos não declara namespace; os poucos
+    # que declaram são os que saem sem canais/atributos em informacoes_pacientes.csv
+    if com_namespace:
+        ET.register_namespace("", NS_UNISENS)
+        q = lambda tag: f"{{{NS_UNISENS}}}{tag}"
+    else:
+        q = lambda tag: tag
+
+    root = ET.Element(q("unisens"), {
+        "duration": f"{duracao_s:.3f}",
+        "measurementId": os.path.basename(os.path.dirname(caminho)),
+        "timestampStart": "2019-11-23T00:00:00.000",
+        "version": "2.0",
+    })
+
+    custom = ET.SubElement(root, q("customAttributes"))
+    for chave, valor in [
+        ("sensorLocation", "chest"),
+        ("gender", paciente["gender"]),
+        ("sensorVersion", "1.12.8"),
+        ("sensorType", "EcgMove4"),
+        ("weight", f"{paciente['weight']:.1f}"),
+        ("age", f"{paciente['age']:.1f}"),
+        ("height", f"{paciente['height']:.1f}"),
+        ("personId", paciente["personId"]),
+    ]:
+        ET.SubElement(custom, q("customAttribute"), {"key": chave, "value": valor})
+
+    for arquivo, canais in SINAIS:
+        entrada = ET.SubElement(root, q("signalEntry"), {
+            "id": arquivo,
+            "dataType": "int16",
+            "sampleRate": str(FS if arquivo == "ecg.bin" else 64),
+            "lsbValue": "1",
+            "unit": "uV" if arquivo == "ecg.bin" else "",
+        })
+        for canal in canais:
+            ET.SubElement(entrada, q("channel"), {"name": canal})
+
+    ET.ElementTree(root).write(caminho, encoding="utf-8", xml_declaration=True)
+
+
+# ================================================================
+# 2) ECG.BIN (int16 @ 1024 Hz, ESCRITO EM BLOCOS)
+# ================================================================
+def escrever_ecg(caminho, n_amostras, rng):
+    # batimento gaussiano sobre oscilação de linha de base + ruído; memória
+    # limitada a um bloco, qualquer que seja a duração
+    t_batida = np.arange(-FS // 8, FS // 8) / FS
+    template = 1200 * np.exp(-(t_batida / 0.012) ** 2) - 150 * np.exp(-((t_batida - 0.04) / 0.02) ** 2)
+
+    rr_medio = FS * 60 / rng.uniform(55, 110)
+    batidas = np.cumsum(rng.normal(rr_medio, rr_medio * 0.08, size=int(n_amostras / rr_medio * 1.2) + 2))
+    batidas = batidas[batidas < n_amostras].astype(np.int64)
+
+    with open(caminho, "wb") as f:
+        for inicio in range(0, n_amostras, AMOSTRAS_POR_BLOCO):
+            fim = min(inicio + AMOSTRAS_POR_BLOCO, n_amostras)
+            t = np.arange(inicio, fim) / FS
+            bloco = 200 * np.sin(2 * np.pi * 0.3 * t) + rng.normal(0, 25, size=fim - inicio)
+
+            for b in batidas[(batidas >= inicio - FS // 8) & (batidas < fim + FS // 8)]:
+                a = max(b - FS // 8, inicio)
+                z = min(b + FS // 8, fim)
+                bloco[a - inicio:z - inicio] += template[a - (b - FS // 8):z - (b - FS // 8)]
+
+            np.clip(bloco, -32768, 32767).astype(np.int16).tofile(f)
+
+
+# ================================================================
+# 3) ANNOTATION.CSV E CONTEXT.XLSX
+# ================================================================
+def escrever_anotacoes(caminho, n_amostras, n_episodios, rng):
+    # episódios de 10 s sem sobreposição
+    vagas = n_amostras // DURACAO_EPISODIO
+    n_episodios = min(n_episodios, vagas)
+    posicoes = np.sort(rng.choice(vagas, size=n_episodios, replace=False)) * DURACAO_EPISODIO
+    inicios = posicoes + rng.integers(0, DURACAO_EPISODIO // 2, size=n_episodios)
+    inicios = np.minimum(inicios, n_amostras - DURACAO_EPISODIO)
+
+    pd.DataFrame({
+        "Start": inicios,
+        "End": inicios + DURACAO_EPISODIO,
+        "Class": sortear(rng, CLASSES, n_episodios),
+    }).to_csv(caminho, index=False)
+    return n_episodios
+
+
+def escrever_context(caminho, duracao_s, rng):
+    tempos = np.arange(0, int(duracao_s), PASSO_CONTEXTO)
+    n = len(tempos)
+    relogio = pd.to_datetime(tempos, unit="s")
+    absoluto = pd.Timestamp("2019-11-23") + pd.to_timedelta(tempos, unit="s")
+
+    hrv = lambda media: np.where(rng.random(n) < 0.6, np.nan, rng.gamma(2.0, media / 2.0, size=n))
+
+    df = pd.DataFrame({
+        "Time rel [s]": tempos,
+        "Day rel [d]": tempos // 86400,
+        "Time rel [hh:mm:ss]": relogio.strftime("%Y-%m-%d %H:%M:%S"),
+        "Date abs [yyyy-mm-dd]": absoluto.strftime("%Y-%m-%d %H:%M:%S.000"),
+        "Time abs [hh:mm:ss]": absoluto.strftime("%Y-%m-%d %H:%M:%S.000"),
+        "ActivityClass []": sortear(rng, ACTIVITY, n).astype(float),
+        "ActivityEnergyExpenditure [kcal/d]": rng.gamma(2.0, 270.0, size=n),
+        "Altitude [m]": rng.normal(80, 30, size=n),
+        "BaevskyStressIndex []": hrv(418),
+        "BodyPosition []": sortear(rng, BODYPOS, n).astype(float),
+        "Edr [1/min]": hrv(17.7),
+        "Hr [1/min]": rng.normal(91, 20, size=n).clip(35, 220),
+        "HrvHf [ms^2]": hrv(1315),
+        "HrvLf [ms^2]": hrv(1050),
+        "HrvLfHf []": hrv(4.3),
+        "HrvPnn50 [%]": hrv(10.5),
+        "HrvRmssd [ms]": hrv(40),
+        "HrvSd1 [ms]": hrv(28),
+        "HrvSd2 [ms]": hrv(41),
+        "HrvSd2Sd1 [ms]": hrv(2.2),
+        "HrvSdnn [ms]": hrv(36),
+        "HrvSdsd [ms]": hrv(40),
+        "InclinationDown [deg]": rng.uniform(18, 180, size=n),
+        "InclinationForward [deg]": rng.uniform(0, 175, size=n),
+        "InclinationRight [deg]": rng.uniform(10, 179, size=n),
+        "MET []": sortear(rng, MET, n).astype(float),
+        "MovementAcceleration [g]": rng.gamma(0.8, 0.035, size=n).clip(0.001, 0.57),
+        "NonWearSleepWake []": sortear(rng, SLEEPWAKE, n).astype(float),
+        "NonWearTime []": (rng.random(n) < 0.02).astype(float),
+        "StepCount [steps]": rng.poisson(0.3, size=n),
+        "TotalEnergyExpenditure [kcal/d]": rng.normal(2180, 200, size=n),
+        "VerticalSpeed [m/s]": rng.normal(0, 0.05, size=n),
+    })[COLUNAS_CONTEXTO]
+    df.to_excel(caminho, index=False)
+
+
+# ================================================================
+# GERAÇÃO DA ÁRVORE COMPLETA
+# ================================================================
+def gerar_dataset(destino=DESTINO, pacientes=24, dispositivos=1, segmentos=3, duracao_min=30.0,
+                  episodios=12, fracao_anotada=0.5, fracao_namespace=0.04, seed=0):
+    rng = np.random.default_rng(seed)
+    sig_dir = os.path.join(destino, "signal")
+    ann_dir = os.path.join(destino, "annotations")
+    n_amostras = int(duracao_min * 60 * FS)
+    duracao_s = n_amostras / FS
+
+    total_episodios = 0
+    total_segmentos = 0
+    for p in range(1, pacientes + 1):
+        paciente = {
+            "gender": "M" if rng.random() < 0.66 else "F",
+            "weight": float(np.round(rng.uniform(52, 110))),
+            "age": float(np.round(rng.uniform(31, 79))),
+            "height": float(np.round(rng.uniform(155, 185))),
+        }
+
+        for d in range(1, dispositivos + 1):
+            dispositivo = f"p{p:03d}d{d}@cachet.dk{d}"
+            paciente["personId"] = dispositivo
+
+            for s in range(segmentos):
+                segmento = f"{s}-last" if s == segmentos - 1 else str(s)
+                pasta_sinal = os.path.join(sig_dir, f"P{p}", dispositivo, segmento)
+                pasta_anot = os.path.join(ann_dir, f"P{p}", dispositivo, segmento)
+                os.makedirs(pasta_sinal, exist_ok=True)
+                os.makedirs(pasta_anot, exist_ok=True)
+
+                escrever_unisens(os.path.join(pasta_sinal, "unisens.xml"), paciente, duracao_s,
+                                 com_namespace=rng.random() < fracao_namespace)
+                escrever_ecg(os.path.join(pasta_sinal, "ecg.bin"), n_amostras, rng)
+                escrever_context(os.path.join(pasta_anot, "context.xlsx"), duracao_s, rng)
+
+                if rng.random() < fracao_anotada:
+                    n = max(1, int(rng.poisson(episodios)))
+                    total_episodios += escrever_anotacoes(os.path.join(pasta_anot, "annotation.csv"),
+                                                          n_amostras, n, rng)
+                total_segmentos += 1
+
+    print(f"✅ Dataset sintético em {destino}: {pacientes} pacientes, {total_segmentos} segmentos, "
+          f"{total_episodios} anotações, {duracao_min:g} min de ECG por segmento")
+    return destino
+
+
+# ================================================================
+# MEDIR OS SCRIPTS DE ETL SOBRE A ÁRVORE SINTÉTICA
+# ================================================================
+def carregar_script(nome_arquivo):
+    spec = importlib.util.spec_from_file_location(nome_arquivo.replace("-", "_")[:-3], nome_arquivo)
+    modulo = importlib.util.module_from_spec(spec)
+    # registrado em sys.modules para que as funções do script possam ser
+    # enviadas por pickle aos workers do ETL paralelo
+    sys.modules[spec.name] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def medir_etl(destino, workers=1):
+    import matplotlib
+    matplotlib.use("Agg")
+
+    saida = tempfile.mkdtemp(prefix="csv-sintetico-")
+    auxiliares = carregar_script("gerar-csv-auxiliares.py")
+    contexto = carregar_script("gerar-csv-contexto-arritmias.py")
+
+    # os scripts leem os caminhos de constantes do módulo
+    auxiliares.BASE = contexto.BASE = destino
+    auxiliares.ANN_DIR = os.path.join(destino, "annotations")
+    auxiliares.SIG_DIR = os.path.join(destino, "signal")
+    contexto.SIG_DIR = os.path.join(destino, "annotations")
+    auxiliares.CSV = contexto.CSV = saida
+
+    tempos = {}
+    t = time.perf_counter()
+    df_info = auxiliares.gerar_csv_unisens(workers)
+    tempos["gerar_csv_unisens"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    df_anot = auxiliares.carregar_anotacoes(workers)
+    tempos["carregar_anotacoes"] = time.perf_counter() - t
+
+    auxiliares.juntar_info_paciente_e_arritmia(df_anot, df_info)
+
+    t = time.perf_counter()
+    contexto.gerar_contexto_para_arritmias(contexto.carregar_pacientes_com_arritmia(), workers)
+    tempos["gerar_contexto_para_arritmias"] = time.perf_counter() - t
+
+    print("\n⏱ Tempos do ETL:")
+    for etapa, segundos in tempos.items():
+        print(f"   {etapa}: {segundos:.2f}s")
+    print(f"📁 CSVs gerados em: {saida}")
+    return tempos
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera uma réplica sintética do CACHET-CADB")
+    parser.add_argument("-d", "--destino", default=DESTINO)
+    parser.add_argument("-p", "--pacientes", type=int, default=24)
+    parser.add_argument("--dispositivos", type=int, default=1, help="dispositivos (sessões) por paciente")
+    parser.add_argument("--segmentos", type=int, default=3, help="segmentos por dispositivo")
+    parser.add_argument("--duracao-min", type=float, default=30.0, help="minutos de ECG por segmento")
+    parser.add_argument("--episodios", type=int, default=12, help="média de anotações por segmento anotado")
+    parser.add_argument("--fracao-anotada", type=float, default=0.5)
+    parser.add_argument("--fracao-namespace", type=float, default=0.04, help="unisens.xml com namespace declarado")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limpar", action="store_true", help="apaga o destino antes de gerar")
+    parser.add_argument("--medir", action="store_true", help="roda e cronometra os scripts de ETL no resultado")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="processos do ETL medido com --medir")
+    args = parser.parse_args()
+
+    if args.limpar and os.path.isdir(args.destino):
+        shutil.rmtree(args.destino)
+
+    gerar_dataset(args.destino, args.pacientes, args.dispositivos, args.segmentos, args.duracao_min,
+                  args.episodios, args.fracao_anotada, args.fracao_namespace, seed=args.seed)
+
+    if args.medir:
+        medir_etl(args.destino, args.workers)
@@ -0,0 +1,416 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+NOME_INDICE = "metadados.sqlite"
+CAMINHO_INDICE = os.path.join("generated-csv", NOME_INDICE)
+SIG_DIR = os.path.join("CACHET-CADB", "signal")
+
+COLUNAS_PACIENTE = ["gender", "weight", "age", "height"]
+
+# gravada em PRAGMA user_version: índice de outra versão é reconstruído
+VERSAO_ESQUEMA = 1
+
+ESQUEMA = """
+CREATE TABLE pacientes (
+    patient TEXT PRIMARY KEY,
+    gender  TEXT,
+    age     REAL,
+    weight  REAL,
+    height  REAL
+);
+CREATE TABLE segmentos (
+    id           INTEGER PRIMARY KEY,
+    ordem        INTEGER NOT NULL,
+    patient      TEXT NOT NULL,
+    session      TEXT NOT NULL,
+    segment      TEXT NOT NULL,
+    unisens_path TEXT,
+    tamanho      INTEGER,
+    mtime_ns     INTEGER,
+    UNIQUE (patient, session, segment)
+);
+CREATE TABLE atributos (
+    segmento_id INTEGER NOT NULL REFERENCES segmentos(id),
+    ordem       INTEGER NOT NULL,
+    chave       TEXT NOT NULL,
+    valor       TEXT,
+    PRIMARY KEY (segmento_id, chave)
+);
+CREATE TABLE sinais (
+    id          INTEGER PRIMARY KEY,
+    segmento_id INTEGER NOT NULL REFERENCES segmentos(id),
+    ordem       INTEGER NOT NULL,
+    arquivo     TEXT
+);
+CREATE TABLE canais (
+    sinal_id INTEGER NOT NULL REFERENCES sinais(id),
+    ordem    INTEGER NOT NULL,
+    nome     TEXT
+);
+CREATE TABLE anotacoes (
+    ordem   INTEGER PRIMARY KEY,
+    patient TEXT NOT NULL,
+    session TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    Start   INTEGER,
+    End     INTEGER,
+    Class   INTEGER
+);
+"""
+
+# criados depois da carga (inserir com os índices já prontos é mais lento)
+INDICES = """
+CREATE INDEX idx_segmentos_patient ON segmentos (patient);
+CREATE INDEX idx_atributos_chave ON atributos (chave, valor);
+CREATE INDEX idx_sinais_segmento ON sinais (segmento_id);
+CREATE INDEX idx_sinais_arquivo ON sinais (arquivo, segmento_id);
+CREATE INDEX idx_canais_sinal ON canais (sinal_id);
+CREATE INDEX idx_anotacoes_chave ON anotacoes (patient, session, segment);
+CREATE INDEX idx_anotacoes_class ON anotacoes (Class, patient);
+CREATE INDEX idx_pacientes_perfil ON pacientes (gender, age);
+"""
+
+
+# ================================================================
+# PARSE STREAMING DO UNISENS.XML
+# ================================================================
+def _sem_namespace(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def ler_unisens_streaming(unisens_path):
+    # → ([(chave, valor)], [(arquivo, [canais])]); iterparse com os
+    # elementos descartados assim que lidos, com ou sem namespace
+    atributos = []
+    sinais = []
+    pilha = []
+
+    for evento, elem in ET.iterparse(unisens_path, events=("start", "end")):
+        if evento == "start":
+            pilha.append(_sem_namespace(elem.tag))
+            caminho = pilha[1:]
+            if caminho == ["customAttributes", "customAttribute"]:
+                atributos.append((elem.attrib.get("key"), elem.attrib.get("value")))
+            elif caminho == ["signalEntry"]:
+                sinais.append((elem.attrib.get("id"), []))
+            elif caminho == ["signalEntry", "channel"]:
+                sinais[-1][1].append(elem.attrib.get("name"))
+            continue
+
+        pilha.pop()
+        if len(pilha) <= 1:
+            elem.clear()
+
+    return atributos, sinais
+
+
+# ================================================================
+# CONSTRUÇÃO DO ÍNDICE
+# ================================================================
+def _segmentos_dataset(sig_dir):
+    # → [(patient, session, segment, unisens_path)], mesma travessia (e
+    # ordem) de gerar_csv_unisens
+    segmentos = []
+    for paciente in sorted(p for p in os.listdir(sig_dir) if p.startswith("P")):
+        pac_dir = os.path.join(sig_dir, paciente)
+        for dispositivo in sorted(os.listdir(pac_dir)):
+            disp_dir = os.path.join(pac_dir, dispositivo)
+            for sessao in sorted(os.listdir(disp_dir)):
+                unisens_path = os.path.join(disp_dir, sessao, "unisens.xml")
+                if os.path.exists(unisens_path):
+                    segmentos.append((paciente, dispositivo, sessao, unisens_path))
+    return segmentos
+
+
+def _inserir_segmento(con, ordem_segmento, paciente, dispositivo, sessao, unisens_path, atributos, sinais):
+    st = os.stat(unisens_path)
+    segmento_id = con.execute(
+        "INSERT INTO segmentos (ordem, patient, session, segment, unisens_path, tamanho, mtime_ns) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (ordem_segmento, paciente, dispositivo, sessao, unisens_path, st.st_size, st.st_mtime_ns)
+    ).lastrowid
+
+    # chave repetida: vale o último valor, na posição da primeira (como num dict)
+    con.executemany(
+        "INSERT INTO atributos (segmento_id, ordem, chave, valor) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (segmento_id, chave) DO UPDATE SET valor = excluded.valor",
+        [(segmento_id, ordem, chave, valor) for ordem, (chave, valor) in enumerate(atributos)]
+    )
+    for ordem, (arquivo, canais) in enumerate(sinais):
+        sinal_id = con.execute(
+            "INSERT INTO sinais (segmento_id, ordem, arquivo) VALUES (?, ?, ?)",
+            (segmento_id, ordem, arquivo)
+        ).lastrowid
+        con.executemany(
+            "INSERT INTO canais (sinal_id, ordem, nome) VALUES (?, ?, ?)",
+            [(sinal_id, j, nome) for j, nome in enumerate(canais)]
+        )
+
+
+def _remover_segmento(con, segmento_id):
+    con.execute("DELETE FROM canais WHERE sinal_id IN (SELECT id FROM sinais WHERE segmento_id = ?)",
+                (segmento_id,))
+    con.execute("DELETE FROM sinais WHERE segmento_id = ?", (segmento_id,))
+    con.execute("DELETE FROM atributos WHERE segmento_id = ?", (segmento_id,))
+    con.execute("DELETE FROM segmentos WHERE id = ?", (segmento_id,))
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _preencher_pacientes(con):
+    # um registro por paciente, com os atributos do primeiro segmento que
+    # os declara; gênero normalizado para M/F
+    perfis = {}
+    linhas = con.execute(
+        "SELECT s.patient, a.chave, a.valor FROM atributos a JOIN segmentos s ON s.id = a.segmento_id "
+        "WHERE a.chave IN (?, ?, ?, ?) ORDER BY s.ordem", COLUNAS_PACIENTE
+    )
+    for paciente, chave, valor in linhas:
+        perfil = perfis.setdefault(paciente, {})
+        if valor is not None and chave not in perfil:
+            perfil[chave] = valor
+
+    con.executemany(
+        "INSERT INTO pacientes (patient, gender, age, weight, height) VALUES (?, ?, ?, ?, ?)",
+        [(paciente,
+          p["gender"].strip().upper() if p.get("gender") else None,
+          _numero(p.get("age")), _numero(p.get("weight")), _numero(p.get("height")))
+         for paciente, p in perfis.items()]
+    )
+
+
+def _preencher_anotacoes(con, df_anotacoes):
+    if len(df_anotacoes):
+        con.executemany(
+            "INSERT INTO anotacoes (ordem, patient, session, segment, Start, End, Class) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(range(len(df_anotacoes)),
+                df_anotacoes["patient"].astype(str), df_anotacoes["session"].astype(str),
+                df_anotacoes["segment"].astype(str),
+                df_anotacoes["Start"].astype(int).tolist(), df_anotacoes["End"].astype(int).tolist(),
+                df_anotacoes["Class"].astype(int).tolist())
+        )
+
+
+def construir_indice(caminho_db, sig_dir, df_anotacoes):
+    # reconstrói o índice inteiro num arquivo temporário e troca no final
+    temporario = caminho_db + ".tmp"
+    if os.path.exists(temporario):
+        os.remove(temporario)
+    os.makedirs(os.path.dirname(caminho_db) or ".", exist_ok=True)
+
+    con = sqlite3.connect(temporario)
+    con.executescript(ESQUEMA)
+    falhas = []
+
+    for ordem, (paciente, dispositivo, sessao, unisens_path) in enumerate(_segmentos_dataset(sig_dir)):
+        try:
+            atributos, sinais = ler_unisens_streaming(unisens_path)
+        except ET.ParseError as e:
+            falhas.append((unisens_path, f"ParseError: {e}"))
+            continue
+        _inserir_segmento(con, ordem, paciente, dispositivo, sessao, unisens_path, atributos, sinais)
+
+    _preencher_pacientes(con)
+    _preencher_anotacoes(con, df_anotacoes)
+
+    con.executescript(INDICES)
+    con.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+    con.execute("ANALYZE")
+    con.commit()
+    con.close()
+    os.replace(temporario, caminho_db)
+
+    print(f"🗂 Índice de metadados salvo: {caminho_db}")
+    return falhas
+
+
+def _versao_indice(caminho_db):
+    if not os.path.exists(caminho_db):
+        return None
+    try:
+        con = sqlite3.connect(caminho_db)
+        try:
+            return con.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            con.close()
+    except sqlite3.DatabaseError:
+        return None
+
+
+def atualizar_indice(caminho_db, sig_dir, df_anotacoes):
+    # só os unisens.xml novos ou com tamanho/mtime diferentes são relidos;
+    # segmentos que sumiram saem do índice. Pacientes e anotações (sem XML)
+    # são refeitos. Índice ausente ou de outra versão: construir_indice
+    if _versao_indice(caminho_db) != VERSAO_ESQUEMA:
+        return construir_indice(caminho_db, sig_dir, df_anotacoes)
+
+    con = sqlite3.connect(caminho_db)
+    registrados = {(p, d, s): (i, tamanho, mtime) for i, p, d, s, tamanho, mtime in con.execute(
+        "SELECT id, patient, session, segment, tamanho, mtime_ns FROM segmentos")}
+    falhas = []
+    relidos = reaproveitados = 0
+
+    with con:
+        atuais = set()
+        for ordem, (paciente, dispositivo, sessao, unisens_path) in enumerate(_segmentos_dataset(sig_dir)):
+            chave = (paciente, dispositivo, sessao)
+            atuais.add(chave)
+            registrado = registrados.get(chave)
+            st = os.stat(unisens_path)
+            if registrado is not None and registrado[1:] == (st.st_size, st.st_mtime_ns):
+                con.execute("UPDATE segmentos SET ordem = ?, unisens_path = ? WHERE id = ?",
+                            (ordem, unisens_path, registrado[0]))
+                reaproveitados += 1
+                continue
+
+            if registrado is not None:
+                _remover_segmento(con, registrado[0])
+            relidos += 1
+            try:
+                atributos, sinais = ler_unisens_streaming(unisens_path)
+            except ET.ParseError as e:
+                falhas.append((unisens_path, f"ParseError: {e}"))
+                continue
+            _inserir_segmento(con, ordem, paciente, dispositivo, sessao, unisens_path, atributos, sinais)
+
+        removidos = [registrado[0] for chave, registrado in registrados.items() if chave not in atuais]
+        for segmento_id in removidos:
+            _remover_segmento(con, segmento_id)
+
+        con.execute("DELETE FROM pacientes")
+        _preencher_pacientes(con)
+        con.execute("DELETE FROM anotacoes")
+        _preencher_anotacoes(con, df_anotacoes)
+        if relidos or removidos:
+            con.execute("ANALYZE")
+    con.close()
+
+    print(f"🗂 Índice de metadados: {reaproveitados} segmento(s) reaproveitado(s), {relidos} relido(s), "
+          f"{len(removidos)} removido(s): {caminho_db}")
+    return falhas
+
+
+# ================================================================
+# CONSULTAS
+# ================================================================
+def conectar(caminho_db=CAMINHO_INDICE):
+    return sqlite3.connect(f"file:{caminho_db}?mode=ro", uri=True)
+
+
+def _coluna_atributo(chave):
+    nome = chave.replace('"', '""')
+    return (f'(SELECT valor FROM atributos t WHERE t.segmento_id = s.id AND t.chave = ?) AS "{nome}"')
+
+
+def chaves_atributos(con):
+    # ordem de primeira aparição, igual às colunas de informacoes_pacientes.csv
+    vistas = {}
+    for (chave,) in con.execute("SELECT a.chave FROM atributos a JOIN segmentos s ON s.id = a.segmento_id "
+                                "ORDER BY s.ordem, a.ordem"):
+        vistas.setdefault(chave, None)
+    return list(vistas)
+
+
+def consultar_anotacoes_com_pacientes(con):
+    # equivalente ao merge left de todas_anotacoes × informacoes_pacientes
+    chaves = chaves_atributos(con)
+    colunas = "".join(f", {_coluna_atributo(c)}" for c in chaves)
+    sql = (
+        "SELECT a.patient, a.session, a.segment, a.Start, a.End, a.Class"
+        f"{colunas}, s.unisens_path "
+        "FROM anotacoes a LEFT JOIN segmentos s "
+        "ON s.patient = a.patient AND s.session = a.session AND s.segment = a.segment "
+        "ORDER BY a.ordem"
+    )
+    return pd.read_sql_query(sql, con, params=chaves)
+
+
+def consultar_arritmias(con, colunas_paciente=COLUNAS_PACIENTE):
+    # o que o passo de contexto precisa: anotações de segmentos com todos os
+    # dados do paciente preenchidos (mesmo filtro de pacientes_com_arritmias)
+    colunas = "".join(f", {_coluna_atributo(c)}" for c in colunas_paciente)
+    sql = (
+        f"SELECT * FROM (SELECT a.patient, a.session, a.segment, a.Start, a.End, a.Class{colunas} "
+        "FROM anotacoes a JOIN segmentos s "
+        "ON s.patient = a.patient AND s.session = a.session AND s.segment = a.segment "
+        "ORDER BY a.ordem) WHERE " + " AND ".join(f'"{c}" IS NOT NULL' for c in colunas_paciente)
+    )
+    df = pd.read_sql_query(sql, con, params=list(colunas_paciente))
+
+    # mesmos tipos que o read_csv de pacientes_com_arritmias.csv inferiria
+    for coluna in colunas_paciente:
+        try:
+            df[coluna] = pd.to_numeric(df[coluna])
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def consultar_episodios(con, classe, gender=None, idade_min=None, arquivo_sinal=None):
+    # ex.: episódios de AF de homens com mais de 60 anos que têm acc.bin
+    condicoes = ["a.Class = ?"]
+    parametros = [classe]
+    if gender is not None:
+        condicoes.append("p.gender = ?")
+        parametros.append(gender.strip().upper())
+    if idade_min is not None:
+        condicoes.append("p.age > ?")
+        parametros.append(idade_min)
+    if arquivo_sinal is not None:
+        condicoes.append("EXISTS (SELECT 1 FROM sinais e WHERE e.arquivo = ? AND e.segmento_id = s.id)")
+        parametros.append(arquivo_sinal)
+
+    sql = (
+        "SELECT a.patient, a.session, a.segment, a.Start, a.End, a.Class, p.gender, p.age "
+        "FROM pacientes p "
+        "JOIN segmentos s ON s.patient = p.patient "
+        "JOIN anotacoes a ON a.patient = s.patient AND a.session = s.session AND a.segment = s.segment "
+        "WHERE " + " AND ".join(condicoes) + " ORDER BY a.ordem"
+    )
+    return pd.read_sql_query(sql, con, params=parametros)
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o índice SQLite de metadados do CACHET-CADB")
+    parser.add_argument("-i", "--indice", default=CAMINHO_INDICE)
+    parser.add_argument("--construir", action="store_true",
+                        help="reconstrói o índice a partir do dataset e de todas_anotacoes.csv")
+    parser.add_argument("-s", "--sinais", default=SIG_DIR)
+    parser.add_argument("--classe", type=int, default=1)
+    parser.add_argument("--gender", default="M")
+    parser.add_argument("--idade-min", type=float, default=60)
+    parser.add_argument("--arquivo-sinal", default="acc.bin")
+    args = parser.parse_args()
+
+    if args.construir:
+        anotacoes = pd.read_csv(os.path.join(os.path.dirname(args.indice), "todas_anotacoes.csv"), dtype={"segment": str})
+        for caminho, erro in construir_indice(args.indice, args.sinais, anotacoes):
+            print(f"   ❌ {caminho}: {erro}")
+
+    if not os.path.exists(args.indice):
+        sys.exit(f"❌ Índice não encontrado: {args.indice}")
+
+    con = conectar(args.indice)
+    inicio = time.perf_counter()
+    episodios = consultar_episodios(con, args.classe, args.gender, args.idade_min, args.arquivo_sinal)
+    print(f"🔍 {len(episodios)} episódios em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    print(episodios.head())
+    con.close()
@@ -0,0 +1,132 @@
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+SIG_DIR = os.path.join("CACHET-CADB", "signal")
+CAMINHO_ANOTACOES = os.path.join("generated-csv", "todas_anotacoes.csv")
+DESTINO = os.path.join("generated-csv", "janelas_ecg")
+
+SCALE = 1/1000         # conversão para mV
+CHAVES = ["patient", "session", "segment"]
+
+
+# ================================================================
+# ACESSO POR JANELA AO ECG.BIN (MEMORY-MAP)
+# ================================================================
+def abrir_ecg(ecg_path):
+    # int16 mapeado do disco: só as páginas da janela fatiada são lidas
+    if os.path.getsize(ecg_path) == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(ecg_path, dtype=np.int16, mode="r")
+
+
+def ler_janela(ecg_path, start=None, end=None, escala=SCALE):
+    # conversão para mV só das amostras [start:end)
+    return abrir_ecg(ecg_path)[start:end] * escala
+
+
+# ================================================================
+# EXPORTAÇÃO DE TODAS AS JANELAS ANOTADAS PARA UM ÚNICO ARQUIVO
+# ================================================================
+def caminhos_exportacao(destino=DESTINO):
+    return destino + ".int16", destino + "_indice.csv"
+
+
+def exportar_janelas(df_anotacoes, sig_dir=SIG_DIR, destino=DESTINO):
+    # um único int16 contíguo com as janelas na ordem do CSV de anotações +
+    # índice (offset, length) em amostras; cada ecg.bin é aberto uma vez
+    caminho_dados, caminho_indice = caminhos_exportacao(destino)
+    os.makedirs(os.path.dirname(caminho_dados) or ".", exist_ok=True)
+
+    df = df_anotacoes.reset_index(drop=True)
+    comprimentos = np.zeros(len(df), dtype=np.int64)
+    presentes = np.zeros(len(df), dtype=bool)
+    falhas = []
+
+    sinais = {}
+    for chave, grupo in df.groupby(CHAVES, sort=False):
+        ecg_path = os.path.join(sig_dir, *map(str, chave), "ecg.bin")
+        if not os.path.exists(ecg_path):
+            falhas.append((ecg_path, "ecg.bin não encontrado"))
+            continue
+        ecg = abrir_ecg(ecg_path)
+        sinais[chave] = ecg
+
+        # mesmas regras de recorte de ecg[Start:End]
+        for i, start, end in zip(grupo.index, grupo["Start"], grupo["End"]):
+            comprimentos[i] = len(range(*slice(start, end).indices(len(ecg))))
+            presentes[i] = True
+
+    offsets = np.concatenate([[0], np.cumsum(comprimentos)[:-1]]).astype(np.int64)
+    total = int(comprimentos.sum())
+
+    if total:
+        saida = np.memmap(caminho_dados, dtype=np.int16, mode="w+", shape=(total,))
+        for chave, grupo in df.groupby(CHAVES, sort=False):
+            ecg = sinais.get(chave)
+            if ecg is None:
+                continue
+            for i, start, end in zip(grupo.index, grupo["Start"], grupo["End"]):
+                saida[offsets[i]:offsets[i] + comprimentos[i]] = ecg[start:end]
+        saida.flush()
+        del saida
+    else:
+        open(caminho_dados, "wb").close()
+
+    indice = df.copy()
+    indice["offset"] = offsets
+    indice["length"] = comprimentos
+    indice = indice[presentes]
+    indice.to_csv(caminho_indice, index=False)
+
+    print(f"✅ {len(indice)} janelas ({total} amostras) exportadas para: {caminho_dados}")
+    if falhas:
+        print(f"⚠ {len(falhas)} segmento(s) sem sinal:")
+        for ecg_path, erro in falhas:
+            print(f"   ❌ {ecg_path}: {erro}")
+    return indice
+
+
+# ================================================================
+# LEITURA DAS JANELAS EXPORTADAS (SEM CÓPIA)
+# ================================================================
+class JanelasECG:
+    def __init__(self, destino=DESTINO):
+        caminho_dados, caminho_indice = caminhos_exportacao(destino)
+        self.indice = pd.read_csv(caminho_indice)
+        total = int(self.indice["length"].sum())
+        self.dados = np.memmap(caminho_dados, dtype=np.int16, mode="r", shape=(total,)) \
+            if total else np.zeros(0, dtype=np.int16)
+        self._offsets = self.indice["offset"].to_numpy()
+        self._comprimentos = self.indice["length"].to_numpy()
+
+    def __len__(self):
+        return len(self.indice)
+
+    def janela(self, i):
+        # view int16 sobre o arquivo mapeado, sem cópia
+        inicio = self._offsets[i]
+        return self.dados[inicio:inicio + self._comprimentos[i]]
+
+    def janela_mv(self, i, escala=SCALE):
+        return self.janela(i) * escala
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta as janelas anotadas de ECG para um único arquivo int16")
+    parser.add_argument("-a", "--anotacoes", default=CAMINHO_ANOTACOES)
+    parser.add_argument("-s", "--sinais", default=SIG_DIR)
+    parser.add_argument("-d", "--destino", default=DESTINO,
+                        help="prefixo de saída (<destino>.int16 e <destino>_indice.csv)")
+    args = parser.parse_args()
+
+    exportar_janelas(pd.read_csv(args.anotacoes), args.sinais, args.destino)
@@ -0,0 +1,427 @@
+import os
+import ssl
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from urllib.parse import urlsplit
+
+from ontologia import IndiceTermos, triplas_arquivo
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+ENDPOINT = os.environ.get("LLM_ENDPOINT", "http://127.0.0.1:8765/v1/chat/completions")
+MODELO = os.environ.get("LLM_MODELO", "local")
+CHAVE_API = os.environ.get("LLM_API_KEY")
+
+CACHE_LLM = os.path.join("cache", "llm")   # uma resposta por arquivo, endereçada pelo conteúdo
+DESTINO = "ligacoes_llm.json"
+
+CONCORRENCIA = 8        # requisições em voo ao mesmo tempo
+LOTE_ITENS = 32         # itens distintos por prompt
+TENTATIVAS = 5          # total de tentativas por lote
+ESPERA_BASE_S = 0.25    # backoff exponencial: base · 2^tentativa, com jitter
+ESPERA_MAX_S = 8.0
+TIMEOUT_S = 60.0
+
+# mudar o prompt invalida o cache: a versão entra no endereço de cada resposta
+VERSAO_PROMPT = 1
+INSTRUCOES = (
+    "Você faz entity linking de itens de regras de associação (formato atributo=valor) "
+    "para termos de ontologias biomédicas. Para cada item de 'itens' devolva um objeto em "
+    "'ligacoes' com as chaves item, iri, rotulo e confianca (0 a 1); use iri=null quando "
+    "nenhum termo servir. 'candidatos', quando presente, traz termos da ontologia local já "
+    "encontrados por rótulo. Responda só com JSON."
+)
+
+STATUS_REPETIR = {408, 429, 500, 502, 503, 504}
+
+
+class FalhaLigacao(RuntimeError):
+    pass
+
+
+# ================================================================
+# CACHE DE RESPOSTAS ENDEREÇADO PELO CONTEÚDO
+# ================================================================
+def chave_item(modelo, item, candidato=None):
+    # tudo que muda a resposta de um item entra no hash: o mesmo item em
+    # outra regra, outro lote ou outra execução cai no mesmo arquivo
+    conteudo = json.dumps([VERSAO_PROMPT, INSTRUCOES, modelo, item, candidato], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class CacheRespostas:
+    # cache/llm/ab/abcdef….json; gravação atômica (.tmp + replace), então
+    # execuções simultâneas podem dividir a pasta
+    def __init__(self, pasta=CACHE_LLM):
+        self.pasta = pasta
+        self.memoria = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave[:2], chave + ".json")
+
+    def obter(self, chave):
+        if chave in self.memoria:
+            self.hits += 1
+            return self.memoria[chave]
+        if self.pasta is not None:
+            try:
+                with open(self._caminho(chave), encoding="utf-8") as f:
+                    valor = json.load(f)
+            except (OSError, ValueError):
+                pass
+            else:
+                self.memoria[chave] = valor
+                self.hits += 1
+                return valor
+        self.misses += 1
+        return None
+
+    def guardar(self, chave, valor):
+        self.memoria[chave] = valor
+        if self.pasta is None:
+            return
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(valor, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+    def resumo(self):
+        total = self.hits + self.misses
+        taxa = self.hits / total if total else 0.0
+        return f"Cache de ligações: {self.hits} hits, {self.misses} misses, taxa de acerto={taxa:.1%}"
+
+
+# ================================================================
+# HTTP ASSÍNCRONO (SÓ BIBLIOTECA PADRÃO)
+# ================================================================
+async def _post_json(url, corpo, cabecalhos=None, timeout=TIMEOUT_S):
+    # → (status, {cabeçalho: valor}, bytes). HTTP/1.0 com conexão fechada
+    # no fim: a resposta vem inteira, sem chunked encoding
+    partes = urlsplit(url)
+    https = partes.scheme == "https"
+    porta = partes.port or (443 if https else 80)
+    caminho = (partes.path or "/") + (f"?{partes.query}" if partes.query else "")
+    dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+
+    linhas = [f"POST {caminho} HTTP/1.0", f"Host: {partes.hostname}", "Content-Type: application/json",
+              f"Content-Length: {len(dados)}", "Connection: close"]
+    linhas += [f"{nome}: {valor}" for nome, valor in (cabecalhos or {}).items()]
+    pedido = ("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + dados
+
+    async def enviar():
+        leitor, escritor = await asyncio.open_connection(
+            partes.hostname, porta, ssl=ssl.create_default_context() if https else None)
+        try:
+            escritor.write(pedido)
+            await escritor.drain()
+            return await leitor.read()
+        finally:
+            escritor.close()
+
+    resposta = await asyncio.wait_for(enviar(), timeout)
+    cabeca, _, conteudo = resposta.partition(b"\r\n\r\n")
+    linhas = cabeca.decode("latin-1").split("\r\n")
+    status = int(linhas[0].split()[1])
+    cabecalhos_resposta = {}
+    for linha in linhas[1:]:
+        nome, _, valor = linha.partition(":")
+        cabecalhos_resposta[nome.strip().lower()] = valor.strip()
+    return status, cabecalhos_resposta, conteudo
+
+
+def _percentil(valores, p):
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+# ================================================================
+# CLIENTE: LOTES, CONCORRÊNCIA LIMITADA, NOVAS TENTATIVAS
+# ================================================================
+class ClienteLigacao:
+    # cada item distinto é pedido ao modelo no máximo uma vez: primeiro o
+    # cache, depois os pedidos já em voo (mesmo item pedido por duas
+    # chamadas concorrentes), e só o resto vai em lotes de LOTE_ITENS
+    def __init__(self, endpoint=ENDPOINT, modelo=MODELO, cache=None, indice=None, concorrencia=CONCORRENCIA,
+                 lote=LOTE_ITENS, tentativas=TENTATIVAS, timeout=TIMEOUT_S, chave_api=CHAVE_API, rng=random):
+        self.endpoint = endpoint
+        self.modelo = modelo
+        self.cache = cache if cache is not None else CacheRespostas()
+        self.indice = indice
+        self.concorrencia = max(int(concorrencia), 1)
+        self.lote = max(int(lote), 1)
+        self.tentativas = max(int(tentativas), 1)
+        self.timeout = timeout
+        self.chave_api = chave_api
+        self.rng = rng
+
+        self._semaforo = None
+        self._pendentes = {}
+        self.latencias = []
+        self.requisicoes = 0
+        self.repeticoes = 0
+        self.compartilhados = 0
+        self.itens_falhos = 0
+
+    # ------------------------------------------------------------
+    # ITENS → LIGAÇÕES
+    # ------------------------------------------------------------
+    def _candidato(self, item):
+        if self.indice is None:
+            return None
+        iri, _ = self.indice.resolver_item(item)
+        return None if iri is None else {"iri": iri, "rotulo": self.indice.rotulos.get(iri)}
+
+    async def ligar(self, itens):
+        # → {item: {"iri", "rotulo", "confianca"} ou None se todas as tentativas falharam}
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.concorrencia)
+        laco = asyncio.get_running_loop()
+
+        resultado = {}
+        aguardando = {}
+        novos = []
+        for item in dict.fromkeys(map(str, itens)):
+            candidato = self._candidato(item)
+            chave = chave_item(self.modelo, item, candidato)
+            if chave in self._pendentes:
+                self.compartilhados += 1
+                aguardando[item] = self._pendentes[chave]
+                continue
+            valor = self.cache.obter(chave)
+            if valor is not None:
+                resultado[item] = valor
+                continue
+            futuro = laco.create_future()
+            self._pendentes[chave] = futuro
+            aguardando[item] = futuro
+            novos.append((item, candidato, chave))
+
+        lotes = [novos[i:i + self.lote] for i in range(0, len(novos), self.lote)]
+        await asyncio.gather(*(self._resolver_lote(lote) for lote in lotes))
+        for item, futuro in aguardando.items():
+            resultado[item] = await futuro
+        return resultado
+
+    async def _resolver_lote(self, lote):
+        ligacoes = {}
+        try:
+            ligacoes = await self._pedir(lote)
+        except FalhaLigacao:
+            self.itens_falhos += len(lote)
+        finally:
+            # cancelamento ou erro inesperado: as chaves saem de _pendentes e
+            # quem espera por elas recebe None em vez de ficar preso
+            for item, candidato, chave in lote:
+                futuro = self._pendentes.pop(chave, None)
+                if item in ligacoes:
+                    # "sem termo" (iri nulo) também é resposta e vai para o cache
+                    self.cache.guardar(chave, ligacoes[item])
+                if futuro is not None and not futuro.done():
+                    futuro.set_result(ligacoes.get(item))
+
+    # ------------------------------------------------------------
+    # UM LOTE = UM PROMPT, COM BACKOFF EXPONENCIAL
+    # ------------------------------------------------------------
+    def _corpo(self, lote):
+        itens = [item for item, _, _ in lote]
+        conteudo = {"itens": itens}
+        candidatos = {item: candidato for item, candidato, _ in lote if candidato is not None}
+        if candidatos:
+            conteudo["candidatos"] = candidatos
+        return {
+            "model": self.modelo,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": INSTRUCOES},
+                {"role": "user", "content": json.dumps(conteudo, ensure_ascii=False)},
+            ],
+        }
+
+    @staticmethod
+    def _ligacoes_resposta(conteudo, itens):
+        # só aceita ligações dos itens pedidos; item faltando = resposta inválida
+        mensagem = json.loads(conteudo)["choices"][0]["message"]["content"]
+        ligacoes = {}
+        for ligacao in json.loads(mensagem)["ligacoes"]:
+            item = str(ligacao.get("item"))
+            if item in itens:
+                ligacoes[item] = {"iri": ligacao.get("iri"), "rotulo": ligacao.get("rotulo"),
+                                  "confianca": float(ligacao.get("confianca") or 0.0)}
+        faltando = set(itens) - set(ligacoes)
+        if faltando:
+            raise ValueError(f"{len(faltando)} itens sem ligação na resposta")
+        return ligacoes
+
+    async def _pedir(self, lote):
+        corpo = self._corpo(lote)
+        itens = {item for item, _, _ in lote}
+        cabecalhos = {"Authorization": f"Bearer {self.chave_api}"} if self.chave_api else {}
+        erro = None
+        for tentativa in range(self.tentativas):
+            if tentativa:
+                self.repeticoes += 1
+                espera = min(ESPERA_MAX_S, ESPERA_BASE_S * 2 ** (tentativa - 1)) * self.rng.uniform(0.5, 1.5)
+                await asyncio.sleep(max(espera, erro[1] or 0.0))
+
+            async with self._semaforo:
+                inicio = time.perf_counter()
+                try:
+                    status, cabecalhos_resposta, conteudo = await _post_json(
+                        self.endpoint, corpo, cabecalhos, self.timeout)
+                except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+                    erro = (f"{type(e).__name__}: {e}", None)
+                    continue
+                finally:
+                    self.requisicoes += 1
+                    self.latencias.append(time.perf_counter() - inicio)
+
+            if status in STATUS_REPETIR:
+                try:
+                    retry_after = float(cabecalhos_resposta.get("retry-after", ""))
+                except ValueError:
+                    retry_after = None
+                erro = (f"HTTP {status}", retry_after)
+                continue
+            if status != 200:
+                raise FalhaLigacao(f"HTTP {status}: {conteudo[:200]!r}")
+            try:
+                return self._ligacoes_resposta(conteudo, itens)
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                erro = (f"resposta inválida: {e}", None)
+        raise FalhaLigacao(f"lote de {len(lote)} itens falhou após {self.tentativas} tentativas ({erro[0]})")
+
+    def resumo(self):
+        ms = [x * 1000 for x in self.latencias]
+        return (f"{self.requisicoes} requisições ({self.repeticoes} repetidas), {self.compartilhados} itens "
+                f"compartilhados com pedidos em voo, {self.itens_falhos} itens sem resposta; latência "
+                f"p50={_percentil(ms, 50):.0f} ms p95={_percentil(ms, 95):.0f} ms p99={_percentil(ms, 99):.0f} ms")
+
+
+def ligar_itens(itens, **kwargs):
+    # atalho síncrono: um laço de eventos só para esta chamada
+    cliente = ClienteLigacao(**kwargs)
+    return asyncio.run(cliente.ligar(itens)), cliente
+
+
+# ================================================================
+# ITENS DAS REGRAS
+# ================================================================
+def itens_regras(fonte):
+    # fonte: (id, antecedentes, consequentes, métricas) de triplas_regras;
+    # → itens distintos na ordem em que aparecem
+    itens = {}
+    for _, antecedentes, consequentes, _ in fonte:
+        for item in (*antecedentes, *consequentes):
+            itens.setdefault(item, None)
+    return list(itens)
+
+
+def itens_sinteticos(n_itens, n_regras, seed=0):
+    # vocabulário de n_itens e regras de 2–4 itens com repetição de cauda
+    # longa (poucos itens aparecem em muitas regras), para o benchmark offline
+    rng = random.Random(seed)
+    vocabulario = [f"atributo_{i % 16}=valor_{i}" for i in range(n_itens)]
+    pesos = [1 / (i + 1) for i in range(n_itens)]
+    return [rng.choices(vocabulario, pesos, k=rng.randint(2, 4)) for _ in range(n_regras)]
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+async def _rodada(cliente, regras, por_chamada):
+    # as regras chegam em grupos concorrentes, como vários consumidores do
+    # mesmo cliente; itens repetidos entre grupos em voo são compartilhados
+    grupos = [regras[i:i + por_chamada] for i in range(0, len(regras), por_chamada)]
+    partes = await asyncio.gather(*(cliente.ligar([item for regra in grupo for item in regra])
+                                    for grupo in grupos))
+    ligacoes = {}
+    for parte in partes:
+        ligacoes.update(parte)
+    return ligacoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entity linking dos itens das regras com um LLM")
+    parser.add_argument("-r", "--regras", default="resultado_GA.regras", help="pasta do repositório de regras")
+    parser.add_argument("--csv", default=None, help="lê as regras de um resultado_GA.csv em vez do repositório")
+    parser.add_argument("--melhor", action="store_true", help="só as regras do melhor indivíduo (repositório)")
+    parser.add_argument("-t", "--ontologia", action="append", default=[],
+                        help="envia os termos da ontologia local encontrados como candidatos; pode repetir")
+    parser.add_argument("-o", "--saida", default=DESTINO, help="JSON item → ligação")
+    parser.add_argument("--endpoint", default=ENDPOINT)
+    parser.add_argument("--modelo", default=MODELO)
+    parser.add_argument("--cache", default=CACHE_LLM, help="pasta do cache de respostas")
+    parser.add_argument("--sem-cache", action="store_true", help="não lê nem grava respostas em disco")
+    parser.add_argument("-c", "--concorrencia", type=int, default=CONCORRENCIA)
+    parser.add_argument("-l", "--lote", type=int, default=LOTE_ITENS, help="itens distintos por prompt")
+    parser.add_argument("--tentativas", type=int, default=TENTATIVAS)
+    parser.add_argument("--servidor-local", action="store_true",
+                        help="sobe o servidor local determinístico (servidor_llm_local.py) e usa o endpoint dele")
+    parser.add_argument("--sinteticos", type=int, default=None, metavar="N",
+                        help="benchmark com N itens sintéticos em vez das regras")
+    parser.add_argument("--n-regras", type=int, default=5000, help="regras sintéticas (com --sinteticos)")
+    parser.add_argument("--regras-por-chamada", type=int, default=200, help="regras por chamada concorrente")
+    parser.add_argument("--rodadas", type=int, default=1,
+                        help="repete a ligação (a partir da 2ª tudo deve vir do cache)")
+    args = parser.parse_args()
+
+    indice = None
+    if args.ontologia:
+        indice = IndiceTermos()
+        for caminho in args.ontologia:
+            indice.adicionar_triplas(triplas_arquivo(caminho))
+
+    if args.sinteticos is not None:
+        regras = itens_sinteticos(args.sinteticos, args.n_regras)
+    else:
+        from triplas_regras import regras_csv, regras_repositorio
+        fonte = regras_csv(args.csv) if args.csv else regras_repositorio(args.regras, args.melhor)
+        regras = [(*antecedentes, *consequentes) for _, antecedentes, consequentes, _ in fonte]
+    n_distintos = len(itens_regras((None, regra, (), None) for regra in regras))
+    print(f"📌 {len(regras)} regras, {sum(map(len, regras))} ocorrências de {n_distintos} itens distintos")
+
+    servidor = None
+    endpoint = args.endpoint
+    if args.servidor_local:
+        from servidor_llm_local import ServidorLocal
+        servidor = ServidorLocal(porta=0, indice=indice).iniciar()
+        endpoint = servidor.endpoint
+
+    cache = CacheRespostas(None if args.sem_cache else args.cache)
+    ligacoes = {}
+    try:
+        for rodada in range(1, args.rodadas + 1):
+            # cliente novo a cada rodada: só o cache atravessa as rodadas
+            cliente = ClienteLigacao(endpoint, args.modelo, cache, indice, args.concorrencia, args.lote,
+                                     args.tentativas)
+            hits, misses = cache.hits, cache.misses
+            t = time.perf_counter()
+            ligacoes = asyncio.run(_rodada(cliente, regras, args.regras_por_chamada))
+            duracao = time.perf_counter() - t
+            consultas = (cache.hits - hits) + (cache.misses - misses)
+            print(f"Rodada {rodada}: {len(ligacoes)} itens em {duracao:.3f}s "
+                  f"({len(ligacoes) / duracao if duracao else float('inf'):.0f} itens/s), "
+                  f"acerto no cache={(cache.hits - hits) / consultas if consultas else 0.0:.1%}; {cliente.resumo()}")
+    finally:
+        if servidor is not None:
+            servidor.parar()
+            print(servidor.resumo())
+
+    print(cache.resumo())
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(ligacoes, f, ensure_ascii=False, indent=2)
+    ligados = sum(1 for v in ligacoes.values() if v and v.get("iri"))
+    print(f"✔ {ligados} de {len(ligacoes)} itens ligados; salvo em: {args.saida}")
@@ -0,0 +1,188 @@
+import os
+import json
+import pickle
+import hashlib
+
+import etl_paralelo
+from etl_paralelo import mapear_tarefas
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+# o manifesto fica junto dos CSVs gerados: <CSV>/.etl/<etapa>.json e o
+# resultado de cada segmento em <CSV>/.etl/<etapa>/<hash da chave>.pkl
+SUBDIR_MANIFESTO = ".etl"
+VERSAO = 1
+# fontes maiores que isso (ex.: ecg.bin de vários GB) não são lidas para o
+# sha256: tamanho + mtime decidem sozinhos, e um mtime diferente reprocessa
+MAX_BYTES_HASH = 64 << 20
+
+
+def identidade_arquivo(caminho):
+    try:
+        st = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return {"caminho": caminho, "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_parametros(*valores):
+    return hashlib.sha256(json.dumps(valores, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+def contar_linhas(resultado):
+    if resultado is None:
+        return 0
+    if isinstance(resultado, dict):
+        return 1
+    return len(resultado)
+
+
+# ================================================================
+# MANIFESTO DE UMA ETAPA DO ETL
+# ================================================================
+class ManifestoETL:
+    # por (patient, session, segment): tamanho, mtime e sha256 (até
+    # MAX_BYTES_HASH) de cada arquivo de origem, hash dos parâmetros da
+    # tarefa e as linhas que o segmento contribuiu para o CSV
+    def __init__(self, etapa, pasta):
+        self.etapa = etapa
+        self.pasta = os.path.join(pasta, etapa)
+        self.caminho = os.path.join(pasta, f"{etapa}.json")
+        self.entradas = {}
+
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, encoding="utf-8") as f:
+                    conteudo = json.load(f)
+                if conteudo.get("versao") == VERSAO:
+                    self.entradas = conteudo["segmentos"]
+            except (OSError, ValueError, KeyError):
+                self.entradas = {}
+
+    def _arquivo_resultado(self, chave):
+        return os.path.join(self.pasta, hashlib.sha1(chave.encode("utf-8")).hexdigest() + ".pkl")
+
+    def em_dia(self, chave, fontes, parametros=None):
+        entrada = self.entradas.get(chave)
+        if entrada is None or entrada["parametros"] != parametros or len(entrada["fontes"]) != len(fontes):
+            return False
+
+        for registrada, caminho in zip(entrada["fontes"], fontes):
+            atual = identidade_arquivo(caminho)
+            if registrada is None or atual is None:
+                if registrada is not atual:
+                    return False
+                continue
+            if registrada["caminho"] != atual["caminho"] or registrada["tamanho"] != atual["tamanho"]:
+                return False
+            if registrada["mtime_ns"] != atual["mtime_ns"]:
+                # mtime mudou (cópia, touch…): o conteúdo decide, se houver hash
+                if registrada.get("sha256") is None or hash_arquivo(caminho) != registrada["sha256"]:
+                    return False
+                registrada["mtime_ns"] = atual["mtime_ns"]
+        return True
+
+    def carregar(self, chave):
+        with open(self._arquivo_resultado(chave), "rb") as f:
+            return pickle.load(f)
+
+    def guardar(self, chave, fontes, parametros, resultado, linhas=contar_linhas):
+        # o sha256 só é calculado quando tamanho/mtime mudaram desde o último
+        # registro (reprocessar por mudança de parâmetro não relê as fontes)
+        anteriores = {r["caminho"]: r for r in (self.entradas.get(chave) or {}).get("fontes", []) if r}
+        registradas = []
+        for caminho in fontes:
+            identidade = identidade_arquivo(caminho)
+            if identidade is not None:
+                anterior = anteriores.get(caminho)
+                if (anterior is not None and anterior["tamanho"] == identidade["tamanho"]
+                        and anterior["mtime_ns"] == identidade["mtime_ns"]):
+                    identidade["sha256"] = anterior.get("sha256")
+                elif identidade["tamanho"] <= MAX_BYTES_HASH:
+                    identidade["sha256"] = hash_arquivo(caminho)
+                else:
+                    identidade["sha256"] = None
+            registradas.append(identidade)
+
+        os.makedirs(self.pasta, exist_ok=True)
+        arquivo = self._arquivo_resultado(chave)
+        with open(arquivo + ".tmp", "wb") as f:
+            pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(arquivo + ".tmp", arquivo)
+
+        self.entradas[chave] = {"fontes": registradas, "parametros": parametros,
+                                "linhas": linhas(resultado)}
+
+    def remover(self, chave):
+        if self.entradas.pop(chave, None) is not None:
+            try:
+                os.remove(self._arquivo_resultado(chave))
+            except FileNotFoundError:
+                pass
+
+    def podar(self, chaves_atuais):
+        # segmentos que sumiram do dataset: as linhas deles saem do CSV
+        removidas = [c for c in self.entradas if c not in chaves_atuais]
+        linhas = sum(self.entradas[c]["linhas"] for c in removidas)
+        for chave in removidas:
+            self.remover(chave)
+        return len(removidas), linhas
+
+    def salvar(self):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        with open(self.caminho + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"versao": VERSAO, "etapa": self.etapa, "segmentos": self.entradas}, f, ensure_ascii=False)
+        os.replace(self.caminho + ".tmp", self.caminho)
+
+
+# ================================================================
+# EXECUÇÃO INCREMENTAL DE UMA ETAPA
+# ================================================================
+def executar_incremental(etapa, funcao, tarefas, chaves, fontes, pasta, parametros=None,
+                         workers=None, chunksize=None, incremental=True, linhas=contar_linhas):
+    # mesmo contrato de mapear_tarefas ([(ok, resultado)] na ordem das
+    # tarefas), mas só as tarefas novas ou alteradas são executadas
+    if parametros is None:
+        parametros = [None] * len(tarefas)
+
+    manifesto = ManifestoETL(etapa, pasta)
+    resultados = [None] * len(tarefas)
+    pendentes = []
+    linhas_reaproveitadas = 0
+
+    for i, (chave, fonte, parametro) in enumerate(zip(chaves, fontes, parametros)):
+        if incremental and manifesto.em_dia(chave, fonte, parametro):
+            try:
+                resultados[i] = (True, manifesto.carregar(chave))
+                linhas_reaproveitadas += manifesto.entradas[chave]["linhas"]
+                continue
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+        pendentes.append(i)
+
+    novos = mapear_tarefas(funcao, [tarefas[i] for i in pendentes],
+                           workers or etl_paralelo.WORKERS, chunksize or etl_paralelo.CHUNKSIZE)
+    for i, (ok, valor) in zip(pendentes, novos):
+        resultados[i] = (ok, valor)
+        if ok:
+            manifesto.guardar(chaves[i], fontes[i], parametros[i], valor, linhas)
+        else:
+            manifesto.remover(chaves[i])
+
+    removidos, linhas_removidas = manifesto.podar(set(chaves))
+    manifesto.salvar()
+
+    print(f"♻ {etapa}: {len(tarefas) - len(pendentes)} segmento(s) reaproveitado(s) "
+          f"({linhas_reaproveitadas} linhas), {len(pendentes)} processado(s), "
+          f"{removidos} removido(s) ({linhas_removidas} linhas)")
+    return resultados
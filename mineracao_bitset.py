@@ -0,0 +1,250 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+# ================================================================
+# CONTAGEM DE BITS (POPCOUNT) VETORIZADA
+# ================================================================
+if hasattr(np, "bitwise_count"):
+    def popcount(palavras):
+        return np.bitwise_count(palavras).sum(axis=-1, dtype=np.int64)
+else:
+    _TABELA_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(palavras):
+        return _TABELA_BITS[palavras.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+# ================================================================
+# MATRIZ ONE-HOT → BITSETS VERTICAIS (UMA LINHA uint64 POR ITEM)
+# ================================================================
+def empacotar(matriz):
+    # matriz: (transações × itens) booleana → (itens × palavras) uint64,
+    # bit t da linha i ligado se o item i aparece na transação t
+    matriz = np.asarray(matriz, dtype=bool)
+    n_linhas, n_itens = matriz.shape
+    n_palavras = max((n_linhas + 63) // 64, 1)
+
+    bytes_ = np.zeros((n_itens, n_palavras * 8), dtype=np.uint8)
+    empacotado = np.packbits(matriz.T, axis=1, bitorder="little")
+    bytes_[:, :empacotado.shape[1]] = empacotado
+    return bytes_.view(np.uint64)
+
+
+class BitsetsVerticais:
+    def __init__(self, dados):
+        self.colunas = list(dados.columns)
+        self.n_linhas = len(dados)
+        self.bits = empacotar(dados.to_numpy(dtype=bool))
+
+    @classmethod
+    def de_bits(cls, colunas, n_linhas, bits):
+        # linhas uint64 já empacotadas (ex.: montadas coluna a coluna pelo Discretizador)
+        bitsets = cls.__new__(cls)
+        bitsets.colunas = list(colunas)
+        bitsets.n_linhas = n_linhas
+        bitsets.bits = bits
+        return bitsets
+
+    def suporte(self, itens):
+        # itens: ids inteiros das colunas
+        tidset = np.bitwise_and.reduce(self.bits[list(itens)], axis=0)
+        return popcount(tidset) / self.n_linhas
+
+
+# ================================================================
+# ORÇAMENTO POR AVALIAÇÃO (TETO DE ITEMSETS E DESPEJO EM DISCO)
+# ================================================================
+# custo aproximado de um itemset guardado como (suporte, tupla) em Python,
+# mais 8 bytes por item
+BYTES_POR_ITEMSET = 120
+
+
+class OrcamentoExcedido(RuntimeError):
+    pass
+
+
+class OrcamentoMineracao:
+    # max_itemsets: teto de itemsets frequentes de uma mineração (acima dele
+    # OrcamentoExcedido); max_bytes: memória dos itemsets mantidos como
+    # objetos Python durante a busca; acima dela os níveis já encontrados vão
+    # para o disco em arrays compactos e voltam como arrays (ItemsetsEmNiveis),
+    # lidos nível a nível pela geração de regras
+    def __init__(self, max_itemsets=None, max_bytes=None, pasta=None):
+        self.max_itemsets = max_itemsets
+        self.max_bytes = max_bytes
+        self.pasta = pasta
+
+    def __repr__(self):
+        return f"OrcamentoMineracao(max_itemsets={self.max_itemsets}, max_bytes={self.max_bytes})"
+
+
+class _NiveisEmDisco:
+    # um par de arquivos por tamanho de itemset (ids int32, suportes float64);
+    # cada despejo é anexado no fim, o que preserva a ordem da busca
+    def __init__(self, pasta=None):
+        self.pasta = tempfile.mkdtemp(prefix="niveis_", dir=pasta)
+        self.despejos = 0
+
+    def _caminhos(self, k):
+        return os.path.join(self.pasta, f"{k}.ids"), os.path.join(self.pasta, f"{k}.sup")
+
+    def despejar(self, por_tamanho):
+        for k, linhas in por_tamanho.items():
+            caminho_ids, caminho_sup = self._caminhos(k)
+            with open(caminho_ids, "ab") as f:
+                np.array([i for _, i in linhas], dtype=np.int32).tofile(f)
+            with open(caminho_sup, "ab") as f:
+                np.array([s for s, _ in linhas], dtype=np.float64).tofile(f)
+        por_tamanho.clear()
+        self.despejos += 1
+
+    def ler(self, k):
+        # → (ids int32 (m × k), suportes float64), sem passar por objetos Python
+        caminho_ids, caminho_sup = self._caminhos(k)
+        if not os.path.exists(caminho_ids):
+            return np.zeros((0, k), dtype=np.int32), np.zeros(0)
+        ids = np.fromfile(caminho_ids, dtype=np.int32).reshape(-1, k)
+        suportes = np.fromfile(caminho_sup, dtype=np.float64)
+        return ids, suportes
+
+    def tamanhos(self):
+        return sorted(int(nome.split(".")[0]) for nome in os.listdir(self.pasta) if nome.endswith(".ids"))
+
+    def remover(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+
+class ItemsetsEmNiveis:
+    # lista de itemsets (tuplas de ids) guardada como um array int32 por
+    # tamanho: o que voltou do disco nunca é convertido de uma vez em
+    # objetos Python. Indexar ou iterar monta as tuplas sob demanda e
+    # gerar_regras lê os níveis direto (ver `niveis`)
+    TRECHO = 4096   # linhas convertidas por vez na iteração
+
+    def __init__(self, niveis):
+        # niveis: {tamanho: array (m × tamanho)}
+        self.niveis = [(k, niveis[k]) for k in sorted(niveis)]
+        self._inicios = np.cumsum([0] + [len(ids) for _, ids in self.niveis])
+
+    def __len__(self):
+        return int(self._inicios[-1])
+
+    def __getitem__(self, posicao):
+        if posicao < 0:
+            posicao += len(self)
+        if not 0 <= posicao < len(self):
+            raise IndexError(posicao)
+        n = int(np.searchsorted(self._inicios, posicao, side="right")) - 1
+        return tuple(self.niveis[n][1][posicao - self._inicios[n]].tolist())
+
+    def __iter__(self):
+        for _, ids in self.niveis:
+            for inicio in range(0, len(ids), self.TRECHO):
+                for linha in ids[inicio:inicio + self.TRECHO].tolist():
+                    yield tuple(linha)
+
+
+# ================================================================
+# ECLAT EM PROFUNDIDADE SOBRE OS BITSETS
+# ================================================================
+def minerar_ids(bitsets, min_support, max_len=None, orcamento=None):
+    # itemsets como tuplas ordenadas de ids inteiros + vetor de suportes,
+    # ordenados por tamanho e, dentro de cada tamanho, lexicograficamente
+    bits = bitsets.bits
+    n = bitsets.n_linhas
+    max_len = max_len or len(bitsets.colunas)
+
+    por_tamanho = {}
+    disco = None
+    total = 0
+    em_memoria = 0
+
+    def registrar(itemset, suporte):
+        nonlocal disco, total, em_memoria
+        por_tamanho.setdefault(len(itemset), []).append((suporte, itemset))
+        if orcamento is None:
+            return
+
+        total += 1
+        if orcamento.max_itemsets is not None and total > orcamento.max_itemsets:
+            raise OrcamentoExcedido(f"mais de {orcamento.max_itemsets} itemsets frequentes "
+                                    f"(min_support={min_support}, max_len={max_len})")
+        em_memoria += BYTES_POR_ITEMSET + 8 * len(itemset)
+        if orcamento.max_bytes is not None and em_memoria > orcamento.max_bytes:
+            if disco is None:
+                disco = _NiveisEmDisco(orcamento.pasta)
+            disco.despejar(por_tamanho)
+            em_memoria = 0
+
+    def expandir(prefixo, tidset, candidatos):
+        if len(prefixo) >= max_len or len(candidatos) == 0:
+            return
+
+        # AND do tidset do prefixo com todos os candidatos de uma vez
+        intersecoes = bits[candidatos] & tidset
+        suportes = popcount(intersecoes) / n
+        ok = suportes >= min_support
+        candidatos, intersecoes, suportes = candidatos[ok], intersecoes[ok], suportes[ok]
+
+        for j in range(len(candidatos)):
+            novo = prefixo + (int(candidatos[j]),)
+            registrar(novo, suportes[j])
+            # classe de equivalência: só extensões já frequentes com o prefixo
+            expandir(novo, intersecoes[j], candidatos[j + 1:])
+
+    try:
+        if n > 0:
+            suportes_1 = popcount(bits) / n
+            frequentes = np.flatnonzero(suportes_1 >= min_support)
+            for i, item in enumerate(frequentes):
+                registrar((int(item),), suportes_1[item])
+                expandir((int(item),), bits[item], frequentes[i + 1:])
+
+        if disco is not None:
+            # o que foi despejado vem antes do que ficou em memória, nível a
+            # nível; o resultado fica em arrays compactos (4·k + 8 bytes por
+            # itemset), nunca numa lista com todos os itemsets
+            niveis = {}
+            suportes = []
+            for k in sorted(set(disco.tamanhos()) | set(por_tamanho)):
+                ids_k, suportes_k = disco.ler(k)
+                restantes = por_tamanho.pop(k, [])
+                if restantes:
+                    ids_k = np.concatenate([ids_k, np.array([i for _, i in restantes], dtype=np.int32)])
+                    suportes_k = np.concatenate([suportes_k, np.array([s for s, _ in restantes], dtype=float)])
+                niveis[k] = ids_k
+                suportes.append(suportes_k)
+            return ItemsetsEmNiveis(niveis), np.concatenate(suportes) if suportes else np.zeros(0)
+        linhas = [linha for k in sorted(por_tamanho) for linha in por_tamanho[k]]
+    finally:
+        if disco is not None:
+            disco.remover()
+
+    itemsets = [itemset for _, itemset in linhas]
+    suportes = np.array([s for s, _ in linhas], dtype=float)
+    return itemsets, suportes
+
+
+def minerar_itemsets(dados, min_support=0.5, use_colnames=False, max_len=None, bitsets=None):
+    # mesma saída de mlxtend apriori(dados, min_support, use_colnames, max_len):
+    # colunas (support, itemsets), na mesma ordem de linhas
+    if bitsets is None:
+        bitsets = BitsetsVerticais(dados)
+
+    itemsets, suportes = minerar_ids(bitsets, min_support, max_len)
+    if use_colnames:
+        nomes = bitsets.colunas
+        itemsets = [frozenset(nomes[i] for i in itemset) for itemset in itemsets]
+    else:
+        itemsets = [frozenset(itemset) for itemset in itemsets]
+
+    return pd.DataFrame({
+        "support": suportes,
+        "itemsets": pd.Series(itemsets, dtype="object"),
+    })
+
@@ -0,0 +1,273 @@
+import time
+import argparse
+from collections import deque
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from mineracao_bitset import BitsetsVerticais, empacotar, popcount, minerar_ids
+from geracao_regras import gerar_regras
+from reticulado import MIN_CONFIANCA, PREFIXO_ALVO, fitness_regras
+from preprocessamento import (
+    CAMINHO_CONTEXTO, BINS, cols_apriori, manter, mapear_contexto,
+    activity_map, bodypos_map, sleepwake_map, gender_map, class_map,
+)
+from artefato_colunar import ler_etapa
+
+
+# ================================================================
+# VOCABULÁRIO FIXO (TODOS OS ITENS POSSÍVEIS, NÃO SÓ OS JÁ VISTOS)
+# ================================================================
+# um lote novo pode trazer um valor que o histórico nunca teve: com o
+# vocabulário fechado os ids dos itens não mudam ao longo do fluxo
+VALORES = {
+    "ActivityClass_mapped": list(activity_map.values()),
+    "BodyPosition_mapped": list(bodypos_map.values()),
+    "NonWearSleepWake_mapped": list(sleepwake_map.values()),
+    "gender_mapped": list(dict.fromkeys(gender_map.values())),
+    "ArrhythmiaClass": list(class_map.values()),
+    **{destino: list(rotulos) for destino, (_, _, rotulos) in BINS.items()},
+}
+
+
+def vocabulario(colunas=cols_apriori):
+    return [(coluna, valor) for coluna in colunas for valor in VALORES[coluna]]
+
+
+def codificar_lote(df, itens):
+    # linhas cruas do contexto → matriz bool (linhas × itens do vocabulário).
+    # None no último limite vira +inf: num fluxo o máximo observado muda a
+    # cada lote, e um valor acima dele continua no último bin
+    df = mapear_contexto(df)
+    for destino, (origem, limites, rotulos) in BINS.items():
+        df[destino] = pd.cut(
+            df[origem],
+            bins=[np.inf if b is None else b for b in limites],
+            labels=rotulos,
+            include_lowest=True
+        )
+
+    valores = {coluna: df[coluna].astype(object).to_numpy() for coluna in dict(itens)}
+    matriz = np.zeros((len(df), len(itens)), dtype=bool)
+    for j, (coluna, valor) in enumerate(itens):
+        matriz[:, j] = valores[coluna] == valor
+    return matriz
+
+
+# ================================================================
+# CONTAGEM DE ITEMSETS SOBRE LOTES DE BITS
+# ================================================================
+def contar(itemsets, lotes):
+    # itemsets: tuplas ordenadas de ids; lotes: bitsets (itens × palavras)
+    # → contagens absolutas somadas em todos os lotes, por tamanho de itemset
+    # de uma vez só
+    contagens = np.zeros(len(itemsets), dtype=np.int64)
+    por_tamanho = {}
+    for p, itemset in enumerate(itemsets):
+        por_tamanho.setdefault(len(itemset), []).append(p)
+
+    for posicoes in por_tamanho.values():
+        ids = np.array([itemsets[p] for p in posicoes], dtype=np.int64)
+        for bits in lotes:
+            contagens[posicoes] += popcount(np.bitwise_and.reduce(bits[ids], axis=1))
+    return contagens
+
+
+def _subconjuntos(itemset):
+    return combinations(itemset, len(itemset) - 1)
+
+
+# ================================================================
+# MANUTENÇÃO INCREMENTAL (FUP + BORDA NEGATIVA, JANELA DESLIZANTE)
+# ================================================================
+class MineracaoIncremental:
+    # guarda a contagem absoluta de cada itemset frequente e da borda
+    # negativa (infrequentes cujos subconjuntos imediatos são todos
+    # frequentes). Um lote que entra ou sai só é varrido para esses itemsets;
+    # o histórico só é revarrido para candidatos novos, que surgem quando um
+    # itemset da borda passa a ser frequente
+    def __init__(self, min_support, max_len, janela=None, colunas=cols_apriori,
+                 min_confianca=MIN_CONFIANCA, prefixo_alvo=PREFIXO_ALVO):
+        # janela: máximo de lotes mantidos (None = sem expiração automática)
+        self.min_support = min_support
+        self.max_len = max_len
+        self.janela = janela
+        self.min_confianca = min_confianca
+
+        self.itens = vocabulario(colunas)
+        self.colunas = [f"{coluna}={valor}" for coluna, valor in self.itens]
+        self.alvos = [i for i, c in enumerate(self.colunas) if c.startswith(prefixo_alvo)]
+
+        self.lotes = deque()
+        self.n_linhas = 0
+        # todo item isolado é frequente ou borda: o vazio é sempre frequente
+        self.contagens = {(i,): 0 for i in range(len(self.itens))}
+        self.frequentes = set()
+        self._regras = None
+
+    # ------------------------------------------------------------
+    # ENTRADA E SAÍDA DE LOTES
+    # ------------------------------------------------------------
+    def adicionar(self, df):
+        # df: linhas cruas do contexto (colunas de `manter`); → lotes expirados
+        return self.adicionar_matriz(codificar_lote(df, self.itens))
+
+    def adicionar_matriz(self, matriz):
+        bits = empacotar(matriz)
+        n = len(matriz)
+        if self.n_linhas == 0 and not self.frequentes:
+            self.lotes.append((bits, n))
+            self.n_linhas = n
+            self._iniciar(bits)
+        else:
+            self._somar(bits, +1)
+            self.lotes.append((bits, n))
+            self.n_linhas += n
+            self._reclassificar()
+
+        expirados = 0
+        while self.janela is not None and len(self.lotes) > self.janela:
+            self.expirar()
+            expirados += 1
+        self._regras = None
+        return expirados
+
+    def expirar(self):
+        # remove o lote mais antigo da janela
+        bits, n = self.lotes.popleft()
+        self._somar(bits, -1)
+        self.n_linhas -= n
+        self._reclassificar()
+        self._regras = None
+
+    # ------------------------------------------------------------
+    # MANUTENÇÃO DAS CONTAGENS
+    # ------------------------------------------------------------
+    def _frequente(self, contagem):
+        return self.n_linhas > 0 and contagem / self.n_linhas >= self.min_support
+
+    def _somar(self, bits, sinal):
+        # custo proporcional ao lote: só os bits dele são lidos
+        rastreados = list(self.contagens)
+        for itemset, contagem in zip(rastreados, contar(rastreados, [bits])):
+            self.contagens[itemset] += sinal * int(contagem)
+
+    def _iniciar(self, bits):
+        # primeiro lote (ou janela vazia): Eclat para os frequentes, depois a
+        # borda negativa
+        bitsets = BitsetsVerticais.de_bits(self.colunas, self.n_linhas, bits)
+        ids, suportes = minerar_ids(bitsets, self.min_support, self.max_len)
+        self.frequentes = set(ids)
+        self.contagens = {(i,): int(c) for i, c in enumerate(popcount(bits))}
+        for itemset, suporte in zip(ids, suportes):
+            self.contagens[itemset] = int(round(suporte * self.n_linhas))
+
+        borda = [c for c in self._candidatos(self.frequentes) if c not in self.contagens]
+        for itemset, contagem in zip(borda, contar(borda, [bits])):
+            self.contagens[itemset] = int(contagem)
+
+    def _candidatos(self, origens):
+        # X ∪ {i} com todos os subconjuntos imediatos frequentes; só a partir
+        # dos itemsets em `origens`, que são os que mudaram de estado
+        candidatos = set()
+        for itemset in origens:
+            if len(itemset) >= self.max_len:
+                continue
+            for item in range(len(self.itens)):
+                if item in itemset:
+                    continue
+                novo = tuple(sorted(itemset + (item,)))
+                if novo in candidatos:
+                    continue
+                if all(sub in self.frequentes for sub in _subconjuntos(novo)):
+                    candidatos.add(novo)
+        return candidatos
+
+    def _reclassificar(self):
+        ganhos = [x for x, c in self.contagens.items() if x not in self.frequentes and self._frequente(c)]
+        perdidos = [x for x in self.frequentes if not self._frequente(self.contagens[x])]
+        self.frequentes.difference_update(perdidos)
+        self.frequentes.update(ganhos)
+
+        # borda que virou frequente: só os superconjuntos dela são revarridos
+        # no histórico, nível a nível, até nada novo ficar frequente
+        fila = ganhos
+        while fila:
+            novos = [c for c in self._candidatos(fila) if c not in self.contagens]
+            fila = []
+            for itemset, contagem in zip(novos, contar(novos, [b for b, _ in self.lotes])):
+                self.contagens[itemset] = int(contagem)
+                if self._frequente(contagem):
+                    self.frequentes.add(itemset)
+                    fila.append(itemset)
+
+        # frequente que caiu: superconjuntos deixam de ser borda
+        if perdidos:
+            for itemset in [x for x in self.contagens if x not in self.frequentes and len(x) > 1]:
+                if not all(sub in self.frequentes for sub in _subconjuntos(itemset)):
+                    del self.contagens[itemset]
+
+    # ------------------------------------------------------------
+    # ITEMSETS E REGRAS ATUAIS
+    # ------------------------------------------------------------
+    def itemsets(self):
+        # mesma ordem de minerar_ids: por tamanho e lexicográfica
+        ids = sorted(self.frequentes, key=lambda x: (len(x), x))
+        suportes = np.array([self.contagens[x] for x in ids], dtype=float) / max(self.n_linhas, 1)
+        return ids, suportes
+
+    def regras(self):
+        # regras da ArrhythmiaClass recalculadas só depois de um lote mudar a janela
+        if self._regras is None:
+            ids, suportes = self.itemsets()
+            self._regras = gerar_regras(ids, suportes, self.colunas, self.alvos, self.min_confianca)
+        return self._regras
+
+    def __len__(self):
+        return len(self.frequentes)
+
+
+# ================================================================
+# CONFERÊNCIA CONTRA A MINERAÇÃO COMPLETA
+# ================================================================
+def verificar_contra_completa(incremental, linhas):
+    # linhas: matriz bool com exatamente as linhas da janela atual
+    bitsets = BitsetsVerticais.de_bits(incremental.colunas, len(linhas), empacotar(linhas))
+    esperado, suportes = minerar_ids(bitsets, incremental.min_support, incremental.max_len)
+    obtido, suportes_obtidos = incremental.itemsets()
+    assert obtido == esperado, "itemsets frequentes divergentes"
+    np.testing.assert_allclose(suportes_obtidos, suportes)
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL (REPRODUZ O CSV DE CONTEXTO COMO UM FLUXO)
+# ================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mineração incremental sobre lotes de linhas de contexto")
+    parser.add_argument("-i", "--entrada", default=CAMINHO_CONTEXTO, help="CSV de contexto das arritmias")
+    parser.add_argument("--min-support", type=float, default=0.05)
+    parser.add_argument("--max-len", type=int, default=4)
+    parser.add_argument("--lote", type=int, default=100, help="linhas por lote")
+    parser.add_argument("--janela", type=int, default=None, help="lotes mantidos na janela deslizante")
+    parser.add_argument("--verificar", action="store_true",
+                        help="confere cada lote contra a mineração completa da janela")
+    args = parser.parse_args()
+
+    linhas = ler_etapa(args.entrada, manter)
+    incremental = MineracaoIncremental(args.min_support, args.max_len, janela=args.janela)
+    matrizes = []
+    for n_lote, inicio in enumerate(range(0, len(linhas), args.lote), start=1):
+        matriz = codificar_lote(linhas.iloc[inicio:inicio + args.lote], incremental.itens)
+        t = time.perf_counter()
+        expirados = incremental.adicionar_matriz(matriz)
+        regras = incremental.regras()
+        duracao = time.perf_counter() - t
+
+        matrizes.append(matriz)
+        del matrizes[:expirados]
+        print(f"Lote {n_lote}: {len(matriz)} linhas, janela={incremental.n_linhas}, "
+              f"{len(incremental)} frequentes, {len(incremental.contagens) - len(incremental)} na borda, "
+              f"{len(regras)} regras, fitness={fitness_regras(regras):.6f} ({duracao * 1000:.1f} ms)")
+        if args.verificar:
+            verificar_contra_completa(incremental, np.concatenate(matrizes))
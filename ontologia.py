@@ -0,0 +1,316 @@
+import re
+import bisect
+import unicodedata
+import xml.etree.ElementTree as ET
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+OBO = "http://www.geneontology.org/formats/oboInOwl#"
+
+# predicado → prioridade (menor = preferido quando dois termos têm o mesmo rótulo)
+PREDICADOS_ROTULO = {
+    RDFS + "label": 0,
+    SKOS + "prefLabel": 0,
+    SKOS + "altLabel": 1,
+    OBO + "hasExactSynonym": 1,
+    SKOS + "hiddenLabel": 2,
+    OBO + "hasRelatedSynonym": 2,
+    OBO + "hasBroadSynonym": 2,
+    OBO + "hasNarrowSynonym": 2,
+}
+
+MIN_PREFIXO = 3   # consultas por prefixo mais curtas que isso casariam com quase tudo
+
+# valores dos maps de pre_processamento que não são o nome do conceito
+SINONIMOS_ITENS = {
+    "gender_M": "male",
+    "gender_F": "female",
+    "not_worn": "device not worn",
+}
+
+
+def normalizar(texto):
+    # minúsculas, sem acentos, tudo que não é letra/dígito vira um espaço
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    return " ".join(re.findall(r"[0-9a-z]+", texto))
+
+
+# ================================================================
+# LEITURA DE TURTLE / N-TRIPLES (SÓ O NECESSÁRIO PARA OS RÓTULOS)
+# ================================================================
+_TOKEN = re.compile(r'''
+    (?P<ws>\s+|\#[^\n]*)
+  | (?P<iri><[^>\s]*>)
+  | (?P<longo>"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\')
+  | (?P<texto>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<idioma>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+  | (?P<tipo>\^\^)
+  | (?P<pontuacao>[;,\[\]()]|\.(?![^\s<>"'.;,\[\]()]))
+  | (?P<nome>[^\s<>"';,\[\]()]+?)(?=[\s<>"';,\[\]()]|\.(?![^\s<>"'.;,\[\]()])|\Z)
+''', re.X)
+
+_ESCAPE = re.compile(r"\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)")
+_ESCAPES_SIMPLES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f"}
+
+
+def _desescapar(texto):
+    def trocar(m):
+        e = m.group(1)
+        if e[0] in "uU":
+            return chr(int(e[1:], 16))
+        return _ESCAPES_SIMPLES.get(e, e)
+    return _ESCAPE.sub(trocar, texto)
+
+
+def _tokens(texto):
+    for m in _TOKEN.finditer(texto):
+        tipo = m.lastgroup
+        if tipo != "ws":
+            yield tipo, m.group(tipo)
+
+
+def triplas_turtle(texto):
+    # → (sujeito, predicado, objeto); objeto literal = ("literal", texto,
+    # idioma). Listas e nós em branco aninhados ([ … ], ( … )) são pulados:
+    # rótulos de termos nunca moram neles
+    prefixos = {}
+    base = ""
+    tokens = _tokens(texto)
+
+    def proximo():
+        return next(tokens, (None, None))
+
+    def pular():
+        profundidade = 1
+        while profundidade:
+            tipo, valor = proximo()
+            if tipo is None:
+                return
+            if valor in ("[", "("):
+                profundidade += 1
+            elif valor in ("]", ")"):
+                profundidade -= 1
+
+    def iri(tipo, valor):
+        if tipo == "iri":
+            return base + valor[1:-1] if ":" not in valor else valor[1:-1]
+        if valor == "a":
+            return RDF + "type"
+        if valor.startswith("_:"):
+            return valor
+        prefixo, _, local = valor.partition(":")
+        return prefixos.get(prefixo, prefixo + ":") + local
+
+    def objeto(tipo, valor):
+        # → (termo, próximo token já lido)
+        if valor in ("[", "("):
+            pular()
+            return None, proximo()
+        if tipo in ("texto", "longo"):
+            corte = 3 if tipo == "longo" else 1
+            literal = _desescapar(valor[corte:-corte])
+            seguinte = proximo()
+            idioma = None
+            if seguinte[0] == "idioma":
+                idioma = seguinte[1][1:]
+                seguinte = proximo()
+            elif seguinte[0] == "tipo":
+                proximo()
+                seguinte = proximo()
+            return ("literal", literal, idioma), seguinte
+        if tipo == "nome" and ":" not in valor and valor != "a":
+            # número ou booleano sem aspas
+            return ("literal", valor, None), proximo()
+        return iri(tipo, valor), proximo()
+
+    tipo, valor = proximo()
+    while tipo is not None:
+        diretiva = valor.lower() if tipo in ("idioma", "nome") else None
+        if diretiva in ("@prefix", "prefix"):
+            _, nome = proximo()
+            _, alvo = proximo()
+            prefixos[nome.rstrip(":")] = alvo[1:-1]
+            tipo, valor = proximo()
+            if valor == ".":
+                tipo, valor = proximo()
+            continue
+        if diretiva in ("@base", "base"):
+            _, alvo = proximo()
+            base = alvo[1:-1]
+            tipo, valor = proximo()
+            if valor == ".":
+                tipo, valor = proximo()
+            continue
+
+        if valor == "[":
+            pular()
+            sujeito = None
+        else:
+            sujeito = iri(tipo, valor)
+
+        # lista predicado-objeto até o "."
+        tipo, valor = proximo()
+        while tipo is not None and valor != ".":
+            if valor == ";":
+                tipo, valor = proximo()
+                continue
+            predicado = iri(tipo, valor)
+            tipo, valor = proximo()
+            while True:
+                termo, (tipo, valor) = objeto(tipo, valor)
+                if sujeito is not None and termo is not None:
+                    yield sujeito, predicado, termo
+                if valor != ",":
+                    break
+                tipo, valor = proximo()
+        tipo, valor = proximo()
+
+
+# ================================================================
+# LEITURA DE RDF/XML (OWL) EM FLUXO
+# ================================================================
+def triplas_rdf_xml(caminho):
+    # só os rótulos filhos diretos de cada recurso com rdf:about/rdf:ID;
+    # iterparse + clear mantém a memória limitada ao recurso corrente
+    sobre = "{%s}about" % RDF
+    ident = "{%s}ID" % RDF
+    idioma_xml = "{http://www.w3.org/XML/1998/namespace}lang"
+    for _, elemento in ET.iterparse(caminho, events=("end",)):
+        sujeito = elemento.get(sobre) or (elemento.get(ident) and "#" + elemento.get(ident))
+        if not sujeito:
+            continue
+        for filho in elemento:
+            predicado = filho.tag[1:].replace("}", "", 1) if filho.tag.startswith("{") else filho.tag
+            if predicado in PREDICADOS_ROTULO and filho.text:
+                yield sujeito, predicado, ("literal", filho.text.strip(), filho.get(idioma_xml))
+        elemento.clear()
+
+
+def triplas_arquivo(caminho):
+    if caminho.lower().endswith((".owl", ".rdf", ".xml")):
+        with open(caminho, "rb") as f:
+            inicio = f.read(512).lstrip()
+        if inicio.startswith(b"<"):
+            return triplas_rdf_xml(caminho)
+    with open(caminho, encoding="utf-8") as f:
+        return triplas_turtle(f.read())
+
+
+# ================================================================
+# ÍNDICE DE RÓTULOS E SINÔNIMOS
+# ================================================================
+class IndiceTermos:
+    # rótulo exato → IRI, rótulo normalizado → IRI e as chaves normalizadas
+    # ordenadas para a busca por prefixo (bisect), como no vocabulário do
+    # repositório de regras
+    def __init__(self, idiomas=("en", "pt", None)):
+        self.idiomas = idiomas
+        self.rotulos = {}
+        self._exato = {}
+        self._normalizado = {}
+        self._chaves = None
+        self._memo = {}
+
+    @classmethod
+    def de_arquivo(cls, caminho, **kwargs):
+        indice = cls(**kwargs)
+        indice.adicionar_triplas(triplas_arquivo(caminho))
+        return indice
+
+    def adicionar(self, iri, rotulo, prioridade=0):
+        # com o mesmo rótulo, fica o termo de menor prioridade (o primeiro
+        # visto no empate)
+        for tabela, chave in ((self._exato, rotulo), (self._normalizado, normalizar(rotulo))):
+            if chave and (chave not in tabela or prioridade < tabela[chave][0]):
+                tabela[chave] = (prioridade, iri)
+        if prioridade == 0:
+            self.rotulos.setdefault(iri, rotulo)
+        self._chaves = None
+        self._memo.clear()
+
+    def adicionar_triplas(self, triplas):
+        for sujeito, predicado, objeto in triplas:
+            prioridade = PREDICADOS_ROTULO.get(predicado)
+            if prioridade is None or not isinstance(objeto, tuple):
+                continue
+            _, texto, idioma = objeto
+            if self.idiomas is None or idioma in self.idiomas or (idioma or "").split("-")[0] in self.idiomas:
+                self.adicionar(sujeito, texto, prioridade)
+        return self
+
+    def __len__(self):
+        return len(self._normalizado)
+
+    # ------------------------------------------------------------
+    # CONSULTAS
+    # ------------------------------------------------------------
+    def exato(self, termo):
+        # → IRI pelo rótulo exato ou normalizado
+        encontrado = self._exato.get(termo) or self._normalizado.get(normalizar(termo))
+        return encontrado[1] if encontrado else None
+
+    def prefixo(self, termo):
+        # → IRI do rótulo normalizado mais curto que começa com o termo
+        chave = normalizar(termo)
+        if len(chave) < MIN_PREFIXO:
+            return None
+        if self._chaves is None:
+            self._chaves = sorted(self._normalizado)
+        inicio = bisect.bisect_left(self._chaves, chave)
+        fim = bisect.bisect_left(self._chaves, chave + "\U0010ffff")
+        if inicio == fim:
+            return None
+        melhor = min(self._chaves[inicio:fim], key=lambda c: (len(c), self._normalizado[c][0], c))
+        return self._normalizado[melhor][1]
+
+    def buscar(self, termo):
+        return self.exato(termo) or self.prefixo(termo)
+
+    # ------------------------------------------------------------
+    # ITENS DAS REGRAS ("atributo=valor") → IRI, MEMOIZADO
+    # ------------------------------------------------------------
+    def resolver_item(self, item):
+        # → (IRI ou None, modo: "exato" | "prefixo" | None)
+        if item not in self._memo:
+            self._memo[item] = self._resolver(item)
+        return self._memo[item]
+
+    def _resolver(self, item):
+        candidatos = candidatos_item(item)
+        for candidato in candidatos:
+            iri = self.exato(candidato)
+            if iri:
+                return iri, "exato"
+        for candidato in candidatos:
+            iri = self.prefixo(candidato)
+            if iri:
+                return iri, "prefixo"
+        return None, None
+
+
+def candidatos_item(item):
+    # "ArrhythmiaClass=AF (Atrial Fibrillation)" → ["AF (Atrial Fibrillation)",
+    # "Atrial Fibrillation", "AF"]; "ActivityClass_mapped=activity_lying" →
+    # ["activity_lying", "lying"]; do mais específico ao mais genérico
+    _, _, valor = str(item).partition("=")
+    valor = valor or str(item)
+    candidatos = [valor]
+    if valor in SINONIMOS_ITENS:
+        candidatos.append(SINONIMOS_ITENS[valor])
+
+    dentro = re.findall(r"\(([^)]*)\)", valor)
+    fora = re.sub(r"\([^)]*\)", " ", valor).strip()
+    candidatos += [d.strip() for d in dentro if d.strip()]
+    if dentro and fora:
+        candidatos.append(fora)
+
+    # prefixo do map ("activity_", "body_", "met_", …) não faz parte do conceito
+    if "_" in valor and not dentro:
+        candidatos.append(valor.split("_", 1)[1])
+    return list(dict.fromkeys(candidatos))
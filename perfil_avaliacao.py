@@ -0,0 +1,138 @@
+import os
+import sys
+import csv
+import json
+import time
+import tracemalloc
+
+from reticulado import FITNESS_PENALIZADO, fitness_regras, regras_do_genoma, regras_penalizadas
+from mineracao_bitset import OrcamentoExcedido
+
+
+# ================================================================
+# MEDIÇÃO DE UMA AVALIAÇÃO DE FITNESS
+# ================================================================
+def _rss_pico():
+    # pico de RSS do processo em bytes. `resource` só existe em Unix e o
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS; no Windows, o pico
+    # do working set pelo psutil ou, sem ele, o pico do tracemalloc (0 se
+    # não estiver rastreando)
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return tracemalloc.get_traced_memory()[1]
+        memoria = psutil.Process().memory_info()
+        return getattr(memoria, "peak_wset", memoria.rss)
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def avaliar_perfilado(reticulado, genoma, discretizador=None, orcamento=None):
+    # → (fitness, regras, perfil) com tempos por fase, contagens e quanto o
+    # pico de RSS do processo subiu durante a avaliação
+    perfil = {"pid": os.getpid()}
+    rss_antes = _rss_pico()
+    inicio = time.perf_counter()
+
+    try:
+        regras = regras_do_genoma(genoma, reticulado, discretizador, perfil=perfil, orcamento=orcamento)
+        t_regras = time.perf_counter()
+        fitness = fitness_regras(regras)
+    except OrcamentoExcedido as e:
+        perfil["penalidade"] = str(e)
+        regras = regras_penalizadas(str(e))
+        t_regras = time.perf_counter()
+        fitness = FITNESS_PENALIZADO
+    fim = time.perf_counter()
+
+    perfil["n_regras"] = len(regras)
+    perfil["t_fitness_s"] = fim - t_regras
+    perfil["t_total_s"] = fim - inicio
+    perfil["rss_pico_delta_bytes"] = _rss_pico() - rss_antes
+    return fitness, regras, perfil
+
+
+# ================================================================
+# TRACE DAS AVALIAÇÕES E AGREGADOS POR GERAÇÃO
+# ================================================================
+CAMPOS_AVALIACAO = [
+    "geracao", "min_support", "max_len", "cache", "caminho", "n_itemsets", "n_regras",
+    "t_itemsets_s", "t_regras_s", "t_fitness_s", "t_total_s", "t_reticulado_s",
+    "rss_pico_delta_bytes", "fitness", "pid", "limites", "penalidade",
+]
+CAMPOS_GERACAO = [
+    "geracao", "individuos", "executadas", "evitadas", "cache_hits", "cache_misses",
+    "t_avaliacao_s", "t_max_s", "n_regras_max", "n_itemsets_max", "rss_pico_bytes",
+    "fitness_medio", "fitness_melhor",
+]
+
+
+class Perfilador:
+    # .jsonl: um objeto por linha ({"tipo": "avaliacao" | "geracao", …});
+    # .csv: avaliações no arquivo e agregados em <nome>_geracoes.csv
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.formato = "csv" if caminho.lower().endswith(".csv") else "jsonl"
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.arquivo = open(caminho, "w", encoding="utf-8", newline="")
+        self.arquivo_geracoes = None
+
+        if self.formato == "csv":
+            raiz, _ = os.path.splitext(caminho)
+            self.arquivo_geracoes = open(raiz + "_geracoes.csv", "w", encoding="utf-8", newline="")
+            self.csv_avaliacoes = csv.DictWriter(self.arquivo, CAMPOS_AVALIACAO, extrasaction="ignore")
+            self.csv_geracoes = csv.DictWriter(self.arquivo_geracoes, CAMPOS_GERACAO, extrasaction="ignore")
+            self.csv_avaliacoes.writeheader()
+            self.csv_geracoes.writeheader()
+
+        self._da_geracao = []
+
+    def _escrever(self, tipo, registro):
+        if self.formato == "csv":
+            (self.csv_avaliacoes if tipo == "avaliacao" else self.csv_geracoes).writerow(registro)
+        else:
+            self.arquivo.write(json.dumps({"tipo": tipo, **registro}) + "\n")
+
+    def registrar_avaliacao(self, geracao, genoma, cache, fitness, perfil=None):
+        registro = {"geracao": geracao, "min_support": genoma[0], "max_len": genoma[1], "cache": cache,
+                    "fitness": None if fitness is None or fitness != fitness else float(fitness)}
+        if len(genoma) > 2 and genoma[2] is not None:
+            registro["limites"] = json.dumps(dict(genoma[2]))
+        if perfil:
+            registro.update(perfil)
+        self._da_geracao.append(registro)
+        self._escrever("avaliacao", registro)
+
+    def registrar_geracao(self, geracao, individuos, executadas, evitadas):
+        avaliacoes = self._da_geracao
+        self._da_geracao = []
+        medidas = [a for a in avaliacoes if a["cache"] == "miss"]
+        fitness = [i.fitness_score for i in individuos
+                   if i.fitness_score is not None and i.fitness_score == i.fitness_score]
+
+        registro = {
+            "geracao": geracao,
+            "individuos": len(individuos),
+            "executadas": executadas,
+            "evitadas": evitadas,
+            "cache_hits": sum(a["cache"] == "hit" for a in avaliacoes),
+            "cache_misses": len(medidas),
+            "t_avaliacao_s": sum(a.get("t_total_s", 0.0) for a in medidas),
+            "t_max_s": max((a.get("t_total_s", 0.0) for a in medidas), default=0.0),
+            "n_regras_max": max((a.get("n_regras", 0) for a in avaliacoes), default=0),
+            "n_itemsets_max": max((a.get("n_itemsets", 0) or 0 for a in medidas), default=0),
+            "rss_pico_bytes": _rss_pico(),
+            "fitness_medio": sum(fitness) / len(fitness) if fitness else None,
+            "fitness_melhor": max(fitness) if fitness else None,
+        }
+        self._escrever("geracao", registro)
+        self.arquivo.flush()
+        return registro
+
+    def fechar(self):
+        self.arquivo.close()
+        if self.arquivo_geracoes is not None:
+            self.arquivo_geracoes.close()
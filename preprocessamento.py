@@ -0,0 +1,219 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from artefato_colunar import ler_etapa, manifesto_valido
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+CSV = r"generated-csv"
+CAMINHO_CONTEXTO = os.path.join(CSV, "contexto_das_arritmias.csv")
+MATRIZ_DIR = os.path.join("cache", "matrizes")
+
+manter = [
+    'ActivityClass []', 'BodyPosition []', 'MET []',
+    'MovementAcceleration [g]', 'NonWearSleepWake []',
+    'gender', 'weight', 'age', 'height', 'Class'
+]
+
+activity_map = {
+    0: "activity_unknown",
+    1: "activity_lying",
+    2: "activity_sitting_standing",
+    3: "activity_cycling",
+    4: "activity_slope_up",
+    5: "activity_jogging",
+    6: "activity_slope_down",
+    7: "activity_walking",
+    8: "activity_sitting_lying",
+    9: "activity_standing",
+    10: "activity_sitting_lying_standing",
+    11: "activity_sitting",
+    99: "activity_not_worn"
+}
+
+bodypos_map = {
+    0: "body_unknown",
+    1: "body_lying_supine",
+    2: "body_lying_left",
+    3: "body_lying_prone",
+    4: "body_lying_right",
+    5: "body_upright",
+    6: "body_sitting_lying",
+    7: "body_standing",
+    99: "body_not_worn"
+}
+
+sleepwake_map = {
+    0: "wake",
+    1: "sleep",
+    2: "not_worn"
+}
+
+gender_map = {
+    "M": "gender_M",
+    "F": "gender_F",
+    "m": "gender_M",
+    "f": "gender_F"
+}
+
+class_map = {
+    1: "AF (Atrial Fibrillation)",
+    2: "NSR (Normal Sinus Rhythm)",
+    3: "Noise",
+    4: "Others"
+}
+
+# coluna de saída → (coluna de origem, limites, rótulos); None no último
+# limite significa "o máximo observado na coluna"
+BINS = {
+    "MET_bin": (
+        "MET []",
+        [0, 1.0, 1.25, None],
+        ["met_1.0", "met_1.25", "met_acima_1.25"],
+    ),
+    "acc_bin": (
+        "MovementAcceleration [g]",
+        [0, 0.004326, 0.007704, 0.021811, None],
+        ["acc_muito_baixa", "acc_baixa", "acc_moderada", "acc_alta"],
+    ),
+    "weight_bin": (
+        "weight",
+        [50, 70, 79, 86, None],
+        ["peso_muito_baixo", "peso_baixo", "peso_medio", "peso_alto"],
+    ),
+    "age_bin": (
+        "age",
+        [30, 40, 50, 60, 80],
+        ["adulto_jovem", "adulto", "quase_idoso", "idoso"],
+    ),
+    "height_bin": (
+        "height",
+        [75, 102.5, 130, 157.5, 185],
+        ["height_baixo", "height_medio", "height_alto", "height_muito_alto"],
+    ),
+}
+
+cols_apriori = [
+    'ActivityClass_mapped',
+    'BodyPosition_mapped',
+    'NonWearSleepWake_mapped',
+    'gender_mapped',
+    'MET_bin',
+    'acc_bin',
+    'weight_bin',
+    'age_bin',
+    'height_bin',
+    'ArrhythmiaClass'
+]
+
+
+# ================================================================
+# CSV DE CONTEXTO → MATRIZ ONE-HOT BOOLEANA
+# ================================================================
+def preparar_contexto(caminho=CAMINHO_CONTEXTO, usar_colunar=True):
+    # só as colunas de `manter` saem do disco: do artefato colunar tipado
+    # quando existe, senão do CSV com usecols
+    if usar_colunar:
+        df = ler_etapa(caminho, manter)
+    else:
+        df = pd.read_csv(caminho, usecols=manter)
+
+    return mapear_contexto(df)
+
+
+def mapear_contexto(df):
+    # linhas cruas (colunas de `manter`) → mesmas linhas com os atributos
+    # categóricos mapeados; usado também nos lotes da mineração incremental
+    df = df[manter].copy()
+    df = df.dropna().copy()
+
+    df['ActivityClass_mapped'] = pd.to_numeric(df['ActivityClass []'], errors='coerce').map(activity_map)
+    df['BodyPosition_mapped'] = pd.to_numeric(df['BodyPosition []'], errors='coerce').map(bodypos_map)
+    df['NonWearSleepWake_mapped'] = pd.to_numeric(df['NonWearSleepWake []'], errors='coerce').map(sleepwake_map)
+    df['ArrhythmiaClass'] = pd.to_numeric(df['Class'], errors='coerce').map(class_map)
+    df['gender_mapped'] = df['gender'].astype(str).map(lambda x: x.strip()).map(gender_map)
+    return df
+
+
+def pre_processamento(caminho=CAMINHO_CONTEXTO, usar_colunar=True):
+    df = preparar_contexto(caminho, usar_colunar)
+
+    for destino, (origem, limites, rotulos) in BINS.items():
+        df[destino] = pd.cut(
+            df[origem],
+            bins=[df[origem].max() if b is None else b for b in limites],
+            labels=rotulos,
+            include_lowest=True
+        )
+
+    df_cat = df[cols_apriori].copy()
+
+    df_hot = pd.get_dummies(df_cat, prefix_sep='=')
+    df_hot_bool = (df_hot > 0).astype(bool)
+
+    return df_hot_bool
+
+
+# ================================================================
+# ARTEFATO BINÁRIO DA MATRIZ (BITS EMPACOTADOS + ÍNDICE DE COLUNAS)
+# ================================================================
+def chave_matriz(caminho=CAMINHO_CONTEXTO):
+    # hash do arquivo de origem (ou do conteúdo do artefato colunar, que não
+    # depende do CSV existir) + toda a configuração de mapeamento/binning
+    h = hashlib.sha256()
+    manifesto = manifesto_valido(caminho)
+    if manifesto is not None:
+        h.update(manifesto["hash"].encode("utf-8"))
+    else:
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+
+    configuracao = {
+        "manter": manter,
+        "maps": [activity_map, bodypos_map, sleepwake_map, gender_map, class_map],
+        "bins": BINS,
+        "cols_apriori": cols_apriori,
+    }
+    h.update(json.dumps(configuracao, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def salvar_matriz(dados, caminho_artefato):
+    os.makedirs(os.path.dirname(caminho_artefato) or ".", exist_ok=True)
+    temporario = caminho_artefato + ".tmp.npz"
+    np.savez(
+        temporario,
+        bits=np.packbits(dados.to_numpy(dtype=bool), axis=None),
+        shape=np.array(dados.shape, dtype=np.int64),
+        colunas=np.array(list(dados.columns), dtype=str),
+    )
+    os.replace(temporario, caminho_artefato)
+
+
+def ler_matriz(caminho_artefato):
+    with np.load(caminho_artefato) as artefato:
+        n_linhas, n_colunas = artefato["shape"]
+        matriz = np.unpackbits(artefato["bits"], count=n_linhas * n_colunas).astype(bool)
+        colunas = artefato["colunas"].tolist()
+    return pd.DataFrame(matriz.reshape(n_linhas, n_colunas), columns=colunas)
+
+
+def carregar_matriz(caminho=CAMINHO_CONTEXTO, usar_cache=True):
+    # só refaz o parse do CSV quando o arquivo ou o binning mudam
+    if not usar_cache:
+        return pre_processamento(caminho)
+
+    caminho_artefato = os.path.join(MATRIZ_DIR, f"matriz_{chave_matriz(caminho)}.npz")
+    if os.path.exists(caminho_artefato):
+        return ler_matriz(caminho_artefato)
+
+    dados = pre_processamento(caminho)
+    salvar_matriz(dados, caminho_artefato)
+    return dados
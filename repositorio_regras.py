@@ -0,0 +1,287 @@
+import os
+import json
+import shutil
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from geracao_regras import COLUNAS_COMPLETAS, metricas_derivadas
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+# <destino>/: vocabulário de itens, antecedentes e consequentes como
+# (offsets, ids) no estilo CSR, uma coluna .npy por métrica e índices
+# invertidos item → regras para cada lado da regra
+DESTINO = "resultado_GA.regras"
+VERSAO = 1
+
+METRICAS_BASICAS = ["antecedent support", "consequent support", "support", "confidence", "lift"]
+METRICAS = COLUNAS_COMPLETAS[2:]
+LADOS = ["antecedentes", "consequentes"]
+
+
+def _arquivo_metrica(nome):
+    return "m_" + nome.replace(" ", "_") + ".npy"
+
+
+def _csr(listas, dtype=np.int32):
+    # lista de tuplas → (offsets int64 com n+1 posições, valores concatenados)
+    tamanhos = np.fromiter((len(t) for t in listas), dtype=np.int64, count=len(listas))
+    offsets = np.zeros(len(listas) + 1, dtype=np.int64)
+    np.cumsum(tamanhos, out=offsets[1:])
+    valores = np.fromiter((i for t in listas for i in t), dtype=dtype, count=int(offsets[-1]))
+    return offsets, valores
+
+
+def _indice_invertido(offsets, itens, n_itens):
+    # item → regras que o contêm, em ordem crescente de regra (sort estável
+    # sobre os itens já agrupados por regra)
+    regras = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+    ordem = np.argsort(itens, kind="stable")
+    contagem = np.bincount(itens, minlength=n_itens)
+    inicio = np.zeros(n_itens + 1, dtype=np.int64)
+    np.cumsum(contagem, out=inicio[1:])
+    return inicio, regras[ordem]
+
+
+# ================================================================
+# COLETA DAS REGRAS DE TODOS OS INDIVÍDUOS AVALIADOS
+# ================================================================
+class ColetorRegras:
+    # cada genoma entra uma vez; a mesma regra vinda de genomas diferentes
+    # vira uma única linha (as métricas só dependem da matriz, não do genoma)
+    def __init__(self):
+        self.vocabulario = []
+        self._id_item = {}
+        self.itemsets = []
+        self._id_itemset = {}
+        # chave da regra = (itemset do antecedente << 32) | itemset do consequente
+        self._chaves = []
+        self._indice = pd.Index([], dtype=np.int64)
+        self._metricas = {nome: [] for nome in METRICAS_BASICAS}
+        self._n_regras = 0
+        self.genomas = {}
+
+    def _itemset(self, itemset):
+        # frozensets são compartilhados entre as regras: cada um é traduzido uma vez
+        n = self._id_itemset.get(itemset)
+        if n is None:
+            for item in itemset:
+                if item not in self._id_item:
+                    self._id_item[item] = len(self.vocabulario)
+                    self.vocabulario.append(item)
+            n = len(self.itemsets)
+            self.itemsets.append(tuple(sorted(self._id_item[item] for item in itemset)))
+            self._id_itemset[itemset] = n
+        return n
+
+    def _traduzir(self, coluna):
+        codigos, unicos = pd.factorize(coluna)
+        numeros = np.fromiter((self._itemset(u) for u in unicos), dtype=np.int64, count=len(unicos))
+        return numeros[codigos]
+
+    def adicionar(self, genoma, regras):
+        genoma = tuple(genoma)
+        if genoma in self.genomas or regras is None:
+            return
+        chaves = (self._traduzir(regras["antecedents"]) << 32) | self._traduzir(regras["consequents"])
+        ids_regras = self._indice.get_indexer(chaves)
+
+        novas = np.flatnonzero(ids_regras < 0)
+        if len(novas):
+            # regras novas entram na ordem em que aparecem, uma vez cada
+            _, primeira = np.unique(chaves[novas], return_index=True)
+            novas = novas[np.sort(primeira)]
+            self._chaves.append(chaves[novas])
+            for nome in METRICAS_BASICAS:
+                self._metricas[nome].append(regras[nome].to_numpy(dtype=float)[novas])
+            self._n_regras += len(novas)
+            self._indice = pd.Index(np.concatenate(self._chaves))
+            ids_regras = self._indice.get_indexer(chaves)
+        self.genomas[genoma] = ids_regras
+
+    def __len__(self):
+        return self._n_regras
+
+    def _lados(self):
+        chaves = np.concatenate(self._chaves) if self._chaves else np.zeros(0, dtype=np.int64)
+        return ([self.itemsets[n] for n in chaves >> 32],
+                [self.itemsets[n] for n in chaves & 0xFFFFFFFF])
+
+    def salvar(self, destino=DESTINO, melhor=None):
+        temporario = destino + ".tmp"
+        shutil.rmtree(temporario, ignore_errors=True)
+        os.makedirs(temporario)
+
+        def gravar(arquivo, valores):
+            np.save(os.path.join(temporario, arquivo), valores)
+
+        n_itens = len(self.vocabulario)
+        gravar("vocabulario.npy", np.array([str(i) for i in self.vocabulario], dtype=str))
+
+        for lado, listas in zip(LADOS, self._lados()):
+            offsets, itens = _csr(listas)
+            gravar(f"{lado}_offsets.npy", offsets)
+            gravar(f"{lado}_itens.npy", itens)
+            inicio, regras = _indice_invertido(offsets, itens, n_itens)
+            gravar(f"indice_{lado}_offsets.npy", inicio)
+            gravar(f"indice_{lado}_regras.npy", regras)
+
+        basicas = {nome: np.concatenate(v) if v else np.zeros(0) for nome, v in self._metricas.items()}
+        todas = {**basicas, **metricas_derivadas(basicas["antecedent support"], basicas["consequent support"],
+                                                 basicas["support"], basicas["confidence"])}
+        for nome in METRICAS:
+            gravar(_arquivo_metrica(nome), np.asarray(todas[nome], dtype=np.float64))
+        # em quantos genomas avaliados cada regra apareceu
+        ocorrencias = np.zeros(len(self), dtype=np.int32)
+        for ids_regras in self.genomas.values():
+            ocorrencias[np.unique(ids_regras)] += 1
+        gravar("ocorrencias.npy", ocorrencias)
+
+        do_melhor = np.zeros(len(self), dtype=bool)
+        if melhor is not None and tuple(melhor) in self.genomas:
+            do_melhor[self.genomas[tuple(melhor)]] = True
+        gravar("melhor.npy", do_melhor)
+
+        manifesto = {
+            "versao": VERSAO,
+            "regras": len(self),
+            "itens": n_itens,
+            "metricas": {nome: _arquivo_metrica(nome) for nome in METRICAS},
+            "genomas": [list(g) for g in self.genomas],
+            "melhor": list(melhor) if melhor is not None else None,
+        }
+        with open(os.path.join(temporario, "manifesto.json"), "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=1)
+
+        shutil.rmtree(destino, ignore_errors=True)
+        os.replace(temporario, destino)
+        return destino
+
+
+# ================================================================
+# LEITURA E CONSULTAS (MEMORY-MAP, SEM VARRER AS REGRAS)
+# ================================================================
+class RepositorioRegras:
+    def __init__(self, pasta=DESTINO):
+        self.pasta = pasta
+        with open(os.path.join(pasta, "manifesto.json"), encoding="utf-8") as f:
+            self.manifesto = json.load(f)
+        if self.manifesto.get("versao") != VERSAO:
+            raise ValueError(f"versão do repositório de regras não suportada: {pasta}")
+
+        def ler(arquivo):
+            return np.load(os.path.join(pasta, arquivo), mmap_mode="r")
+
+        self.vocabulario = np.load(os.path.join(pasta, "vocabulario.npy"))
+        self._id_item = {str(item): i for i, item in enumerate(self.vocabulario)}
+        # vocabulário ordenado para a busca por prefixo
+        self._ordem_itens = np.argsort(self.vocabulario)
+        self._itens_ordenados = self.vocabulario[self._ordem_itens]
+
+        self.lados = {lado: (ler(f"{lado}_offsets.npy"), ler(f"{lado}_itens.npy")) for lado in LADOS}
+        self.indices = {lado: (ler(f"indice_{lado}_offsets.npy"), ler(f"indice_{lado}_regras.npy"))
+                        for lado in LADOS}
+        self.metricas = {nome: ler(arquivo) for nome, arquivo in self.manifesto["metricas"].items()}
+        self.ocorrencias = ler("ocorrencias.npy")
+        self.melhor = ler("melhor.npy")
+
+    def __len__(self):
+        return self.manifesto["regras"]
+
+    def itens_por_nome(self, nome):
+        # nome exato ou prefixo ("ArrhythmiaClass=AF" → todos os itens que começam assim)
+        if nome in self._id_item:
+            return np.array([self._id_item[nome]])
+        inicio = np.searchsorted(self._itens_ordenados, nome, side="left")
+        fim = np.searchsorted(self._itens_ordenados, nome + "\U0010ffff", side="left")
+        if inicio == fim:
+            raise KeyError(f"item ausente do vocabulário: {nome}")
+        return np.sort(self._ordem_itens[inicio:fim])
+
+    def regras_com_item(self, lado, item_id):
+        inicio, regras = self.indices[lado]
+        return regras[inicio[item_id]:inicio[item_id + 1]]
+
+    def _regras_com(self, lado, nomes):
+        # cada nome exige um item; um prefixo aceita qualquer um dos itens dele
+        candidatas = None
+        for nome in nomes:
+            listas = [self.regras_com_item(lado, i) for i in self.itens_por_nome(nome)]
+            regras = listas[0] if len(listas) == 1 else np.unique(np.concatenate(listas))
+            candidatas = regras if candidatas is None else np.intersect1d(candidatas, regras, assume_unique=True)
+        return candidatas
+
+    def consultar(self, antecedente=None, consequente=None, minimos=None, maximos=None, somente_melhor=False):
+        # → ids das regras; os índices invertidos restringem os candidatos e
+        # os limites de métricas só são avaliados sobre eles
+        candidatas = None
+        for lado, nomes in (("antecedentes", antecedente), ("consequentes", consequente)):
+            if nomes is None:
+                continue
+            regras = self._regras_com(lado, [nomes] if isinstance(nomes, str) else list(nomes))
+            candidatas = regras if candidatas is None else np.intersect1d(candidatas, regras, assume_unique=True)
+        if candidatas is None:
+            candidatas = np.arange(len(self))
+        candidatas = np.asarray(candidatas, dtype=np.int64)
+
+        mascara = np.ones(len(candidatas), dtype=bool)
+        for nome, limite in (minimos or {}).items():
+            mascara &= self.metricas[nome][candidatas] >= limite
+        for nome, limite in (maximos or {}).items():
+            mascara &= self.metricas[nome][candidatas] <= limite
+        if somente_melhor:
+            mascara &= self.melhor[candidatas]
+        return candidatas[mascara]
+
+    def itens(self, lado, regra):
+        offsets, itens = self.lados[lado]
+        return tuple(str(self.vocabulario[i]) for i in itens[offsets[regra]:offsets[regra + 1]])
+
+    def para_dataframe(self, regras=None):
+        # mesmo formato do resultado_GA.csv antigo (frozensets + métricas)
+        regras = np.arange(len(self)) if regras is None else np.asarray(regras, dtype=np.int64)
+        dados = {
+            "antecedents": pd.Series([frozenset(self.itens("antecedentes", r)) for r in regras], dtype="object"),
+            "consequents": pd.Series([frozenset(self.itens("consequentes", r)) for r in regras], dtype="object"),
+        }
+        for nome in METRICAS:
+            dados[nome] = np.asarray(self.metricas[nome][regras])
+        return pd.DataFrame(dados, columns=COLUNAS_COMPLETAS)
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+def _limites(pares):
+    limites = {}
+    for par in pares or []:
+        nome, valor = par.rsplit("=", 1)
+        limites[nome] = float(valor)
+    return limites
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o repositório de regras gerado pelo GA")
+    parser.add_argument("pasta", nargs="?", default=DESTINO)
+    parser.add_argument("-a", "--antecedente", action="append", help="item (ou prefixo) exigido no antecedente")
+    parser.add_argument("-c", "--consequente", action="append", help="item (ou prefixo) exigido no consequente")
+    parser.add_argument("--min", action="append", metavar="METRICA=VALOR", help="ex.: --min lift=1.1")
+    parser.add_argument("--max", action="append", metavar="METRICA=VALOR")
+    parser.add_argument("--melhor", action="store_true", help="só as regras do melhor indivíduo")
+    parser.add_argument("-o", "--saida", default=None, help="CSV com as regras encontradas")
+    args = parser.parse_args()
+
+    repositorio = RepositorioRegras(args.pasta)
+    encontradas = repositorio.consultar(args.antecedente, args.consequente,
+                                        _limites(args.min), _limites(args.max), args.melhor)
+    print(f"📌 {len(encontradas)} de {len(repositorio)} regras ({len(repositorio.vocabulario)} itens)")
+    df = repositorio.para_dataframe(encontradas)
+    if args.saida:
+        df.to_csv(args.saida, index=False, encoding="utf-8")
+        print(f"✔ Arquivo salvo com sucesso em: {args.saida}")
+    else:
+        print(df.head(20).to_string())
@@ -0,0 +1,171 @@
+import time
+
+import numpy as np
+
+from mineracao_bitset import BitsetsVerticais, OrcamentoExcedido, minerar_ids
+from geracao_regras import gerar_regras
+
+
+# ================================================================
+# LIMITES DO ESPAÇO DE BUSCA DO GA
+# ================================================================
+# Individuo sorteia min_support em [0.01, 0.50] e max_len em [2, 7].
+# Pela anti-monotonicidade do suporte, os itemsets de qualquer indivíduo
+# são um subconjunto dos itemsets minerados com o menor suporte e o maior
+# tamanho — basta minerar uma vez nesse canto do espaço e fatiar.
+MIN_SUPPORT_PISO = 0.01
+MAX_LEN_TETO = 7
+MIN_CONFIANCA = 0.4
+PREFIXO_ALVO = "ArrhythmiaClass="
+# fitness de um genoma que não coube no orçamento de mineração: abaixo de
+# qualquer fitness real (lift e suporte são positivos), acima do NaN
+FITNESS_PENALIZADO = 0.0
+
+
+# ================================================================
+# REGRAS QUE ENVOLVEM A CLASSE DE ARRITMIA E FITNESS DO GA
+# ================================================================
+def filtrar_regras_arritmia(temporary_rules):
+    new_rules = temporary_rules[
+        temporary_rules['antecedents'].apply(lambda items: any(str(i).startswith(PREFIXO_ALVO) for i in items)) |
+        temporary_rules['consequents'].apply(lambda items: any(str(i).startswith(PREFIXO_ALVO) for i in items))
+    ].copy()
+
+    return new_rules.copy()
+
+
+def fitness_regras(regras):
+    mean_lift = regras['lift'].mean()
+    mean_support = regras['support'].mean()
+
+    #print(f"Fitness calculado: lift médio={mean_lift}, support médio={mean_support}")
+    return mean_lift * mean_support
+
+
+# ================================================================
+# MINERAÇÃO DIRETA (MATRIZ DE UM GENOMA COM LIMITES PRÓPRIOS)
+# ================================================================
+def regras_diretas(bitsets, min_support, max_len, min_confianca=MIN_CONFIANCA,
+                   prefixo_alvo=PREFIXO_ALVO, perfil=None, orcamento=None):
+    # cada discretização é uma matriz diferente: minerar no genoma custa bem
+    # menos que montar um reticulado que quase nunca seria reaproveitado
+    alvos = [i for i, c in enumerate(bitsets.colunas) if str(c).startswith(prefixo_alvo)]
+    inicio = time.perf_counter()
+    ids, suportes = minerar_ids(bitsets, min_support, max_len, orcamento)
+    meio = time.perf_counter()
+    regras = gerar_regras(ids, suportes, bitsets.colunas, alvos, min_confianca)
+    if perfil is not None:
+        perfil.update(caminho="discretizado", n_itemsets=len(ids), t_itemsets_s=meio - inicio,
+                      t_regras_s=time.perf_counter() - meio)
+    return regras
+
+
+def regras_do_genoma(genoma, reticulado=None, discretizador=None, perfil=None, orcamento=None):
+    # genoma = (min_support, max_len) ou (min_support, max_len, limites)
+    min_support, max_len = genoma[:2]
+    limites = genoma[2] if len(genoma) > 2 else None
+    if limites is None:
+        return reticulado.regras_para(min_support, max_len, perfil=perfil)
+    return regras_diretas(discretizador.bitsets(limites), min_support, max_len, perfil=perfil,
+                          orcamento=orcamento)
+
+
+def regras_penalizadas(motivo):
+    # nenhuma regra; o motivo viaja com o DataFrame (cache, workers, trace)
+    regras = gerar_regras([], [], [], [], MIN_CONFIANCA)
+    regras.attrs["penalidade"] = motivo
+    return regras
+
+
+def avaliar_genoma(genoma, reticulado=None, discretizador=None, perfil=None, orcamento=None):
+    # → (fitness, regras); um genoma que estoura o orçamento recebe
+    # FITNESS_PENALIZADO em vez de derrubar o processo
+    try:
+        regras = regras_do_genoma(genoma, reticulado, discretizador, perfil, orcamento)
+    except OrcamentoExcedido as e:
+        if perfil is not None:
+            perfil["penalidade"] = str(e)
+        return FITNESS_PENALIZADO, regras_penalizadas(str(e))
+    return fitness_regras(regras), regras
+
+
+# ================================================================
+# RETICULADO DE ITEMSETS (MINERA UMA VEZ, RESPONDE POR FILTRAGEM)
+# ================================================================
+class Reticulado:
+    def __init__(self, dados, min_support=MIN_SUPPORT_PISO, max_len=MAX_LEN_TETO,
+                 min_confianca=MIN_CONFIANCA, prefixo_alvo=PREFIXO_ALVO, orcamento=None):
+        # só os bitsets empacotados, os itemsets e o índice de regras ficam no
+        # objeto: o DataFrame não vai junto quando ele é enviado aos workers
+        self.min_support = min_support
+        self.max_len = max_len
+        self.min_confianca = min_confianca
+        self.orcamento = orcamento
+        self.motivo = None
+
+        self.bitsets = BitsetsVerticais(dados)
+        colunas = self.bitsets.colunas
+        # a restrição da classe de arritmia entra na geração, não depois dela
+        self.alvos = [i for i, c in enumerate(colunas) if str(c).startswith(prefixo_alvo)]
+
+        try:
+            self.ids, self.suportes = minerar_ids(self.bitsets, min_support, max_len, orcamento)
+        except OrcamentoExcedido as e:
+            # o canto do espaço não cabe no orçamento: sem reticulado, cada
+            # genoma minera direto (e sozinho pode caber)
+            self.motivo = str(e)
+            self.ids, self.suportes = [], np.zeros(0)
+            self.min_support, self.max_len = float("inf"), 0
+        self.tamanhos = np.array([len(i) for i in self.ids], dtype=np.int64)
+
+        regras = self._gerar(self.ids, self.suportes)
+
+        # tamanho do itemset que originou a regra = |antecedente| + |consequente|
+        tamanho = (regras["antecedents"].map(len) + regras["consequents"].map(len)).to_numpy()
+
+        # índice: regras ordenadas por suporte decrescente, assim o corte por
+        # min_support vira um prefixo encontrado por busca binária
+        ordem = np.argsort(-regras["support"].to_numpy(), kind="stable")
+        self.regras = regras
+        self._ordem = ordem
+        self._suporte_desc = regras["support"].to_numpy()[ordem]
+        self._tamanho_desc = tamanho[ordem]
+
+    def _gerar(self, ids, suportes):
+        return gerar_regras(ids, suportes, self.bitsets.colunas, self.alvos, self.min_confianca)
+
+    def cobre(self, min_support, max_len):
+        return min_support >= self.min_support and max_len <= self.max_len
+
+    def regras_para(self, min_support, max_len, perfil=None):
+        # `perfil` (dict, opcional) recebe tempos e contagens de cada fase
+        # fora do reticulado: cai para a mineração direta
+        if not self.cobre(min_support, max_len):
+            if perfil is None:
+                return self._gerar(*minerar_ids(self.bitsets, min_support, max_len, self.orcamento))
+            inicio = time.perf_counter()
+            ids, suportes = minerar_ids(self.bitsets, min_support, max_len, self.orcamento)
+            meio = time.perf_counter()
+            regras = self._gerar(ids, suportes)
+            perfil.update(caminho="direto", n_itemsets=len(ids), t_itemsets_s=meio - inicio,
+                          t_regras_s=time.perf_counter() - meio)
+            return regras
+
+        if perfil is not None:
+            inicio = time.perf_counter()
+            n_itemsets = int(np.count_nonzero((self.suportes >= min_support) & (self.tamanhos <= max_len)))
+            meio = time.perf_counter()
+
+        # -np.sup crescente → searchsorted acha onde suporte < min_support
+        fim = np.searchsorted(-self._suporte_desc, -min_support, side="right")
+        selecionadas = self._ordem[:fim][self._tamanho_desc[:fim] <= max_len]
+        selecionadas.sort()  # preserva a ordem original das regras
+
+        regras = self.regras.iloc[selecionadas].reset_index(drop=True)
+        if perfil is not None:
+            perfil.update(caminho="reticulado", n_itemsets=n_itemsets, t_itemsets_s=meio - inicio,
+                          t_regras_s=time.perf_counter() - meio)
+        return regras
+
+    def __len__(self):
+        return len(self.ids)
@@ -0,0 +1,175 @@
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import quote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ontologia import IndiceTermos, candidatos_item, normalizar, triplas_arquivo
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+# servidor de mentira com a mesma rota e o mesmo formato de um endpoint de
+# chat compatível com a API da OpenAI (vLLM, Ollama, llama.cpp …): as
+# ligações são determinísticas, só a latência e as falhas são sorteadas
+HOST = "127.0.0.1"
+PORTA = 8765
+ROTA = "/v1/chat/completions"
+IRI_SINTETICO = "http://example.org/ligacao-local#"
+
+LATENCIA_BASE_MS = 40.0      # custo fixo de cada requisição
+LATENCIA_ITEM_MS = 4.0       # custo por item do lote (tokens de saída)
+PROB_CAUDA = 0.05            # fração das requisições bem mais lentas
+FATOR_CAUDA = 8.0
+TAXA_FALHA = 0.02            # fração respondida com 503 (exercita as novas tentativas)
+
+
+def ligacao_deterministica(item, indice=None):
+    # mesma entrada → mesma resposta: pela ontologia quando há índice, senão
+    # um IRI sintético a partir do valor normalizado do item
+    if indice is not None:
+        iri, modo = indice.resolver_item(item)
+        if iri is None:
+            return {"item": item, "iri": None, "rotulo": None, "confianca": 0.0}
+        return {"item": item, "iri": iri, "rotulo": indice.rotulos.get(iri),
+                "confianca": 0.95 if modo == "exato" else 0.7}
+
+    candidato = candidatos_item(item)[-1]
+    digito = int(hashlib.sha256(item.encode("utf-8")).hexdigest()[:8], 16)
+    return {"item": item, "iri": IRI_SINTETICO + quote(normalizar(candidato).replace(" ", "_"), safe=""),
+            "rotulo": candidato, "confianca": round(0.5 + (digito % 500) / 1000, 3)}
+
+
+# ================================================================
+# SERVIDOR HTTP
+# ================================================================
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo, cabecalhos=()):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in cabecalhos:
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_POST(self):
+        servidor = self.server
+        if self.path != ROTA:
+            self._responder(404, {"error": {"message": f"rota desconhecida: {self.path}"}})
+            return
+        try:
+            pedido = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            itens = json.loads(pedido["messages"][-1]["content"])["itens"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self._responder(400, {"error": {"message": f"pedido inválido: {e}"}})
+            return
+
+        with servidor.trava:
+            servidor.requisicoes += 1
+            falhar = servidor.rng.random() < servidor.taxa_falha
+            cauda = servidor.rng.random() < servidor.prob_cauda
+
+        latencia = servidor.latencia_base_ms + servidor.latencia_item_ms * len(itens)
+        time.sleep(latencia * (servidor.fator_cauda if cauda else 1.0) / 1000)
+        if falhar:
+            with servidor.trava:
+                servidor.falhas += 1
+            self._responder(503, {"error": {"message": "sobrecarregado"}}, [("Retry-After", "0")])
+            return
+
+        with servidor.trava:
+            servidor.itens += len(itens)
+        ligacoes = [ligacao_deterministica(str(item), servidor.indice) for item in itens]
+        self._responder(200, {
+            "object": "chat.completion",
+            "model": pedido.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                "role": "assistant",
+                "content": json.dumps({"ligacoes": ligacoes}, ensure_ascii=False),
+            }}],
+        })
+
+
+class ServidorLocal(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host=HOST, porta=PORTA, indice=None, latencia_base_ms=LATENCIA_BASE_MS,
+                 latencia_item_ms=LATENCIA_ITEM_MS, prob_cauda=PROB_CAUDA, fator_cauda=FATOR_CAUDA,
+                 taxa_falha=TAXA_FALHA, seed=0):
+        # porta=0 escolhe uma porta livre (ver self.endpoint)
+        super().__init__((host, porta), _Manipulador)
+        self.indice = indice
+        self.latencia_base_ms = latencia_base_ms
+        self.latencia_item_ms = latencia_item_ms
+        self.prob_cauda = prob_cauda
+        self.fator_cauda = fator_cauda
+        self.taxa_falha = taxa_falha
+        self.rng = random.Random(seed)
+        self.trava = threading.Lock()
+        self.requisicoes = 0
+        self.falhas = 0
+        self.itens = 0
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}{ROTA}"
+
+    def iniciar(self):
+        # em segundo plano, para o benchmark rodar no mesmo processo
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self.shutdown()
+        self.server_close()
+
+    def resumo(self):
+        return (f"Servidor local: {self.requisicoes} requisições, {self.itens} itens ligados, "
+                f"{self.falhas} respondidas com 503")
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita o endpoint do LLM de entity linking")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("-p", "--porta", type=int, default=PORTA)
+    parser.add_argument("-t", "--ontologia", action="append", default=[],
+                        help="liga os itens pelos rótulos desta ontologia (.ttl, .nt, .owl); pode repetir")
+    parser.add_argument("--latencia-ms", type=float, default=LATENCIA_BASE_MS)
+    parser.add_argument("--latencia-item-ms", type=float, default=LATENCIA_ITEM_MS)
+    parser.add_argument("--taxa-falha", type=float, default=TAXA_FALHA)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    indice = None
+    if args.ontologia:
+        indice = IndiceTermos()
+        for caminho in args.ontologia:
+            indice.adicionar_triplas(triplas_arquivo(caminho))
+
+    servidor = ServidorLocal(args.host, args.porta, indice, args.latencia_ms, args.latencia_item_ms,
+                             taxa_falha=args.taxa_falha, seed=args.seed)
+    print(f"📌 Servidor local em {servidor.endpoint} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        print(servidor.resumo())
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+mlxtend = pytest.importorskip("mlxtend.frequent_patterns")
+
+from mineracao_bitset import BitsetsVerticais, OrcamentoMineracao, minerar_ids, minerar_itemsets
+from geracao_regras import COLUNAS_COMPLETAS, completar_metricas, gerar_regras
+from reticulado import PREFIXO_ALVO
+from preprocessamento import CAMINHO_CONTEXTO, pre_processamento
+
+
+# ================================================================
+# MATRIZ PEQUENA E FIXA (MESMO FORMATO DO ONE-HOT DO pre_processamento)
+# ================================================================
+GRADE = [(0.02, 2), (0.05, 4), (0.1, 7), (0.3, 3)]
+# pontos da grade do GA sobre o CSV de contexto que acompanha o repositório
+GRADE_CONTEXTO = [(0.01, 7), (0.05, 3), (0.2, 5), (0.0123, 6)]
+CSV_CONTEXTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), CAMINHO_CONTEXTO)
+MIN_CONFIANCA = 0.4
+
+
+@pytest.fixture(scope="module")
+def dados():
+    rng = np.random.default_rng(0)
+    n = 300
+    classe = rng.integers(0, 3, n)
+    colunas = {f"ArrhythmiaClass={c}": classe == i for i, c in enumerate(["AF", "VT", "Normal"])}
+    atividade = rng.integers(0, 3, n)
+    colunas.update({f"ActivityClass_mapped={a}": atividade == i for i, a in enumerate(["lying", "sitting", "walking"])})
+    # itens correlacionados com a classe, para haver regras com lift alto
+    colunas["acc_bin=acc_alta"] = (classe == 1) ^ (rng.random(n) < 0.2)
+    colunas["gender_mapped=gender_M"] = rng.random(n) < 0.5
+    colunas["age_bin=Adult"] = (atividade == 0) | (rng.random(n) < 0.3)
+    return pd.DataFrame(colunas)
+
+
+def _chaves(regras):
+    return list(zip(regras["antecedents"], regras["consequents"]))
+
+
+# ================================================================
+# ITEMSETS: minerar_itemsets ≡ mlxtend apriori
+# ================================================================
+@pytest.mark.parametrize("min_support, max_len", GRADE)
+def test_itemsets_iguais_ao_apriori(dados, min_support, max_len):
+    esperado = mlxtend.apriori(dados, min_support=min_support, use_colnames=True, max_len=max_len)
+    obtido = minerar_itemsets(dados, min_support, use_colnames=True, max_len=max_len)
+    pd.testing.assert_frame_equal(esperado, obtido)
+
+
+# ================================================================
+# REGRAS: gerar_regras ≡ association_rules filtrado pela classe de arritmia
+# ================================================================
+def _regras_mlxtend(dados, min_support, max_len):
+    itemsets = mlxtend.apriori(dados, min_support=min_support, use_colnames=True, max_len=max_len)
+    # num_itemsets=1: confiança = sAC / sA, como em gerar_regras; com
+    # len(dados) o mlxtend calcula (sAC·n) / (sA·n), que arredonda diferente
+    # justamente nas regras com confiança igual ao limite (ex.: 26/65 = 0.4)
+    regras = mlxtend.association_rules(itemsets, num_itemsets=1, metric="confidence",
+                                       min_threshold=MIN_CONFIANCA)
+    com_alvo = (regras["antecedents"].map(lambda i: any(str(x).startswith(PREFIXO_ALVO) for x in i)) |
+                regras["consequents"].map(lambda i: any(str(x).startswith(PREFIXO_ALVO) for x in i)))
+    return regras[com_alvo].reset_index(drop=True)
+
+
+def _regras_bitset(dados, min_support, max_len, orcamento=None):
+    bitsets = BitsetsVerticais(dados)
+    alvos = [i for i, c in enumerate(bitsets.colunas) if c.startswith(PREFIXO_ALVO)]
+    ids, suportes = minerar_ids(bitsets, min_support, max_len, orcamento)
+    return completar_metricas(gerar_regras(ids, suportes, bitsets.colunas, alvos, MIN_CONFIANCA))
+
+
+def _comparar(esperado, obtido):
+    assert len(obtido) == len(esperado)
+    assert set(_chaves(obtido)) == set(_chaves(esperado))
+    esperado = esperado.set_index(["antecedents", "consequents"])
+    obtido = obtido.set_index(["antecedents", "consequents"]).loc[esperado.index]
+    metricas = [c for c in COLUNAS_COMPLETAS[2:] if c in esperado.columns]
+    np.testing.assert_allclose(obtido[metricas].to_numpy(float), esperado[metricas].to_numpy(float),
+                               rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("min_support, max_len", GRADE)
+def test_regras_iguais_ao_association_rules(dados, min_support, max_len):
+    esperado = _regras_mlxtend(dados, min_support, max_len)
+    obtido = _regras_bitset(dados, min_support, max_len)
+    assert len(obtido) > 0 or len(esperado) == 0
+    _comparar(esperado, obtido)
+
+
+def test_regras_com_despejo_em_disco(dados, tmp_path):
+    # orçamento de memória mínimo: todos os níveis passam pelo disco
+    orcamento = OrcamentoMineracao(max_bytes=1, pasta=str(tmp_path))
+    _comparar(_regras_mlxtend(dados, 0.02, 4), _regras_bitset(dados, 0.02, 4, orcamento))
+
+
+# ================================================================
+# DADOS REAIS: contexto_das_arritmias.csv pelo pre_processamento
+# ================================================================
+@pytest.fixture(scope="module")
+def contexto():
+    if not os.path.exists(CSV_CONTEXTO):
+        pytest.skip(f"{CSV_CONTEXTO} ausente")
+    return pre_processamento(CSV_CONTEXTO, usar_colunar=False)
+
+
+@pytest.mark.parametrize("min_support, max_len", GRADE_CONTEXTO)
+def test_contexto_igual_ao_mlxtend(contexto, min_support, max_len):
+    esperado = mlxtend.apriori(contexto, min_support=min_support, use_colnames=True, max_len=max_len)
+    obtido = minerar_itemsets(contexto, min_support, use_colnames=True, max_len=max_len)
+    pd.testing.assert_frame_equal(esperado, obtido)
+
+    regras = _regras_bitset(contexto, min_support, max_len)
+    assert len(regras) > 0
+    _comparar(_regras_mlxtend(contexto, min_support, max_len), regras)
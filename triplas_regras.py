@@ -0,0 +1,217 @@
+import os
+import ast
+import math
+import time
+import argparse
+from urllib.parse import quote
+
+from ontologia import IndiceTermos, triplas_arquivo, RDF, RDFS, SKOS
+
+
+# ================================================================
+# CONFIGURAÇÕES
+# ================================================================
+ARM = "https://github.com/Kayquemts/LLM-and-Ontologies/arm#"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+DESTINO = "regras.nt"
+
+LOTE_REGRAS = 4096          # regras lidas do repositório por vez
+BUFFER_ESCRITA = 1 << 20    # bytes acumulados antes de cada escrita no disco
+
+# item resolvido por rótulo exato → skos:exactMatch; por prefixo → skos:closeMatch
+RELACAO_LIGACAO = {"exato": SKOS + "exactMatch", "prefixo": SKOS + "closeMatch"}
+
+PREFIXOS_TURTLE = {"arm": ARM, "rdf": RDF, "rdfs": RDFS, "skos": SKOS, "xsd": XSD}
+
+
+def _predicado_metrica(nome):
+    # "antecedent support" → arm:antecedent_support
+    return ARM + nome.replace(" ", "_")
+
+
+# ================================================================
+# FONTES DE REGRAS (UMA REGRA POR VEZ)
+# ================================================================
+def regras_repositorio(pasta, somente_melhor=False):
+    # → (id, antecedentes, consequentes, {métrica: valor}); as métricas são
+    # lidas do memory-map em fatias de LOTE_REGRAS regras
+    from repositorio_regras import RepositorioRegras, METRICAS
+
+    repositorio = RepositorioRegras(pasta)
+    ids = repositorio.consultar(somente_melhor=True) if somente_melhor else None
+    total = len(repositorio) if ids is None else len(ids)
+    for inicio in range(0, total, LOTE_REGRAS):
+        lote = range(inicio, min(inicio + LOTE_REGRAS, total)) if ids is None else ids[inicio:inicio + LOTE_REGRAS]
+        lote = [int(r) for r in lote]
+        valores = {nome: repositorio.metricas[nome][lote[0]:lote[-1] + 1] if ids is None
+                   else repositorio.metricas[nome][lote] for nome in METRICAS}
+        for j, regra in enumerate(lote):
+            yield (regra, repositorio.itens("antecedentes", regra), repositorio.itens("consequentes", regra),
+                   {nome: float(v[j]) for nome, v in valores.items()})
+
+
+def _itens_frozenset(texto):
+    # "frozenset({'a', 'b'})" (CSV antigo) → ('a', 'b')
+    texto = str(texto).strip()
+    if texto.startswith("frozenset(") and texto.endswith(")"):
+        texto = texto[len("frozenset("):-1]
+    return tuple(sorted(ast.literal_eval(texto))) if texto else ()
+
+
+def regras_csv(caminho, chunksize=LOTE_REGRAS):
+    # resultado_GA.csv lido em blocos: memória limitada a um bloco
+    import pandas as pd
+
+    regra = 0
+    for bloco in pd.read_csv(caminho, chunksize=chunksize):
+        metricas = [c for c in bloco.columns if c not in ("antecedents", "consequents")]
+        for linha in bloco.itertuples(index=False):
+            valores = dict(zip(bloco.columns, linha))
+            yield (regra, _itens_frozenset(valores["antecedents"]), _itens_frozenset(valores["consequents"]),
+                   {nome: float(valores[nome]) for nome in metricas})
+            regra += 1
+
+
+# ================================================================
+# TERMOS RDF
+# ================================================================
+def _iri(iri):
+    return f"<{iri}>"
+
+
+def _literal(texto):
+    texto = str(texto).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    return f'"{texto}"'
+
+
+def _double(valor):
+    if math.isnan(valor):
+        lexico = "NaN"
+    elif math.isinf(valor):
+        lexico = "INF" if valor > 0 else "-INF"
+    else:
+        lexico = repr(float(valor))
+    return f'"{lexico}"^^<{XSD}double>'
+
+
+def iri_item(item):
+    return ARM + "item/" + quote(str(item), safe="")
+
+
+def iri_regra(regra):
+    return ARM + f"regra/{regra}"
+
+
+# ================================================================
+# ESCRITA EM FLUXO (N-TRIPLES OU TURTLE)
+# ================================================================
+class EscritorTriplas:
+    # cada regra vira um bloco de triplas escrito na hora; só o conjunto de
+    # itens já descritos (limitado ao vocabulário) fica em memória
+    def __init__(self, caminho, indice=None, formato=None):
+        self.caminho = caminho
+        self.formato = formato or ("ttl" if caminho.lower().endswith(".ttl") else "nt")
+        self.indice = indice
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.arquivo = open(caminho + ".tmp", "w", encoding="utf-8", buffering=BUFFER_ESCRITA)
+        self.itens_descritos = set()
+        self.ligacoes = {"exato": 0, "prefixo": 0, None: 0}
+        self.n_regras = 0
+        self.n_triplas = 0
+
+        if self.formato == "ttl":
+            for prefixo, iri in PREFIXOS_TURTLE.items():
+                self.arquivo.write(f"@prefix {prefixo}: <{iri}> .\n")
+            self.arquivo.write("\n")
+
+    def _termo(self, iri):
+        # em Turtle os IRIs dos vocabulários conhecidos saem abreviados
+        if self.formato == "ttl":
+            for prefixo, base in PREFIXOS_TURTLE.items():
+                local = iri[len(base):]
+                if iri.startswith(base) and local and "/" not in local and "%" not in local:
+                    return f"{prefixo}:{local}"
+        return _iri(iri)
+
+    def _escrever(self, sujeito, pares):
+        # pares: [(predicado IRI, objeto já formatado)]
+        if self.formato == "ttl":
+            corpo = " ;\n    ".join(f"{self._termo(p)} {o}" for p, o in pares)
+            self.arquivo.write(f"{self._termo(sujeito)} {corpo} .\n")
+        else:
+            s = _iri(sujeito)
+            self.arquivo.write("".join(f"{s} {_iri(p)} {o} .\n" for p, o in pares))
+        self.n_triplas += len(pares)
+
+    def _descrever_item(self, item):
+        # tipo, rótulo, atributo e a ligação com a ontologia: uma vez por item
+        self.itens_descritos.add(item)
+        atributo, _, _ = str(item).partition("=")
+        pares = [
+            (RDF + "type", self._termo(ARM + "Item")),
+            (RDFS + "label", _literal(item)),
+            (ARM + "atributo", _literal(atributo)),
+        ]
+        iri, modo = self.indice.resolver_item(item) if self.indice is not None else (None, None)
+        self.ligacoes[modo] += 1
+        if iri is not None:
+            pares.append((RELACAO_LIGACAO[modo], _iri(iri)))
+        self._escrever(iri_item(item), pares)
+
+    def escrever_regra(self, regra, antecedentes, consequentes, metricas):
+        for item in (*antecedentes, *consequentes):
+            if item not in self.itens_descritos:
+                self._descrever_item(item)
+
+        pares = [(RDF + "type", self._termo(ARM + "Regra"))]
+        pares += [(ARM + "antecedente", self._termo(iri_item(i))) for i in antecedentes]
+        pares += [(ARM + "consequente", self._termo(iri_item(i))) for i in consequentes]
+        pares += [(_predicado_metrica(nome), _double(valor)) for nome, valor in metricas.items()]
+        self._escrever(iri_regra(regra), pares)
+        self.n_regras += 1
+
+    def fechar(self):
+        self.arquivo.close()
+        os.replace(self.caminho + ".tmp", self.caminho)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.fechar()
+        else:
+            self.arquivo.close()
+            os.remove(self.caminho + ".tmp")
+
+    def resumo(self):
+        return (f"{self.n_regras} regras, {self.n_triplas} triplas, {len(self.itens_descritos)} itens "
+                f"({self.ligacoes['exato']} ligados por rótulo exato, {self.ligacoes['prefixo']} por prefixo, "
+                f"{self.ligacoes[None]} sem termo na ontologia)")
+
+
+# ================================================================
+# EXECUÇÃO PRINCIPAL
+# ================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Liga os itens das regras a uma ontologia local e grava as triplas")
+    parser.add_argument("-t", "--ontologia", action="append", default=[],
+                        help="arquivo .ttl, .nt ou .owl (RDF/XML); pode repetir")
+    parser.add_argument("-r", "--regras", default="resultado_GA.regras", help="pasta do repositório de regras")
+    parser.add_argument("--csv", default=None, help="lê as regras de um resultado_GA.csv em vez do repositório")
+    parser.add_argument("--melhor", action="store_true", help="só as regras do melhor indivíduo (repositório)")
+    parser.add_argument("-o", "--saida", default=DESTINO, help="arquivo de saída (.nt ou .ttl)")
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    indice = IndiceTermos()
+    for caminho in args.ontologia:
+        indice.adicionar_triplas(triplas_arquivo(caminho))
+    print(f"📌 Índice da ontologia: {len(indice)} rótulos ({time.perf_counter() - t:.3f}s)")
+
+    t = time.perf_counter()
+    fonte = regras_csv(args.csv) if args.csv else regras_repositorio(args.regras, args.melhor)
+    with EscritorTriplas(args.saida, indice) as escritor:
+        for regra in fonte:
+            escritor.escrever_regra(*regra)
+    print(f"✔ {escritor.resumo()} gravadas em {args.saida} ({time.perf_counter() - t:.3f}s)")